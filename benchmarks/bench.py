@@ -0,0 +1,347 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import itertools
+import tracemalloc
+import numpy as np
+import numba
+from datetime import datetime, timezone
+from typing import Union, List, Tuple, Dict, Any, Iterator
+from wildboottest.wildboottest import WildboottestHC, WildboottestCL
+from wildboottest.kernels import warmup
+
+# parameter grids of the benchmark suite. each grid is swept for both estimators;
+# HC runs skip G and the weights types and bootstrap types it does not support
+GRIDS = {
+    "quick": {
+        "N": [2_000],
+        "k": [5],
+        "G": [20],
+        "B": [999],
+        "bootstrap_type": ["11", "13", "31", "33", "21"],
+        "weights_type": ["rademacher"],
+        "backend": ["blas"],
+    },
+    "full": {
+        "N": [10_000, 100_000],
+        "k": [5, 20],
+        "G": [20, 200],
+        "B": [9_999, 99_999],
+        "bootstrap_type": ["11", "13", "31", "33", "21"],
+        "weights_type": ["rademacher", "norm", "webb"],
+        "backend": ["blas", "numba"],
+    },
+}
+
+# the bootstrap types and weights types supported by each estimator
+_SUPPORTED = {
+    "HC": {"bootstrap_type": ["11", "21", "31"], "weights_type": ["rademacher", "norm"]},
+    "CL": {"bootstrap_type": ["11", "13", "31", "33"], "weights_type": ["rademacher", "mammen", "norm", "webb"]},
+}
+
+def benchmark_cases(grid: Union[str, Dict[str, List[Any]]] = "quick", estimators: Tuple[str, ...] = ("HC", "CL")) -> Iterator[Dict[str, Any]]:
+    """Generate the benchmark cases of a parameter grid.
+
+    Args:
+        grid (Union[str, Dict[str, List[Any]]], optional): The name of a grid in `GRIDS`, or a dict of the same form,
+            with lists of values for 'N', 'k', 'G', 'B', 'bootstrap_type', 'weights_type' and 'backend'. Defaults to "quick".
+        estimators (Tuple[str, ...], optional): The estimators to run, "HC" for `WildboottestHC` and "CL" for `WildboottestCL`.
+            Defaults to ("HC", "CL").
+
+    Raises:
+        ValueError: Raise if the grid or an estimator is unknown
+
+    Returns:
+        Iterator[Dict[str, Any]]: One dict per case, with the estimator, the variance estimator ('HC', 'CRV1' or 'CRV3')
+            and the grid parameters. Parameters that do not apply to an estimator (G and backend for HC) are None.
+    """
+
+    if isinstance(grid, str):
+        if grid not in GRIDS:
+            raise ValueError(f"grid must be one of {list(GRIDS)}, but got '{grid}'.")
+        grid = GRIDS[grid]
+
+    for estimator in estimators:
+        if estimator not in _SUPPORTED:
+            raise ValueError(f"estimators must be 'HC' or 'CL', but got '{estimator}'.")
+
+        seen = set()
+        for N, k, G, B, bootstrap_type, weights_type, backend in itertools.product(
+            grid["N"], grid["k"], grid["G"], grid["B"], grid["bootstrap_type"], grid["weights_type"], grid["backend"]
+        ):
+            if bootstrap_type not in _SUPPORTED[estimator]["bootstrap_type"] or weights_type not in _SUPPORTED[estimator]["weights_type"]:
+                continue
+
+            if estimator == "HC":
+                G, backend, variance = None, None, "HC"
+            else:
+                variance = "CRV" + bootstrap_type[1]
+
+            case = {"estimator": estimator, "variance": variance, "N": N, "k": k, "G": G, "B": B,
+                    "bootstrap_type": bootstrap_type, "weights_type": weights_type, "backend": backend}
+            key = _case_key(case)
+            if key not in seen:
+                seen.add(key)
+                yield case
+
+def _case_key(case):
+    return json.dumps(case, sort_keys = True)
+
+def _simulate(N, k, G, seed):
+
+    rs = np.random.RandomState(seed)
+    X = rs.normal(0, 1, N * k).reshape((N, k))
+    X[:, 0] = 1
+    Y = X @ rs.normal(0, 1, k) + rs.normal(0, 1, N)
+    cluster = rs.choice(G, N) if G is not None else None
+    R = np.zeros(k)
+    R[1] = 1
+
+    return X, Y, cluster, R
+
+def _stages(case, X, Y, cluster, R, seed):
+
+    # the stages of one bootstrap run as (name, function) pairs, in the order
+    # in which they are called. the first stage constructs the object
+    state = {}
+
+    def init():
+        if case["estimator"] == "HC":
+            state["boot"] = WildboottestHC(X = X, Y = Y, R = R, r = 0, B = case["B"], seed = seed)
+        else:
+            state["boot"] = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = case["B"], seed = seed)
+
+    def call(method, **kwargs):
+        return method, lambda: getattr(state["boot"], method)(**kwargs)
+
+    if case["estimator"] == "HC":
+        return [
+            ("__init__", init),
+            call("get_adjustments", bootstrap_type = case["bootstrap_type"]),
+            call("get_uhat", impose_null = True),
+            call("get_tboot", weights_type = case["weights_type"]),
+            call("get_tstat"),
+            call("get_pvalue"),
+        ]
+
+    return [
+        ("__init__", init),
+        call("get_scores", bootstrap_type = case["bootstrap_type"], impose_null = True),
+        call("get_weights", weights_type = case["weights_type"]),
+        call("get_numer"),
+        call("get_denom", backend = case["backend"]),
+        call("get_tboot"),
+        call("get_vcov"),
+        call("get_tstat"),
+        call("get_pvalue"),
+    ]
+
+def run_case(case: Dict[str, Any], repeat: int = 3, seed: int = 12341) -> Dict[str, Any]:
+    """Time a single benchmark case, stage by stage.
+
+    Wall times are the minimum over `repeat` runs. Peak memory is measured in a separate run under
+    `tracemalloc` (which also traces numpy allocations), as the number of bytes newly allocated and
+    held at the peak of each stage, since tracing slows down the timed runs.
+
+    Args:
+        case (Dict[str, Any]): A benchmark case, see `benchmark_cases()`
+        repeat (int, optional): The number of timed runs. Defaults to 3.
+        seed (int, optional): The seed of the simulated data and of the bootstrap weights. Defaults to 12341.
+
+    Returns:
+        Dict[str, Any]: The case, the wall time (in seconds) and peak memory (in bytes) of each stage,
+            and the wall time and peak memory of the full run
+    """
+
+    X, Y, cluster, R = _simulate(case["N"], case["k"], case["G"], seed)
+
+    times = []
+    for _ in range(repeat):
+        run_times = {}
+        for name, stage in _stages(case, X, Y, cluster, R, seed):
+            start = time.perf_counter()
+            stage()
+            run_times[name] = time.perf_counter() - start
+        times.append(run_times)
+
+    peak_bytes = {}
+    for name, stage in _stages(case, X, Y, cluster, R, seed):
+        tracemalloc.start()
+        try:
+            stage()
+            peak_bytes[name] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    stages = {name: {"time": min(run_times[name] for run_times in times), "peak_bytes": peak_bytes[name]} for name in peak_bytes}
+
+    return {
+        "case": case,
+        "stages": stages,
+        "time": min(sum(run_times.values()) for run_times in times),
+        "peak_bytes": max(peak_bytes.values()),
+    }
+
+def _git_revision():
+    # the commit of the checkout the suite is run from, and whether it has
+    # uncommitted changes. None outside of a git checkout
+    def git(*args):
+        return subprocess.run(["git", *args], cwd = os.path.dirname(os.path.abspath(__file__)),
+                              capture_output = True, text = True, check = True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": git("status", "--porcelain", "--untracked-files=no") != ""}
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(grid: Union[str, Dict[str, List[Any]]] = "quick", estimators: Tuple[str, ...] = ("HC", "CL"),
+                   repeat: int = 3, seed: int = 12341, output: Union[str, None] = None,
+                   verbose: bool = False) -> Dict[str, Any]:
+    """Run all cases of a benchmark grid.
+
+    The numba kernels are compiled before any case is timed.
+
+    Args:
+        grid (Union[str, Dict[str, List[Any]]], optional): The grid to sweep, see `benchmark_cases()`. Defaults to "quick".
+        estimators (Tuple[str, ...], optional): The estimators to run. Defaults to ("HC", "CL").
+        repeat (int, optional): The number of timed runs per case. Defaults to 3.
+        seed (int, optional): The seed of the simulated data and of the bootstrap weights. Defaults to 12341.
+        output (Union[str, None], optional): A path to write the results to, as JSON. Defaults to None.
+        verbose (bool, optional): Whether to print one line per case to stderr. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: The results, with keys 'meta' (git revision, versions, platform and run settings) and 'results'
+            (one entry per case, see `run_case()`)
+
+    Example:
+
+        >>> from benchmarks.bench import run_benchmarks, compare_benchmarks
+        >>> run_benchmarks("quick", output = "baseline.json")
+        >>> # after some changes
+        >>> current = run_benchmarks("quick", output = "current.json")
+        >>> compare_benchmarks("baseline.json", current)
+    """
+
+    warmup()
+
+    results = []
+    for case in benchmark_cases(grid, estimators):
+        result = run_case(case, repeat = repeat, seed = seed)
+        results.append(result)
+        if verbose:
+            print(f"{_case_label(case)}: {result['time']:.4f}s, {result['peak_bytes'] / 2**20:.1f} MiB", file = sys.stderr, flush = True)
+
+    benchmarks = {
+        "meta": {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "numba": numba.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "numba_threads": numba.get_num_threads(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "grid": grid,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(benchmarks, f, indent = 2)
+
+    return benchmarks
+
+def _case_label(case):
+    return " ".join(f"{name}={value}" for name, value in case.items() if value is not None)
+
+def _load(benchmarks):
+    if isinstance(benchmarks, dict):
+        return benchmarks
+    with open(benchmarks) as f:
+        return json.load(f)
+
+def compare_benchmarks(baseline: Union[str, Dict[str, Any]], current: Union[str, Dict[str, Any]],
+                       threshold: float = 1.25, min_time: float = 1e-3) -> List[Dict[str, Any]]:
+    """Find the stages whose wall time or peak memory regressed between two benchmark runs.
+
+    Only cases present in both runs are compared.
+
+    Args:
+        baseline (Union[str, Dict[str, Any]]): The results of `run_benchmarks()`, or the path to their JSON file
+        current (Union[str, Dict[str, Any]]): The results to compare with the baseline, in the same form
+        threshold (float, optional): The ratio of current to baseline values beyond which a stage has regressed. Defaults to 1.25.
+        min_time (float, optional): Stages that took less than `min_time` seconds in the baseline are not
+            compared by wall time, as their timings are dominated by noise. Defaults to 1e-3.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per regression, with the case, the stage, the metric ('time' or
+            'peak_bytes'), the baseline and current values and their ratio
+    """
+
+    baseline = {_case_key(result["case"]): result for result in _load(baseline)["results"]}
+
+    regressions = []
+    for result in _load(current)["results"]:
+        base = baseline.get(_case_key(result["case"]))
+        if base is None:
+            continue
+        for stage, values in result["stages"].items():
+            if stage not in base["stages"]:
+                continue
+            for metric in ["time", "peak_bytes"]:
+                old, new = base["stages"][stage][metric], values[metric]
+                if old <= 0 or (metric == "time" and old < min_time):
+                    continue
+                if new > threshold * old:
+                    regressions.append({"case": result["case"], "stage": stage, "metric": metric,
+                                        "baseline": old, "current": new, "ratio": new / old})
+
+    return regressions
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """Command line interface of the benchmark suite.
+
+    `python -m benchmarks.bench run --grid quick --output results.json` runs a grid, and
+    `python -m benchmarks.bench compare baseline.json results.json` lists the regressions
+    between two runs, and exits with status 1 if there are any.
+    """
+
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks.bench", description = "Benchmarks of wildboottest.")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    run = commands.add_parser("run", help = "run a benchmark grid")
+    run.add_argument("--grid", default = "quick", choices = list(GRIDS))
+    run.add_argument("--estimators", nargs = "+", default = ["HC", "CL"], choices = list(_SUPPORTED))
+    run.add_argument("--repeat", type = int, default = 3)
+    run.add_argument("--seed", type = int, default = 12341)
+    run.add_argument("--output", default = None, help = "path of the JSON results")
+
+    compare = commands.add_parser("compare", help = "compare two benchmark runs")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type = float, default = 1.25)
+    compare.add_argument("--min-time", type = float, default = 1e-3)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        benchmarks = run_benchmarks(args.grid, args.estimators, repeat = args.repeat, seed = args.seed,
+                                    output = args.output, verbose = True)
+        if args.output is None:
+            json.dump(benchmarks, sys.stdout, indent = 2)
+        return 0
+
+    regressions = compare_benchmarks(args.baseline, args.current, threshold = args.threshold, min_time = args.min_time)
+    for regression in regressions:
+        print(f"{_case_label(regression['case'])} {regression['stage']} {regression['metric']}: "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['ratio']:.2f}x)")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
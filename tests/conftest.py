@@ -0,0 +1,21 @@
+import pytest
+import numpy as np
+
+
+@pytest.fixture
+def data():
+  # local random state, so that the global numpy state is left untouched
+  rs = np.random.RandomState(12312)
+  N = 500
+  k = 3
+  G = 20
+  X = rs.normal(0, 1, N * k).reshape((N,k))
+  X[:,0] = 1
+  beta = rs.normal(0,1,k)
+  beta[1] = 0.005
+  u = rs.normal(0,1,N)
+  Y = X @ beta + u
+  cluster = rs.choice(list(range(0,G)), N)
+  R = np.array([0,1,0])
+
+  return X, Y, cluster, R
@@ -0,0 +1,29 @@
+from wildboottest.wildboottest import DEFAULT_MAX_MEMORY
+
+
+def fit_cl(boot, bootstrap_type = "11", impose_null = True, weights_type = "rademacher", lazy = False,
+           backend = "blas", max_memory = DEFAULT_MAX_MEMORY, pval_type = "two-tailed"):
+
+  # all stages of a WildboottestCL object, from the scores to the p-value
+  boot.get_scores(bootstrap_type = bootstrap_type, impose_null = impose_null)
+  boot.get_weights(weights_type = weights_type, lazy = lazy)
+  boot.get_numer(max_memory = max_memory)
+  boot.get_denom(backend = backend, max_memory = max_memory)
+  boot.get_tboot()
+  boot.get_vcov()
+  boot.get_tstat()
+  boot.get_pvalue(pval_type = pval_type)
+
+  return boot
+
+
+def fit_hc(boot, bootstrap_type = "11", impose_null = True, weights_type = "rademacher", max_memory = DEFAULT_MAX_MEMORY):
+
+  # all stages of a WildboottestHC object, from the adjustments to the p-value
+  boot.get_adjustments(bootstrap_type = bootstrap_type)
+  boot.get_uhat(impose_null = impose_null)
+  boot.get_tboot(weights_type = weights_type, max_memory = max_memory)
+  boot.get_tstat()
+  boot.get_pvalue()
+
+  return boot
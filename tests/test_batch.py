@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as sm
+from wildboottest.wildboottest import wildboottest
+from wildboottest.batch import wildboottest_batch
+
+
+@pytest.fixture
+def data():
+  # local random state, so that the global numpy state is left untouched
+  rs = np.random.RandomState(8723)
+  N = 500
+  df = pd.DataFrame(rs.normal(0, 1, (N, 4)), columns = ["y1", "y2", "X1", "X2"])
+  df["y1"] = df["y1"] + 0.1 * df["X1"]
+  df["cluster"] = rs.choice(["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l"], N)
+  df.loc[3, "y2"] = np.nan
+  # fixed effects nested within the clusters
+  df["firm"] = (df["cluster"] + rs.choice(["0", "1"], N)).astype(object)
+  df.loc[5, "firm"] = None
+
+  return df
+
+
+def test_batch_matches_wildboottest(data):
+
+  '''
+  running specifications in a process pool, with data in shared memory,
+  gives the same results as running wildboottest() on each one
+  '''
+
+  specs = [
+    {"y": "y1", "x": ["X1", "X2"], "param": "X1", "cluster": "cluster"},
+    {"y": "y2", "x": ["X1", "X2"], "cluster": "cluster", "bootstrap_type": "31"},
+    {"y": "y1", "x": ["X1"], "param": "X1"},
+    {"y": "y1", "x": ["X1", "X2"], "cluster": "cluster", "fe": "firm"}
+  ]
+
+  res = wildboottest_batch(data, specs, B = 999, max_workers = 2, seed = 12341)
+
+  assert list(res.index.get_level_values("spec")) == [0, 1, 1, 1, 2, 3, 3]
+  assert np.all(res["time"] > 0)
+
+  expected = [
+    wildboottest(sm.ols("y1 ~ X1 + X2", data = data), B = 999, param = "X1", cluster = data.cluster, seed = 12341, show = False),
+    wildboottest(sm.ols("y2 ~ X1 + X2", data = data), B = 999, cluster = data.cluster[data.y2.notna()], bootstrap_type = "31", seed = 12341, show = False),
+    wildboottest(sm.ols("y1 ~ X1", data = data), B = 999, param = "X1", seed = 12341, show = False),
+    wildboottest(sm.ols("y1 ~ X1 + X2", data = data[data.firm.notna()]), B = 999, cluster = data.cluster[data.firm.notna()],
+                 fe = data.firm[data.firm.notna()], seed = 12341, show = False)
+  ]
+
+  for i, res_i in enumerate(expected):
+    pd.testing.assert_frame_equal(res.loc[i, ["statistic", "p-value"]], res_i)
+
+  with pytest.raises(ValueError):
+    wildboottest_batch(data, [{"y": "y1", "x": ["X3"]}], B = 999)
+  with pytest.raises(ValueError):
+    wildboottest_batch(data, [{"y": "y1", "x": ["X1"], "bootstraptype": "31"}], B = 999)
@@ -0,0 +1,83 @@
+import json
+import pytest
+
+from benchmarks.bench import benchmark_cases, run_benchmarks, compare_benchmarks, main
+
+
+@pytest.fixture
+def grid():
+  return {
+    "N": [200],
+    "k": [3],
+    "G": [10],
+    "B": [99],
+    "bootstrap_type": ["11", "33", "21"],
+    "weights_type": ["rademacher", "webb"],
+    "backend": ["blas", "numba"],
+  }
+
+
+def test_benchmark_cases(grid):
+
+  '''
+  HC cases skip the clusters, backends, bootstrap and weights types they do
+  not support; CL cases are labelled by their variance estimator
+  '''
+
+  cases = list(benchmark_cases(grid))
+  hc = [case for case in cases if case["estimator"] == "HC"]
+  cl = [case for case in cases if case["estimator"] == "CL"]
+
+  assert len(hc) == 2 and len(cl) == 8
+  assert all(case["G"] is None and case["backend"] is None and case["weights_type"] == "rademacher" for case in hc)
+  assert sorted(set(case["variance"] for case in cl)) == ["CRV1", "CRV3"]
+
+  with pytest.raises(ValueError):
+    list(benchmark_cases("huge"))
+
+
+def test_run_and_compare(grid, tmp_path):
+
+  '''
+  results are written as JSON with timings and peak memory for all stages,
+  and regressions beyond the threshold are reported
+  '''
+
+  grid = {**grid, "backend": ["blas"], "weights_type": ["rademacher"]}
+  output = tmp_path / "baseline.json"
+  benchmarks = run_benchmarks(grid, repeat = 1, output = str(output))
+
+  with open(output) as f:
+    assert json.load(f) == json.loads(json.dumps(benchmarks))
+
+  # run from a git checkout, the commit is recorded
+  revision = benchmarks["meta"]["revision"]
+  assert revision is None or len(revision["commit"]) == 40
+
+  stages = {
+    "HC": ["__init__", "get_adjustments", "get_uhat", "get_tboot", "get_tstat", "get_pvalue"],
+    "CL": ["__init__", "get_scores", "get_weights", "get_numer", "get_denom", "get_tboot", "get_vcov", "get_tstat", "get_pvalue"],
+  }
+  for result in benchmarks["results"]:
+    assert list(result["stages"]) == stages[result["case"]["estimator"]]
+    assert all(values["time"] >= 0 and values["peak_bytes"] >= 0 for values in result["stages"].values())
+    assert result["peak_bytes"] == max(values["peak_bytes"] for values in result["stages"].values())
+
+  assert compare_benchmarks(str(output), benchmarks) == []
+
+  # a slower and larger get_denom
+  current = json.loads(json.dumps(benchmarks))
+  stage = current["results"][-1]["stages"]["get_denom"]
+  stage["time"] = 2 * max(stage["time"], 1e-2)
+  stage["peak_bytes"] = 2 * stage["peak_bytes"]
+  regressions = compare_benchmarks(benchmarks, current)
+  if benchmarks["results"][-1]["stages"]["get_denom"]["time"] >= 1e-3:
+    assert [(r["stage"], r["metric"]) for r in regressions] == [("get_denom", "time"), ("get_denom", "peak_bytes")]
+  else:
+    assert [(r["stage"], r["metric"]) for r in regressions] == [("get_denom", "peak_bytes")]
+  assert compare_benchmarks(benchmarks, current, min_time = 0)[0]["metric"] == "time"
+
+  with open(tmp_path / "current.json", "w") as f:
+    json.dump(current, f)
+  assert main(["compare", str(output), str(tmp_path / "current.json")]) == 1
+  assert main(["compare", str(output), str(output)]) == 0
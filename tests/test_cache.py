@@ -0,0 +1,133 @@
+import os
+import time
+import pytest
+import numpy as np
+
+import wildboottest.wildboottest as wb
+from wildboottest.wildboottest import WildboottestCL
+from wildboottest.cache import DesignCache, fingerprint
+
+
+@pytest.fixture
+def data():
+  # local random state, so that the global numpy state is left untouched
+  rs = np.random.RandomState(5412)
+  N = 500
+  k = 3
+  G = 20
+  X = rs.normal(0, 1, N * k).reshape((N,k))
+  X[:,0] = 1
+  Y = X @ rs.normal(0, 1, k) + rs.normal(0, 1, N)
+  cluster = rs.choice(list(range(0,G)), N)
+  R = np.array([0,1,0])
+
+  return X, Y, cluster, R
+
+
+def _run(X, Y, cluster, R, bootstrap_type, impose_null, cache):
+
+  boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341, cache = cache)
+  boot.get_scores(bootstrap_type = bootstrap_type, impose_null = impose_null)
+  boot.get_weights(weights_type = "rademacher")
+  boot.get_numer()
+  boot.get_denom()
+  boot.get_tboot()
+  boot.get_vcov()
+  boot.get_tstat()
+  boot.get_pvalue()
+
+  return boot
+
+
+def test_cache_hit(data, tmp_path, monkeypatch):
+
+  '''
+  a repeat run on the same X and cluster loads all design-level objects
+  from the cache, and gives the same results as an uncached run
+  '''
+
+  X, Y, cluster, R = data
+  cache = DesignCache(tmp_path)
+
+  for bootstrap_type in ['11', '31', '13', '33']:
+    for impose_null in [True, False]:
+      boot = _run(X, Y, cluster, R, bootstrap_type, impose_null, cache = None)
+      boot_miss = _run(X, Y, cluster, R, bootstrap_type, impose_null, cache = cache)
+      assert np.allclose(boot.t_boot, boot_miss.t_boot)
+      assert np.isclose(boot.pvalue, boot_miss.pvalue)
+
+  # on a hit, neither the cluster grouping nor any inverse is recomputed,
+  # including for a different outcome
+  cases = [(Y_, bootstrap_type, impose_null) for Y_ in [Y, 2 * Y + 1] for bootstrap_type in ['11', '31', '13', '33'] for impose_null in [True, False]]
+  expected = [_run(X, Y_, cluster, R, bootstrap_type, impose_null, cache = None) for Y_, bootstrap_type, impose_null in cases]
+
+  def fail(*args, **kwargs):
+    raise AssertionError("recomputed a cached object")
+
+  monkeypatch.setattr(wb, "_group_by_cluster", fail)
+  monkeypatch.setattr(np.linalg, "pinv", fail)
+  monkeypatch.setattr(np.linalg, "inv", fail)
+
+  for (Y_, bootstrap_type, impose_null), boot in zip(cases, expected):
+    boot_hit = _run(X, Y_, cluster, R, bootstrap_type, impose_null, cache = str(tmp_path))
+    assert np.allclose(boot.t_boot, boot_hit.t_boot)
+    assert np.isclose(boot.pvalue, boot_hit.pvalue)
+
+
+def test_cache_keys(data, tmp_path):
+
+  '''
+  different X or clusters, or cluster ids of object dtype, are not read
+  from the cache
+  '''
+
+  X, Y, cluster, R = data
+  cache = DesignCache(tmp_path)
+
+  assert fingerprint(X, cluster) == fingerprint(X.copy(), cluster.copy())
+  assert fingerprint(X, cluster) != fingerprint(X, cluster[::-1])
+  assert fingerprint(X, cluster) != fingerprint(X.astype(np.float32), cluster)
+
+  _run(X, Y, cluster, R, "11", True, cache = cache)
+  boot = _run(X, Y, (cluster + 1) % 20, R, "11", True, cache = cache)
+  assert np.array_equal(boot.bootclustid, np.arange(20))
+  assert len(os.listdir(tmp_path)) == 2
+
+  cluster_str = np.array([f"c{g}" for g in cluster], dtype = object)
+  boot = _run(X, Y, cluster_str, R, "11", True, cache = cache)
+  assert len(os.listdir(tmp_path)) == 2
+  assert np.isclose(boot.pvalue, _run(X, Y, cluster_str, R, "11", True, cache = None).pvalue)
+
+  # corrupt entries are misses
+  for name in os.listdir(tmp_path):
+    with open(tmp_path / name, "wb") as f:
+      f.write(b"corrupt")
+  boot = _run(X, Y, cluster, R, "11", True, cache = cache)
+  assert np.isclose(boot.pvalue, _run(X, Y, cluster, R, "11", True, cache = None).pvalue)
+
+
+def test_cache_eviction(tmp_path):
+
+  '''
+  beyond max_bytes, the least recently used entries are evicted
+  '''
+
+  x = np.zeros(1000)
+  cache = DesignCache(tmp_path, max_bytes = 2500 * 8)
+
+  for key in ["a", "b"]:
+    assert cache.save(key, {"x": x})
+  # spread modification times, which may be coarse
+  os.utime(tmp_path / "a.npz", (time.time() - 10, time.time() - 10))
+  os.utime(tmp_path / "b.npz", (time.time() - 5, time.time() - 5))
+
+  # using "a" makes "b" the least recently used entry
+  assert np.array_equal(cache.load("a")["x"], x)
+  cache.save("c", {"x": x})
+
+  assert cache.load("b") is None
+  assert cache.load("a") is not None and cache.load("c") is not None
+  assert not cache.save("d", {"x": np.array(["a", 1], dtype = object)})
+
+  cache.clear()
+  assert os.listdir(tmp_path) == []
@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+
+from wildboottest.wildboottest import WildboottestHC, WildboottestCL
+
+
+@pytest.fixture
+def data():
+  rs = np.random.RandomState(8712)
+  N = 500
+  k = 3
+  G = 20
+  X = rs.normal(0, 1, N * k).reshape((N,k))
+  X[:,0] = 1
+  beta = rs.normal(0,1,k)
+  beta[1] = 0.1
+  u = rs.normal(0,1,N)
+  Y = X @ beta + u
+  cluster = rs.choice(list(range(0,G)), N)
+  R = np.array([0,1,0])
+
+  return X, Y, cluster, R
+
+
+def run_cl(X, Y, cluster, R, bootstrap_type, impose_null):
+
+  boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341)
+  boot.get_scores(bootstrap_type = bootstrap_type, impose_null = impose_null)
+  boot.get_weights(weights_type = "rademacher")
+  boot.get_numer()
+  boot.get_denom()
+  boot.get_tboot()
+  boot.get_vcov()
+  boot.get_tstat()
+  boot.get_pvalue()
+
+  return boot
+
+
+def test_cl_confint(data):
+
+  '''
+  just inside (outside) the bounds of the confidence interval, the
+  bootstrap test of H0: beta_1 = r must not reject (must reject). Testing
+  beta_1 = r is equivalent to testing beta_1 = 0 with outcome Y - r * X_1
+  '''
+
+  X, Y, cluster, R = data
+  alpha = 0.1
+
+  for bootstrap_type in ['11', '31', '13', '33']:
+    for impose_null in [True, False]:
+
+      boot = run_cl(X, Y, cluster, R, bootstrap_type, impose_null)
+      confint = boot.get_confint(alpha = alpha)
+      eps = 1e-4 * np.sqrt(boot.ssc * boot.vcov[1,1])
+
+      assert confint[0] < boot.beta_hat[1] < confint[1]
+      for bound, sign in zip(confint, [-1, 1]):
+        assert run_cl(X, Y - (bound - sign * eps) * X[:,1], cluster, R, bootstrap_type, impose_null).pvalue > alpha
+        assert run_cl(X, Y - (bound + sign * eps) * X[:,1], cluster, R, bootstrap_type, impose_null).pvalue <= alpha
+
+
+def test_hc_confint(data):
+
+  X, Y, cluster, R = data
+  alpha = 0.1
+
+  def run_hc(r):
+    boot = WildboottestHC(X = X, Y = Y, R = R, r = r, B = 999, seed = 12341)
+    boot.get_adjustments(bootstrap_type = "11")
+    boot.get_uhat(impose_null = True)
+    boot.get_tboot(weights_type = "rademacher")
+    boot.get_tstat()
+    boot.get_pvalue()
+    return boot
+
+  boot = run_hc(0)
+  confint = boot.get_confint(alpha = alpha)
+  eps = 1e-4 * abs(boot.beta_hat[1] / boot.t_stat)
+
+  assert confint[0] < boot.beta_hat[1] < confint[1]
+  for bound, sign in zip(confint, [-1, 1]):
+    assert run_hc(bound - sign * eps).pvalue > alpha
+    assert run_hc(bound + sign * eps).pvalue <= alpha
@@ -0,0 +1,360 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+import wildboottest.wildboottest as wb
+from wildboottest.wildboottest import WildboottestHC, WildboottestCL
+from wildboottest.kernels import warmup, compute_denom_serial, compute_denom_parallel
+from tests.helpers import fit_cl, fit_hc
+
+
+def test_hc_block_size_invariance(data):
+
+  '''
+  the batched heteroskedastic bootstrap needs to produce the same
+  bootstrap t-statistics independently of the block size, including
+  a block size of one (i.e. one weights vector per iteration)
+  '''
+
+  X, Y, cluster, R = data
+
+  for bootstrap_type in ['11', '21', '31']:
+    for weights_type in ['rademacher', 'norm']:
+
+      t_boot = []
+      for max_memory in [1, 8 * 4 * X.shape[0] * 7, 2**30]:
+        boot = WildboottestHC(X = X, Y = Y, R = R, r = 0, B = 99, seed = 12341)
+        fit_hc(boot, bootstrap_type = bootstrap_type, weights_type = weights_type, max_memory = max_memory)
+        t_boot.append(boot.t_boot)
+
+      assert np.allclose(t_boot[0], t_boot[1])
+      assert np.allclose(t_boot[0], t_boot[2])
+
+
+def _crv3_denom_loop(boot):
+
+  # per-draw reference implementation of the CRV3 bootstrap denominator
+  denom = np.zeros(boot.B)
+  inv_tXX_tXgXg = [np.linalg.pinv(boot.tXX - boot.tXgXg_list[ixg]) for ixg in range(boot.G)]
+
+  for b in range(boot.B):
+    scores_g_boot = np.transpose(boot.scores_mat) * boot.v[:,b][:,None]
+    scores_boot = np.sum(scores_g_boot, axis = 0)
+    delta_b_star = boot.tXXinv @ scores_boot
+    delta_diff = np.zeros((boot.G, boot.k))
+    for ixg in range(boot.G):
+      delta_diff[ixg,:] = (inv_tXX_tXgXg[ixg] @ (scores_boot - scores_g_boot[ixg,:]) - delta_b_star)**2
+    denom[b] = boot.ssc * (np.sum(delta_diff, axis = 0) @ boot.R)
+
+  return denom
+
+
+def test_denom_backends(data):
+
+  '''
+  the blockwise matrix product and the numba backends of the bootstrap
+  denominator need to coincide for CRV1 and CRV3 bootstrap types, and
+  the vectorized CRV3 denominator needs to match a per-draw loop
+  '''
+
+  X, Y, cluster, R = data
+
+  for bootstrap_type in ['11', '31', '13', '33']:
+    for impose_null in [True, False]:
+
+      denoms = []
+      for backend, max_memory in [('blas', 2**30), ('blas', 8 * 3 * 20 * 7), ('numba', None)]:
+        boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341)
+        boot.get_scores(bootstrap_type = bootstrap_type, impose_null = impose_null)
+        boot.get_weights(weights_type = "rademacher")
+        boot.get_numer()
+        if max_memory is None:
+          boot.get_denom(backend = backend)
+        else:
+          boot.get_denom(backend = backend, max_memory = max_memory)
+        denoms.append(boot.denom)
+
+      assert np.allclose(denoms[0], denoms[1], rtol = 1e-10, atol = 1e-12)
+      assert np.allclose(denoms[0], denoms[2], rtol = 1e-10, atol = 1e-12)
+
+      if bootstrap_type[1] == '3':
+        assert np.allclose(denoms[0], _crv3_denom_loop(boot), rtol = 1e-10, atol = 1e-12)
+
+
+def test_kernels_compiled_once(data):
+
+  '''
+  after warmup(), repeated calls to get_denom must not trigger any
+  additional numba compilation
+  '''
+
+  X, Y, cluster, R = data
+
+  warmup()
+  n_signatures = (len(compute_denom_serial.signatures), len(compute_denom_parallel.signatures))
+
+  for parallel in [True, False]:
+    for weights_type in ['rademacher', 'norm']:
+      boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 99, seed = 12341, parallel = parallel)
+      boot.get_scores(bootstrap_type = "11", impose_null = True)
+      boot.get_weights(weights_type = weights_type)
+      boot.get_numer()
+      boot.get_denom(backend = "numba")
+
+  assert n_signatures == (len(compute_denom_serial.signatures), len(compute_denom_parallel.signatures))
+
+
+def test_cluster_grouping(data):
+
+  '''
+  per-cluster cross-products must not depend on the row order or
+  on the cluster ids, and per-cluster slices need to be views
+  '''
+
+  X, Y, cluster, R = data
+
+  boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 99, seed = 12341)
+
+  perm = np.random.RandomState(1).permutation(X.shape[0])
+  boot_perm = WildboottestCL(X = X[perm], Y = Y[perm], cluster = pd.Series(cluster[perm] * 10 + 3), R = R, B = 99, seed = 12341)
+
+  assert boot.G == boot_perm.G == len(np.unique(cluster))
+  assert np.allclose(boot.tXgXg_list, boot_perm.tXgXg_list)
+  assert np.allclose(boot.tXgyg_list, boot_perm.tXgyg_list)
+
+  for ixg, g in enumerate(boot.bootclustid):
+    assert np.allclose(boot.tXgXg_list[ixg], X[cluster == g].T @ X[cluster == g])
+    assert boot.X_list[ixg].base is not None
+
+
+def test_cluster_cross_products(monkeypatch):
+
+  '''
+  batched per-cluster cross-products match per-cluster matrix products,
+  for single rows, padded batches, large clusters and unsorted rows
+  '''
+
+  rs = np.random.RandomState(3)
+  sizes = np.array([1, 2, 3, 5, 8, 8, 13, 300, 700] + [4] * 50)
+  cluster = rs.permutation(np.repeat(np.arange(len(sizes)), sizes))
+  X = rs.normal(size = (len(cluster), 4))
+  Y = rs.normal(size = (len(cluster), 2))
+
+  clustid, order, bounds = wb._group_by_cluster(cluster)
+  assert order is not None
+
+  # several batches per bucket
+  monkeypatch.setattr(wb, "_BATCH_MAX_BYTES", 2**10)
+  for Y_ in [Y, Y[:, 0]]:
+    tXgXg, tXgyg, tygyg = wb._cluster_cross_products(X, Y_, order, bounds)
+    for ixg, g in enumerate(clustid):
+      assert np.allclose(tXgXg[ixg], X[cluster == g].T @ X[cluster == g])
+      assert np.allclose(tXgyg[ixg], X[cluster == g].T @ Y_[cluster == g])
+      assert np.allclose(tygyg[ixg], np.sum(Y_[cluster == g]**2, axis = 0))
+
+  assert wb._cluster_cross_products(X, Y, order, bounds, with_tXgXg = False)[0] is None
+
+
+def test_leave_one_out_inverses():
+
+  '''
+  the leave-one-cluster-out inverses, via Cholesky, Sherman-Morrison-Woodbury
+  downdates of small clusters, or pseudo-inverses of singular matrices,
+  match the pseudo-inverses of X'X - X_g'X_g
+  '''
+
+  from wildboottest.wildboottest import _leave_one_out_inverses
+
+  rs = np.random.RandomState(3241)
+  k = 6
+  # clusters of 1 to 10 rows, i.e. both below and above k
+  N_g = rs.randint(1, 11, 200)
+  X = rs.normal(0, 1, (np.sum(N_g), k))
+  bounds = np.concatenate([[0], np.cumsum(N_g)])
+  X_list = [X[bounds[g]:bounds[g + 1]] for g in range(len(N_g))]
+  tXgXg_list = np.array([np.transpose(X_g) @ X_g for X_g in X_list])
+  tXX = np.sum(tXgXg_list, axis = 0)
+  expected = np.linalg.pinv(tXX[None, :, :] - tXgXg_list)
+
+  assert np.allclose(_leave_one_out_inverses(tXX, tXgXg_list, X_list), expected)
+  assert np.allclose(_leave_one_out_inverses(tXX, tXgXg_list), expected)
+
+  # a dummy for the first cluster: leaving it out is singular
+  X[:, -1] = 0
+  X[:N_g[0], -1] = 1
+  tXgXg_list = np.array([np.transpose(X_g) @ X_g for X_g in X_list])
+  tXX = np.sum(tXgXg_list, axis = 0)
+  expected = np.linalg.pinv(tXX[None, :, :] - tXgXg_list)
+
+  assert np.allclose(_leave_one_out_inverses(tXX, tXgXg_list, X_list), expected)
+  assert np.allclose(_leave_one_out_inverses(tXX, tXgXg_list), expected)
+
+
+def test_low_memory(data):
+
+  '''
+  the memory-lean mode only keeps per-cluster cross-products, but
+  needs to produce the same results
+  '''
+
+  X, Y, cluster, R = data
+
+  for bootstrap_type in ['11', '13', '31', '33']:
+
+    boots = [
+      WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341),
+      WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341, low_memory = True)
+    ]
+
+    for boot in boots:
+      fit_cl(boot, bootstrap_type = bootstrap_type)
+
+    assert boots[1].X is None and boots[1].X_list is None
+    assert np.allclose(boots[0].t_boot, boots[1].t_boot)
+    assert np.isclose(boots[0].t_stat, boots[1].t_stat)
+    assert np.isclose(boots[0].pvalue, boots[1].pvalue)
+
+    usage = boots[1].get_memory_usage()
+    assert "X" in boots[0].get_memory_usage() and "X" not in usage
+    assert usage["v"] == boots[1].v.nbytes
+    assert boots[1].peak_nbytes >= sum(usage.values())
+    assert boots[1].peak_nbytes < boots[0].peak_nbytes
+
+
+def test_from_chunks(data):
+
+  '''
+  accumulating per-cluster cross-products over chunks of rows, with
+  clusters spread across chunks, must reproduce the in-memory bootstrap
+  '''
+
+  X, Y, cluster, R = data
+
+  perm = np.random.RandomState(2).permutation(X.shape[0])
+  chunks = [(X[perm][i:i + 64], pd.Series(Y[perm][i:i + 64]), cluster[perm][i:i + 64]) for i in range(0, X.shape[0], 64)]
+
+  for bootstrap_type in ['11', '13', '31', '33']:
+
+    boots = [
+      WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341),
+      WildboottestCL.from_chunks(iter(chunks), R = R, B = 999, seed = 12341)
+    ]
+
+    for boot in boots:
+      fit_cl(boot, bootstrap_type = bootstrap_type)
+
+    assert boots[1].X_list is None
+    assert boots[0].N == boots[1].N
+    assert np.array_equal(boots[0].bootclustid, boots[1].bootclustid)
+    assert np.allclose(boots[0].tygyg_list, boots[1].tygyg_list)
+    assert np.allclose(boots[0].t_boot, boots[1].t_boot)
+    assert np.isclose(boots[0].t_stat, boots[1].t_stat)
+    assert np.isclose(boots[0].pvalue, boots[1].pvalue)
+
+  with pytest.raises(ValueError):
+    WildboottestCL.from_chunks(iter([]), R = R, B = 999)
+
+
+def test_lazy_weights(data):
+
+  '''
+  with lazily generated weights, results must not depend on the
+  block size and coincide with full enumeration if it is used
+  '''
+
+  X, Y, cluster, R = data
+
+  for weights_type in ['rademacher', 'webb']:
+    for bootstrap_type in ['11', '33']:
+
+      t_boot = []
+      for max_memory in [2**10, 2**14, 2**30]:
+        for backend in ['blas', 'numba']:
+          boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 2999, seed = 12341)
+          boot.get_scores(bootstrap_type = bootstrap_type, impose_null = True)
+          boot.get_weights(weights_type = weights_type, lazy = True)
+          boot.get_numer(max_memory = max_memory)
+          boot.get_denom(backend = backend, max_memory = max_memory)
+          boot.get_tboot()
+          t_boot.append(boot.t_boot)
+
+      assert boot.v is None
+      for t in t_boot[1:]:
+        assert np.allclose(t_boot[0], t)
+
+  boots = []
+  for lazy in [False, True]:
+    boot = WildboottestCL(X = X[:200], Y = Y[:200], cluster = cluster[:200] % 8, R = R, B = 999, seed = 12341)
+    boot.get_scores(bootstrap_type = "11", impose_null = True)
+    boot.get_weights(weights_type = "rademacher", lazy = lazy)
+    boot.get_numer()
+    boot.get_denom()
+    boot.get_tboot()
+    boots.append(boot)
+
+  assert boots[0].B == boots[1].B == 2**8
+  assert np.allclose(boots[0].t_boot, boots[1].t_boot)
+
+
+def test_full_enumeration_symmetry(data):
+
+  '''
+  under full enumeration, only half of the draws are evaluated and the
+  others follow from the symmetry of the rademacher weights. results match
+  a direct evaluation of all draws, for all engines
+  '''
+
+  X, Y, cluster, R = data
+  cluster = cluster % 9
+  R_mat = np.eye(X.shape[1])[1:]
+
+  for bootstrap_type in ['11', '13', '31', '33']:
+
+    boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 9999, seed = 12341)
+    boot.get_scores(bootstrap_type = bootstrap_type, impose_null = True)
+    boot.get_weights(weights_type = "rademacher")
+    assert boot.full_enumeration and boot.B == 2**9
+
+    C, H = boot._quadratic_form(boot._scores, np.einsum("qk,qkg->qg", boot._RtXXinv, boot._scores))
+    v = boot.v.astype(float)
+    numer = boot._RtXXinv[0] @ boot._scores[0] @ v
+    denom = boot.ssc * np.sum((C[0][:, None] * v - H[0] @ v)**2, axis = 0)
+
+    for backend in ['blas', 'numba']:
+      for lazy in [False, True]:
+        boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 9999, seed = 12341)
+        fit_cl(boot, bootstrap_type = bootstrap_type, lazy = lazy, backend = backend, max_memory = 2**12)
+        assert np.allclose(boot.numer, numer)
+        assert np.allclose(boot.denom, denom)
+
+        online = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 9999, seed = 12341)
+        online.get_scores(bootstrap_type = bootstrap_type, impose_null = True)
+        online.get_weights(weights_type = "rademacher", lazy = lazy)
+        online.get_pvalue_online(backend = backend, max_memory = 2**12, sample_size = 400)
+        assert np.isclose(online.pvalue, boot.pvalue)
+        assert np.allclose(online.t_boot_sample, boot.t_boot[:400])
+
+  # joint hypotheses and multiway clustering
+  for cluster_, R_, joint in [(cluster, R_mat, True), (np.column_stack([cluster, cluster // 3]), R, False)]:
+    boots = []
+    for online in [False, True]:
+      boot = WildboottestCL(X = X, Y = Y, cluster = cluster_, R = R_, B = 9999, seed = 12341, joint = joint)
+      boot.get_scores(bootstrap_type = "11", impose_null = True)
+      boot.get_weights(weights_type = "rademacher")
+      if online:
+        boot.get_pvalue_online(max_memory = 2**12)
+      else:
+        boot.get_numer(max_memory = 2**12)
+        boot.get_denom(max_memory = 2**12)
+        boot.get_tboot()
+        boot.get_vcov()
+        boot.get_tstat()
+        boot.get_pvalue()
+        v = boot.v.astype(float)
+        if joint:
+          assert np.allclose(boot.t_boot, boot.t_boot[::-1])
+        else:
+          assert np.allclose(boot.numer, boot.Cg @ v)
+          assert np.allclose(boot.denom, boot._multiway_denom(v)[0])
+      boots.append(boot)
+    assert np.isclose(boots[0].pvalue, boots[1].pvalue)
@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from wildboottest.wildboottest import WildboottestCL
+from tests.helpers import fit_cl
+
+
+def test_fixed_effects(data):
+
+  '''
+  absorbing fixed effects nested within the clusters reproduces the
+  bootstrap with fixed-effect dummies. with fixed effects that are not
+  nested, CRV1 t-statistics (and their degrees of freedom) still match
+  '''
+
+  X, Y, cluster, R = data
+  rs = np.random.RandomState(6543)
+  X = X[:, 1:]
+  R = R[1:]
+
+  fe_nested = cluster * 3 + rs.choice(3, len(Y))
+  fe_crossed = rs.choice(7, len(Y))
+
+  def run(X, R, fe, bootstrap_type, impose_null):
+    return fit_cl(WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341, fe = fe), bootstrap_type = bootstrap_type, impose_null = impose_null)
+
+  for fe, nested in [(fe_nested, True), (fe_crossed, False)]:
+
+    X_dummies = np.column_stack([X, pd.get_dummies(fe).values.astype(float)])
+    R_dummies = np.concatenate([R, np.zeros(X_dummies.shape[1] - len(R))])
+
+    for bootstrap_type in ['11', '31', '13', '33']:
+      for impose_null in [True, False]:
+
+        if nested:
+          boot = run(X, R, fe, bootstrap_type, impose_null)
+        else:
+          with pytest.warns(UserWarning, match = "not nested"):
+            boot = run(X, R, fe, bootstrap_type, impose_null)
+        boot_dummies = run(X_dummies, R_dummies, None, bootstrap_type, impose_null)
+
+        # all fixed-effect dummies are counted in the small sample correction
+        assert boot.k_fe == len(np.unique(fe))
+        if nested:
+          assert np.isclose(boot.t_stat, boot_dummies.t_stat)
+          assert np.isclose(boot.ssc, boot_dummies.ssc)
+          assert np.isclose(boot.pvalue, boot_dummies.pvalue)
+        elif bootstrap_type[1] == '1':
+          assert np.isclose(boot.t_stat, boot_dummies.t_stat)
+
+  with pytest.raises(ValueError):
+    WildboottestCL(X = np.column_stack([np.ones(len(Y)), X]), Y = Y, cluster = cluster, R = np.array([0, 1, 0]), B = 999, fe = fe_nested)
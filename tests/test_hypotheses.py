@@ -0,0 +1,116 @@
+import pytest
+import numpy as np
+
+from wildboottest.wildboottest import WildboottestHC, WildboottestCL
+from tests.helpers import fit_cl, fit_hc
+
+
+def test_multiple_hypotheses(data):
+
+  '''
+  testing all rows of R within one object (sharing the design and the
+  bootstrap weights) needs to reproduce separate runs per hypothesis
+  '''
+
+  X, Y, cluster, R = data
+  R_mat = np.eye(X.shape[1])
+
+  for bootstrap_type in ['11', '31', '13', '33']:
+    for impose_null in [True, False]:
+
+      boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R_mat, B = 999, seed = 12341)
+      fit_cl(boot, bootstrap_type = bootstrap_type, impose_null = impose_null)
+
+      assert boot.t_boot.shape == (X.shape[1], 999)
+
+      for iq in range(X.shape[1]):
+        boot_q = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R_mat[iq], B = 999, seed = 12341)
+        fit_cl(boot_q, bootstrap_type = bootstrap_type, impose_null = impose_null)
+
+        assert np.allclose(boot.t_boot[iq], boot_q.t_boot)
+        assert np.isclose(boot.t_stat[iq], boot_q.t_stat)
+        assert np.isclose(boot.pvalue[iq], boot_q.pvalue)
+
+  boot = WildboottestHC(X = X, Y = Y, R = R_mat, r = 0, B = 999, seed = 12341)
+  fit_hc(boot)
+
+  for iq in range(X.shape[1]):
+    boot_q = WildboottestHC(X = X, Y = Y, R = R_mat[iq], r = 0, B = 999, seed = 12341)
+    fit_hc(boot_q)
+
+    assert np.allclose(boot.t_boot[iq], boot_q.t_boot)
+    assert np.isclose(boot.pvalue[iq], boot_q.pvalue)
+
+
+def test_joint_hypotheses(data):
+
+  '''
+  a joint test of a single restriction is the squared t-test; joint
+  tests of several restrictions produce one Wald statistic and p-value
+  '''
+
+  X, Y, cluster, R = data
+
+  def run(R, r, joint, bootstrap_type, impose_null):
+    return fit_cl(WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, r = r, B = 999, seed = 12341, joint = joint), bootstrap_type = bootstrap_type, impose_null = impose_null)
+
+  for bootstrap_type in ['11', '13', '31', '33']:
+    for impose_null in [True, False]:
+
+      boot = run(R, 0.1, False, bootstrap_type, impose_null)
+      boot_joint = run(R[None, :], 0.1, True, bootstrap_type, impose_null)
+
+      assert np.allclose(boot.t_boot ** 2, boot_joint.t_boot)
+      assert np.isclose(boot.t_stat ** 2, boot_joint.t_stat)
+      assert np.isclose(boot.pvalue, boot_joint.pvalue)
+
+      boot_joint = run(np.eye(X.shape[1])[1:], 0, True, bootstrap_type, impose_null)
+
+      assert boot_joint.t_boot.shape == (999,)
+      assert np.all(boot_joint.t_boot >= 0)
+      assert 0 <= boot_joint.pvalue <= 1
+
+  boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = np.eye(X.shape[1])[1:], B = 99, seed = 12341, joint = True)
+  boot.get_scores(bootstrap_type = "11", impose_null = True)
+  boot.get_weights(weights_type = "rademacher")
+  boot.get_numer()
+
+  with pytest.raises(ValueError):
+    boot.get_denom(backend = "numba")
+
+
+def test_multiple_outcomes(data):
+
+  '''
+  testing several outcomes within one object (sharing the design and the
+  bootstrap weights) needs to reproduce separate runs per outcome
+  '''
+
+  X, Y, cluster, R = data
+  rs = np.random.RandomState(8765)
+  Y_mat = np.column_stack([Y, Y + 0.1 * X[:, 1], rs.normal(0, 1, len(Y))])
+  R_mat = np.array([[0, 1, 0], [0, 0, 1]])
+
+  for R_ in [R, R_mat]:
+    for bootstrap_type in ['11', '31', '13', '33']:
+      for impose_null in [True, False]:
+
+        boot = WildboottestCL(X = X, Y = Y_mat, cluster = cluster, R = R_, B = 999, seed = 12341)
+        fit_cl(boot, bootstrap_type = bootstrap_type, impose_null = impose_null)
+        boot.get_confint()
+
+        assert boot.t_boot.shape == (3,) + np.shape(R_)[:-1] + (999,)
+
+        for im in range(Y_mat.shape[1]):
+          boot_m = WildboottestCL(X = X, Y = Y_mat[:, im], cluster = cluster, R = R_, B = 999, seed = 12341)
+          fit_cl(boot_m, bootstrap_type = bootstrap_type, impose_null = impose_null)
+          boot_m.get_confint()
+
+          assert np.allclose(boot.t_boot[im], boot_m.t_boot)
+          assert np.allclose(boot.t_stat[im], boot_m.t_stat)
+          assert np.allclose(boot.pvalue[im], boot_m.pvalue)
+          assert np.allclose(boot.confint[im], boot_m.confint)
+          assert np.allclose(boot.vcov[im], boot_m.vcov)
+
+  with pytest.raises(ValueError):
+    WildboottestCL(X = X, Y = Y_mat, cluster = cluster, R = R_mat, B = 999, joint = True)
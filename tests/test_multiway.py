@@ -0,0 +1,209 @@
+import pytest
+import numpy as np
+
+from wildboottest.wildboottest import WildboottestCL
+from tests.helpers import fit_cl
+
+
+def test_multiway_clustering(data):
+
+  '''
+  the multiway wild cluster bootstrap matches a brute-force bootstrap, which
+  re-estimates the model and its two-way clustered variance (Cameron,
+  Gelbach & Miller, 2011) for each draw
+  '''
+
+  X, Y, cluster, R = data
+  rs = np.random.RandomState(9123)
+  N, k = X.shape
+  tXXinv = np.linalg.inv(X.T @ X)
+  beta_hat = tXXinv @ X.T @ Y
+
+  def crv(u, clusters):
+    # two-way clustered variance of R @ beta, with a small sample correction per term
+    meat = np.zeros((k, k))
+    for sign, c in [(1, clusters[:, 0]), (1, clusters[:, 1]), (-1, clusters[:, 0] * 100 + clusters[:, 1])]:
+      ids = np.unique(c)
+      scores = np.array([X[c == g].T @ u[c == g] for g in ids])
+      meat += sign * (N - 1) / (N - k) * len(ids) / (len(ids) - 1) * scores.T @ scores
+    return R @ tXXinv @ meat @ tXXinv @ R
+
+  # crossed clusters, bootstrapped by the dimension with the most clusters,
+  # and sparsely crossed clusters, bootstrapped by the other dimension
+  configs = [
+    (np.column_stack([cluster, rs.choice(8, N)]), None),
+    (np.column_stack([cluster, cluster % 8 * 2 + rs.choice(2, N)]), 1)
+  ]
+
+  kinds = []
+  for clusters, boot_dim in configs:
+    for impose_null in [True, False]:
+
+      bootcluster = None if boot_dim is None else clusters[:, boot_dim]
+      boot = WildboottestCL(X = X, Y = Y, cluster = clusters, bootcluster = bootcluster, R = R, B = 99, seed = 12341)
+      fit_cl(boot, impose_null = impose_null)
+
+      assert boot.G == [len(np.unique(clusters[:, 0])), len(np.unique(clusters[:, 1]))]
+      assert np.array_equal(boot.bootclustid, np.unique(clusters[:, 0 if boot_dim is None else boot_dim]))
+      assert np.isclose(boot.t_stat, R @ beta_hat / np.sqrt(crv(Y - X @ beta_hat, clusters)))
+
+      if impose_null:
+        beta = beta_hat - tXXinv @ R * (R @ beta_hat) / (R @ tXXinv @ R)
+      else:
+        beta = beta_hat
+      u = Y - X @ beta
+      v = boot.v[np.searchsorted(boot.bootclustid, clusters[:, 0 if boot_dim is None else boot_dim])]
+
+      t_boot = np.zeros(99)
+      for b in range(99):
+        Y_b = X @ beta + u * v[:, b]
+        beta_b = tXXinv @ X.T @ Y_b
+        t_boot[b] = R @ (beta_b - beta) / np.sqrt(crv(Y_b - X @ beta_b, clusters))
+
+      assert np.allclose(boot.t_boot, t_boot)
+      kinds += [kind for kind, _, _ in boot._multiway_forms]
+
+      # the same bootstrap from small blocks of lazily generated weights
+      boots = []
+      for _ in range(2):
+        boot_lazy = WildboottestCL(X = X, Y = Y, cluster = clusters, bootcluster = bootcluster, R = R, B = 99, seed = 12341)
+        boot_lazy.get_scores(bootstrap_type = "11", impose_null = impose_null)
+        boot_lazy.get_weights(weights_type = "rademacher", lazy = True)
+        boots.append(boot_lazy)
+      boots[0].get_pvalue_online(sample_size = 99)
+      boots[1].get_numer()
+      boots[1].get_denom(max_memory = 2**12)
+      boots[1].get_tboot()
+      assert np.allclose(boots[0].t_boot_sample, boots[1].t_boot)
+
+  # all ways of evaluating the bootstrap variances are covered
+  assert set(kinds) == {"nested", "dense", "fine"}
+
+  with pytest.raises(ValueError):
+    WildboottestCL(X = X, Y = Y, cluster = clusters, R = R, B = 99).get_scores(bootstrap_type = "31", impose_null = True)
+
+
+def test_multiway_not_positive():
+
+  '''
+  with few crossed clusters, the multiway variance need not be positive: the
+  negative eigenvalues of the vcov are set to zero, and bootstrap draws with
+  a negative variance are left out of the p-value and counted apart
+  '''
+
+  rs = np.random.RandomState(1)
+  N = 60
+  X = np.column_stack([np.ones(N), rs.normal(size = N), rs.normal(size = N)])
+  Y = rs.normal(size = N)
+  clusters = np.column_stack([rs.choice(4, N), rs.choice(4, N)])
+  R = np.array([0, 1, 0])
+
+  boot = WildboottestCL(X = X, Y = Y, cluster = clusters, R = R, B = 999, seed = 12341)
+  boot.get_scores(bootstrap_type = "11", impose_null = True)
+  boot.get_weights(weights_type = "rademacher")
+  boot.get_numer()
+  with pytest.warns(UserWarning, match = "bootstrap variances"):
+    boot.get_denom()
+  boot.get_tboot()
+  with pytest.warns(UserWarning, match = "not positive semi-definite"):
+    boot.get_vcov()
+  boot.get_tstat()
+  boot.get_pvalue()
+
+  eigval = np.linalg.eigvalsh(boot.vcov)
+  assert np.min(eigval) > -1e-12 * np.max(eigval)
+  assert np.isfinite(boot.t_stat)
+
+  valid = ~np.isnan(boot.t_boot)
+  assert 0 < boot.pvalue_counts.n_nan[0] == np.sum(~valid)
+  assert np.isclose(boot.pvalue, np.mean(np.abs(boot.t_stat) < np.abs(boot.t_boot[valid])))
+
+  # the same counts from blocks of draws
+  boot_online = WildboottestCL(X = X, Y = Y, cluster = clusters, R = R, B = 999, seed = 12341)
+  boot_online.get_scores(bootstrap_type = "11", impose_null = True)
+  boot_online.get_weights(weights_type = "rademacher")
+  with pytest.warns(UserWarning):
+    boot_online.get_pvalue_online(max_memory = 2**10)
+  assert np.array_equal(boot_online.pvalue_counts.n_nan, boot.pvalue_counts.n_nan)
+  assert np.isclose(boot_online.pvalue, boot.pvalue)
+
+
+def test_subcluster_bootstrap(data):
+
+  '''
+  the subcluster bootstrap, with weights drawn for the bootclusters and
+  variances clustered by the clusters, matches a brute-force bootstrap
+  '''
+
+  X, Y, cluster, R = data
+  rs = np.random.RandomState(7612)
+  N, k = X.shape
+  tXXinv = np.linalg.inv(X.T @ X)
+  beta_hat = tXXinv @ X.T @ Y
+  # a handful of clusters
+  cluster = cluster % 4
+
+  def crv(u):
+    ids = np.unique(cluster)
+    scores = np.array([X[cluster == g].T @ u[cluster == g] for g in ids])
+    ssc = (N - 1) / (N - k) * len(ids) / (len(ids) - 1)
+    return ssc * R @ tXXinv @ scores.T @ scores @ tXXinv @ R
+
+  # subclusters nested within the clusters, and bootclusters that cross them
+  for bootcluster in [cluster * 10 + rs.choice(10, N), rs.choice(30, N)]:
+    for impose_null in [True, False]:
+
+      boot = WildboottestCL(X = X, Y = Y, cluster = cluster, bootcluster = bootcluster, R = R, B = 99, seed = 12341)
+      fit_cl(boot, impose_null = impose_null)
+
+      assert boot.subcluster and boot.G == 4
+      assert boot.v.shape == (len(np.unique(bootcluster)), 99)
+      assert np.isclose(boot.t_stat, R @ beta_hat / np.sqrt(crv(Y - X @ beta_hat)))
+
+      if impose_null:
+        beta = beta_hat - tXXinv @ R * (R @ beta_hat) / (R @ tXXinv @ R)
+      else:
+        beta = beta_hat
+      u = Y - X @ beta
+      v = boot.v[np.searchsorted(boot.bootclustid, bootcluster)]
+
+      t_boot = np.zeros(99)
+      for b in range(99):
+        Y_b = X @ beta + u * v[:, b]
+        beta_b = tXXinv @ X.T @ Y_b
+        t_boot[b] = R @ (beta_b - beta) / np.sqrt(crv(Y_b - X @ beta_b))
+
+      assert np.allclose(boot.t_boot, t_boot)
+
+  with pytest.raises(ValueError):
+    WildboottestCL(X = X, Y = Y, cluster = cluster, bootcluster = rs.choice(30, N), R = R, B = 99).get_scores(bootstrap_type = "13", impose_null = True)
+
+
+def test_bootcluster_equal_to_cluster(data):
+
+  '''
+  a bootcluster that partitions the rows as the cluster does, e.g. the
+  cluster itself or a relabelling of it, is the ordinary wild cluster
+  bootstrap, for all bootstrap types, confidence intervals and joint tests
+  '''
+
+  X, Y, cluster, R = data
+  R_mat = np.eye(X.shape[1])[1:]
+
+  for bootstrap_type in ['11', '13', '31', '33']:
+    for R_, joint in [(R, False), (R_mat, True)]:
+
+      boots = []
+      for bootcluster in [None, cluster, 100 - cluster]:
+        boot = WildboottestCL(X = X, Y = Y, cluster = cluster, bootcluster = bootcluster, R = R_, B = 999, seed = 12341, joint = joint)
+        fit_cl(boot, bootstrap_type = bootstrap_type)
+        if not joint:
+          boot.confint = boot.get_confint()
+        boots.append(boot)
+
+      for boot in boots[1:]:
+        assert not boot.subcluster
+        assert np.array_equal(boot.t_boot, boots[0].t_boot)
+        assert np.array_equal(boot.pvalue, boots[0].pvalue)
+        if not joint:
+          assert np.array_equal(boot.confint, boots[0].confint)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from wildboottest.wildboottest import WildboottestHC, WildboottestCL
+from tests.helpers import fit_cl
+
+
+def test_profile(data, caplog):
+
+  '''
+  with profiling enabled, each stage is recorded once, with the shapes of
+  the arrays it set, passed to a callback and logged. results do not change
+  '''
+
+  X, Y, cluster, R = data
+  stages = ["__init__", "get_scores", "get_weights", "get_numer", "get_denom", "get_tboot", "get_vcov", "get_tstat", "get_pvalue"]
+
+  boots, records = [], []
+  for profile in [False, records.append]:
+    with caplog.at_level("DEBUG", logger = "wildboottest.wildboottest"):
+      boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341, profile = profile)
+      fit_cl(boot)
+    boots.append(boot)
+
+  assert np.allclose(boots[0].t_boot, boots[1].t_boot)
+  assert boots[0].get_profile().empty
+
+  profile = boots[1].get_profile()
+  assert list(profile["stage"]) == stages
+  assert records == boots[1].profile_records
+  assert all(profile["time"] > 0)
+  assert profile.set_index("stage").loc["get_weights", "shapes"]["v"] == (20, 999)
+  assert profile.set_index("stage").loc["get_numer", "shapes"]["_numer"] == (1, 999)
+  assert profile.set_index("stage").loc["get_denom", "peak_bytes"] >= boots[1]._denom.nbytes
+  assert len([r for r in caplog.records if r.name == "wildboottest.wildboottest"]) == len(stages)
+
+  # stages within a stage are part of it
+  boot = WildboottestHC(X = X, Y = Y, R = R, r = 0, B = 999, seed = 12341, profile = True)
+  boot.get_adjustments(bootstrap_type = "11")
+  boot.get_uhat(impose_null = True)
+  boot.get_pvalue_online(weights_type = "rademacher")
+  assert list(boot.get_profile()["stage"]) == ["__init__", "get_adjustments", "get_uhat", "get_pvalue_online"]
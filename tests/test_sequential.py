@@ -0,0 +1,145 @@
+import numpy as np
+
+from wildboottest.wildboottest import WildboottestHC, WildboottestCL
+
+
+def test_pvalue_online(data):
+
+  '''
+  online p-values, accumulated block by block, are identical to those
+  computed from the full vector of bootstrap t-statistics
+  '''
+
+  X, Y, cluster, R = data
+  R_mat = np.eye(X.shape[1])[1:]
+
+  for R_ in [R, R_mat]:
+    for joint in ([False, True] if R_.ndim == 2 else [False]):
+      for pval_type in ["two-tailed", "equal-tailed", ">", "<"]:
+
+        boots = []
+        for online in [False, True]:
+          boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R_, B = 999, seed = 12341, joint = joint)
+          boot.get_scores(bootstrap_type = "31", impose_null = True)
+          boot.get_weights(weights_type = "rademacher", lazy = True)
+          if online:
+            boot.get_pvalue_online(pval_type = pval_type, max_memory = 2**12, sample_size = 50)
+          else:
+            boot.get_numer()
+            boot.get_denom()
+            boot.get_tboot()
+            boot.get_vcov()
+            boot.get_tstat()
+            boot.get_pvalue(pval_type = pval_type)
+          boots.append(boot)
+
+        assert np.allclose(boots[0].pvalue, boots[1].pvalue)
+        assert np.allclose(boots[1].t_boot_sample, boots[0].t_boot[..., :50])
+        assert not hasattr(boots[1], "t_boot")
+
+  for pval_type in ["two-tailed", "equal-tailed", ">", "<"]:
+
+    boots = []
+    for online in [False, True]:
+      boot = WildboottestHC(X = X, Y = Y, R = R_mat, r = 0, B = 999, seed = 12341)
+      boot.get_adjustments(bootstrap_type = "11")
+      boot.get_uhat(impose_null = True)
+      if online:
+        boot.get_pvalue_online(weights_type = "rademacher", pval_type = pval_type, max_memory = 2**16)
+      else:
+        boot.get_tboot(weights_type = "rademacher")
+        boot.get_tstat()
+        boot.get_pvalue(pval_type = pval_type)
+      boots.append(boot)
+
+    assert np.allclose(boots[0].pvalue, boots[1].pvalue)
+    assert np.allclose(boots[0].t_stat, boots[1].t_stat)
+
+
+def test_pvalue_sequential(data):
+
+  '''
+  the sequential bootstrap stops early for clear-cut decisions, and else
+  runs all draws and reproduces the p-value of the full bootstrap
+  '''
+
+  X, Y, cluster, R = data
+  # a clearly significant and an insignificant coefficient
+  Y = Y + 0.5 * X[:, 2]
+  R_mat = np.array([[0, 0, 1], [0, 1, 0]])
+
+  for R_, clear_cut in [(R_mat[0], True), (R_mat, False)]:
+
+    boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R_, B = 9999, seed = 12341)
+    boot.get_scores(bootstrap_type = "11", impose_null = True)
+    boot.get_weights(weights_type = "rademacher", lazy = True)
+    B_used = boot.get_pvalue_sequential(levels = 0.05)
+    assert B_used == boot.B_used == boot.pvalue_counts.n
+
+    # the decision at the 5% level is the one of the full bootstrap
+    boot_full = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R_, B = 9999, seed = 12341)
+    boot_full.get_scores(bootstrap_type = "11", impose_null = True)
+    boot_full.get_weights(weights_type = "rademacher", lazy = True)
+    boot_full.get_pvalue_online()
+    assert np.all((boot.pvalue < 0.05) == (boot_full.pvalue < 0.05))
+
+    boot_hc = WildboottestHC(X = X, Y = Y, R = R_, r = 0, B = 9999, seed = 12341)
+    boot_hc.get_adjustments(bootstrap_type = "11")
+    boot_hc.get_uhat(impose_null = True)
+    B_used_hc = boot_hc.get_pvalue_sequential(weights_type = "rademacher", levels = 0.05)
+
+    if clear_cut:
+      assert B_used < 1000 and B_used_hc < 1000
+      assert boot.pvalue < 0.05 and boot_hc.pvalue < 0.05
+
+  # no early stopping with levels that cannot be settled: all draws are used,
+  # with the same p-value as the non-sequential bootstrap
+  boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341)
+  boot.get_scores(bootstrap_type = "11", impose_null = True)
+  boot.get_weights(weights_type = "rademacher", lazy = True)
+  assert boot.get_pvalue_sequential(levels = (), block_size = 100) == 999
+
+  boot_full = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 999, seed = 12341)
+  boot_full.get_scores(bootstrap_type = "11", impose_null = True)
+  boot_full.get_weights(weights_type = "rademacher", lazy = True)
+  boot_full.get_pvalue_online()
+  assert np.isclose(boot.pvalue, boot_full.pvalue)
+
+
+def test_pvalue_sequential_error(data):
+
+  '''
+  across many runs, the decision of the sequential bootstrap rarely differs
+  from the one of the full bootstrap, even for a p-value close to the level:
+  checks after every block are corrected for their number
+  '''
+
+  X, Y, cluster, R = data
+  error = 0.2
+
+  def pvalue(seed, sequential, pval_type):
+    # r close to the lower bound of the 95% confidence interval
+    boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, r = 0.004, B = 1999, seed = seed)
+    boot.get_scores(bootstrap_type = "11", impose_null = True)
+    boot.get_weights(weights_type = "rademacher", lazy = True)
+    if sequential:
+      boot.get_pvalue_sequential(pval_type = pval_type, levels = 0.05, error = error, block_size = 50)
+    else:
+      boot.get_pvalue_online(pval_type = pval_type)
+    return boot.pvalue, boot
+
+  # the equal-tailed p-value is twice a one-sided share, with twice its noise
+  for pval_type in ["two-tailed", "equal-tailed"]:
+
+    differs, B_used, pvalues = [], [], []
+    for seed in range(200):
+      pvalue_seq, boot = pvalue(seed, True, pval_type)
+      pvalue_full, _ = pvalue(seed, False, pval_type)
+      differs.append((pvalue_seq < 0.05) != (pvalue_full < 0.05))
+      B_used.append(boot.B_used)
+      pvalues.append(pvalue_full)
+
+    assert 0.045 < np.mean(pvalues) < 0.065
+    assert np.min(B_used) < 1999
+    # without the correction, about error of the decisions differ
+    assert np.mean(differs) < error / 4
@@ -1,5 +1,6 @@
 import pytest
-from wildboottest.weights import WildDrawFunctionException, draw_weights, wild_draw_fun_dict
+from wildboottest.weights import WildDrawFunctionException, draw_weights, wild_draw_fun_dict, enumerate_rademacher, fill_weights, rademacher_table
+from itertools import product
 from wildboottest.wildboottest import WildboottestCL
 import numpy as np
 import pandas as pd
@@ -63,4 +64,94 @@ def test_different_weights(data):
 
     mapd = (results_series - results_series.mean()).abs().mean()  / results_series.mean()    
         
-    assert  mapd <= .1# make sure mean absolute percentage deviation is less than 10% (ad hoc)
\ No newline at end of file
+    assert  mapd <= .1# make sure mean absolute percentage deviation is less than 10% (ad hoc)
+
+def test_rademacher_enumeration():
+
+    # full enumeration from bit patterns, as int8 signs, in the order of itertools.product
+    for G in [4, 5, 12]:
+        v, B = draw_weights('rademacher', True, G, 99, np.random.default_rng(1))
+        expected = np.transpose(np.array(list(product([-1,1], repeat=G))))
+        assert v.dtype == np.int8
+        assert B == 2**G
+        assert np.array_equal(v, expected)
+        assert np.array_equal(enumerate_rademacher(G, 7, 13), expected[:, 7:13])
+
+    # the cached table is shared by all calls, and cannot be modified
+    v, _ = draw_weights('rademacher', True, 12, 99, np.random.default_rng(1))
+    assert v is rademacher_table(12)
+    assert not v.flags.writeable
+    assert np.array_equal(v[:, ::-1], -v)
+
+def test_rademacher_int8():
+
+    # compact rademacher draws keep the random stream of rng.choice([-1,1])
+    v, B = draw_weights('rademacher', False, 20, 999, np.random.default_rng(123))
+    expected = np.random.default_rng(123).choice([-1,1], size=20 * 999).reshape((20, 999))
+    assert v.dtype == np.int8
+    assert np.array_equal(v, expected)
+
+def test_weights_distribution():
+
+    # support, point probabilities and moments of the weight distributions
+    n = 10**6
+    rng = np.random.default_rng(2)
+    tol = 5 / np.sqrt(n)
+
+    mammen_values = np.array([-(np.sqrt(5) - 1) / 2, (np.sqrt(5) + 1) / 2])
+    mammen_p = (np.sqrt(5) + np.array([1, -1])) / (2 * np.sqrt(5))
+    webb_values = np.array([-np.sqrt(1.5), -1, -np.sqrt(0.5), np.sqrt(0.5), 1, np.sqrt(1.5)])
+
+    for t, values, p in [
+        ('rademacher', np.array([-1, 1]), np.array([0.5, 0.5])),
+        ('mammen', mammen_values, mammen_p),
+        ('webb', webb_values, np.repeat(1 / 6, 6))
+    ]:
+        v, _ = draw_weights(t, False, 1, n, rng)
+        v = v.ravel().astype(float)
+        assert np.all(np.isin(v, values))
+        assert np.allclose([np.mean(v == x) for x in values], p, atol=tol)
+        assert np.isclose(np.mean(v), 0, atol=5 * tol)
+        assert np.isclose(np.mean(v**2), 1, atol=5 * tol)
+
+    # mammen weights match the third moment
+    v, _ = draw_weights('mammen', False, 1, n, rng)
+    assert np.isclose(np.mean(v**3), 1, atol=20 * tol)
+
+    v, _ = draw_weights('norm', False, 1, n, rng)
+    assert np.isclose(np.mean(v), 0, atol=5 * tol)
+    assert np.isclose(np.var(v), 1, atol=5 * tol)
+
+def test_fill_weights():
+
+    # filling a preallocated array in place gives the same weights as
+    # draw_weights, independently of the dtype and of the block size
+    for t in ts:
+        v, _ = draw_weights(t, False, 20, 999, np.random.default_rng(7))
+        for dtype in [np.float32, np.float64]:
+            out = np.empty((20, 999), dtype=dtype)
+            res = fill_weights(t, out, np.random.default_rng(7), block_size=1000)
+            assert res is out
+            assert np.allclose(out, v, rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        fill_weights('webb', np.empty((20, 999))[:, ::2], np.random.default_rng(7))
+
+def test_weight_blocks():
+
+    # lazily generated weights do not depend on the block size
+    from wildboottest.weights import weight_blocks, WEIGHTS_CHUNK_SIZE
+    B = 2 * WEIGHTS_CHUNK_SIZE + 17
+    for t in ts:
+        seed_seq = np.random.SeedSequence(42)
+        blocks = [
+            np.concatenate([v for _, v in weight_blocks(t, False, 7, B, block_size, seed_seq)], axis=1)
+            for block_size in [1, 100, WEIGHTS_CHUNK_SIZE, B]
+        ]
+        assert blocks[0].shape == (7, B)
+        for v in blocks[1:]:
+            assert np.array_equal(blocks[0], v)
+
+    v, _ = draw_weights('rademacher', True, 6, 99, np.random.default_rng(1))
+    v_lazy = np.concatenate([v for _, v in weight_blocks('rademacher', True, 6, 64, 10, seed_seq)], axis=1)
+    assert np.array_equal(v, v_lazy)
@@ -0,0 +1,214 @@
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context, shared_memory
+from typing import Union, List, Dict, Any
+from wildboottest.wildboottest import _wildboottest
+
+# environment variables that cap the threads of BLAS backends in worker processes
+_THREAD_ENV_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_FRAMEWORK_THREADS"]
+
+# keyword arguments of `wildboottest()` that can be set for all or for single specifications
+_KWARGS = ["param", "weights_type", "impose_null", "bootstrap_type", "seed", "adj", "cluster_adj", "parallel", "cache"]
+
+# the data shared with a worker process, set by `_init_worker`
+_shared = {}
+
+def wildboottest_batch(data: pd.DataFrame,
+                       specs: List[Dict[str, Any]],
+                       B: int,
+                       max_workers: Union[int, None] = None,
+                       threads_per_worker: int = 1,
+                       **kwargs) -> pd.DataFrame:
+    """Run `wildboottest()` for many model specifications over a pool of worker processes.
+
+    All columns used by any specification are copied once into a block of shared memory, from which
+    the workers read their design matrices, instead of pickling the data for every specification.
+    Cluster columns may be of any type; they are factorized before they are shared. To avoid
+    oversubscription, each worker runs numba kernels and BLAS routines on `threads_per_worker` threads.
+
+    Args:
+        data (pd.DataFrame): A data frame that contains all variables of all specifications. Rows with missing
+            values in any of the variables of a specification are dropped for that specification.
+        specs (List[Dict[str, Any]]): The model specifications. Each one is a dict with keys
+            'y' (str, the outcome), 'x' (List[str], the covariates), and optionally 'intercept' (bool, add a
+            column of ones named 'Intercept', default True), 'cluster' (str or None, default None for the
+            heteroskedastic wild bootstrap), 'fe' (str, a list of str or None, the fixed-effect factors to partial out,
+            see `wildboottest()`; default None) and 'param' (str or None, default None for all parameters). Any other key
+            overrides the keyword arguments of `wildboottest()` (e.g. 'bootstrap_type') for this specification.
+            The `profile` argument of `wildboottest()` is not supported, as specifications run in other processes.
+        B (int): The number of bootstrap iterations to run
+        max_workers (Union[int, None], optional): The number of worker processes. Defaults to None, the number of CPUs.
+        threads_per_worker (int, optional): The number of numba and BLAS threads per worker process. Defaults to 1.
+        **kwargs: Keyword arguments of `wildboottest()`, e.g. `weights_type`, `bootstrap_type` or `seed`,
+            shared by all specifications. With a shared `cache`, specifications with the same covariates and
+            cluster variable reuse each other's design-level precomputations.
+
+    Raises:
+        ValueError: Raise if a specification has no 'y' or 'x' key, uses a column that is not in `data`,
+            or if it or `kwargs` contain unknown keys
+
+    Returns:
+        pd.DataFrame: The statistics and p-values of all specifications, indexed by the position of the
+            specification in `specs` and the parameter, and the time (in seconds) each specification took in its worker.
+
+    Example:
+
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> from wildboottest.batch import wildboottest_batch
+
+        >>> np.random.seed(12312312)
+        >>> N = 1000
+        >>> df = pd.DataFrame(np.random.normal(0, 1, (N, 4)), columns = ["y1", "y2", "X1", "X2"])
+        >>> df["cluster"] = np.random.choice(list(range(10)), N)
+        >>> specs = [
+        ...     {"y": y, "x": ["X1", "X2"], "param": "X1", "cluster": "cluster", "bootstrap_type": bootstrap_type}
+        ...     for y in ["y1", "y2"] for bootstrap_type in ["11", "31"]
+        ... ]
+        >>> wildboottest_batch(df, specs, B = 9999, max_workers = 4)
+    """
+
+    specs = [dict(spec) for spec in specs]
+    unknown = set(kwargs) - set(_KWARGS)
+    if unknown:
+        raise ValueError(f"Unknown keyword arguments {sorted(unknown)}.")
+
+    columns = []
+    for spec in specs:
+        if "y" not in spec or "x" not in spec:
+            raise ValueError("Each specification requires the keys 'y' and 'x'.")
+        unknown = set(spec) - set(_KWARGS + ["y", "x", "intercept", "cluster", "fe"])
+        if unknown:
+            raise ValueError(f"Unknown keys {sorted(unknown)} in a specification.")
+        for col in [spec["y"], *spec["x"], spec.get("cluster"), *_fe_columns(spec)]:
+            if col is None:
+                continue
+            if col not in data.columns:
+                raise ValueError(f"Column '{col}' of a specification is not in `data`.")
+            if col not in columns:
+                columns.append(col)
+
+    # one column per row, so that each variable is contiguous in shared memory.
+    # missing values of cluster and fixed-effect columns are kept as nan
+    shared_data = np.empty((len(columns), data.shape[0]))
+    for i, col in enumerate(columns):
+        if pd.api.types.is_numeric_dtype(data[col]):
+            shared_data[i] = data[col].to_numpy(dtype = float, na_value = np.nan)
+        else:
+            # sorted codes, so that clusters are ordered as their original ids
+            codes, _ = pd.factorize(data[col], sort = True)
+            shared_data[i] = np.where(codes < 0, np.nan, codes)
+
+    shm = shared_memory.SharedMemory(create = True, size = max(shared_data.nbytes, 1))
+    results = []
+
+    try:
+        np.ndarray(shared_data.shape, dtype = shared_data.dtype, buffer = shm.buf)[:] = shared_data
+        del shared_data
+
+        with _thread_limits(threads_per_worker):
+            with ProcessPoolExecutor(
+                max_workers = max_workers,
+                mp_context = get_context("spawn"),
+                initializer = _init_worker,
+                initargs = (shm.name, (len(columns), data.shape[0]), columns, threads_per_worker)
+            ) as pool:
+                futures = [pool.submit(_run_spec, spec, B, kwargs) for spec in specs]
+                results = [future.result() for future in futures]
+
+    finally:
+        shm.close()
+        shm.unlink()
+
+    full_enumeration_specs = [i for i, (_, warn, _) in enumerate(results) if warn]
+    if full_enumeration_specs:
+        warnings.warn(f"2^G < the number of boot iterations, setting full_enumeration to True for specifications {full_enumeration_specs}.")
+
+    res_df = []
+    for i, (res, _, seconds) in enumerate(results):
+        res = res.reset_index()
+        res.insert(0, "spec", i)
+        res["time"] = seconds
+        res_df.append(res)
+
+    return pd.concat(res_df).set_index(["spec", "param"])
+
+def _fe_columns(spec):
+
+    # the fixed-effect columns of a specification, as a list
+    fe = spec.get("fe")
+    if fe is None:
+        return []
+    return [fe] if isinstance(fe, str) else list(fe)
+
+@contextmanager
+def _thread_limits(n_threads):
+
+    # worker processes are spawned, and read the environment at start-up
+    previous = {var: os.environ.get(var) for var in _THREAD_ENV_VARS}
+    os.environ.update({var: str(n_threads) for var in _THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for var, value in previous.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+def _init_worker(shm_name, shape, columns, threads_per_worker):
+
+    import numba
+    numba.set_num_threads(min(threads_per_worker, numba.config.NUMBA_NUM_THREADS))
+
+    shm = shared_memory.SharedMemory(name = shm_name)
+    _shared["shm"] = shm
+    _shared["data"] = np.ndarray(shape, dtype = np.float64, buffer = shm.buf)
+    _shared["columns"] = {col: i for i, col in enumerate(columns)}
+
+def _run_spec(spec, B, kwargs):
+
+    start = time.perf_counter()
+
+    data, columns = _shared["data"], _shared["columns"]
+    spec = dict(spec)
+    fe = _fe_columns(spec)
+    y, x = spec.pop("y"), list(spec.pop("x"))
+    cluster = spec.pop("cluster", None)
+    spec.pop("fe", None)
+    intercept = spec.pop("intercept", True)
+    kwargs = {**kwargs, **spec}
+
+    # complete cases of the variables of this specification
+    rows = np.all(~np.isnan(data[[columns[col] for col in [y, *x] + ([cluster] if cluster is not None else []) + fe]]), axis = 0)
+
+    X = np.transpose(data[[columns[col] for col in x]][:, rows])
+    xnames = x
+    if intercept:
+        X = np.column_stack([np.ones(X.shape[0]), X])
+        xnames = ["Intercept"] + x
+
+    res, full_enumeration_warn = _wildboottest(
+        X = X,
+        Y = data[columns[y]][rows],
+        xnames = xnames,
+        B = B,
+        cluster = data[columns[cluster]][rows] if cluster is not None else None,
+        param = kwargs.get("param"),
+        weights_type = kwargs.get("weights_type", "rademacher"),
+        impose_null = kwargs.get("impose_null", True),
+        bootstrap_type = kwargs.get("bootstrap_type", "11"),
+        seed = kwargs.get("seed"),
+        adj = kwargs.get("adj", True),
+        cluster_adj = kwargs.get("cluster_adj", True),
+        parallel = kwargs.get("parallel", True),
+        cache = kwargs.get("cache"),
+        fe = np.transpose(data[[columns[col] for col in fe]][:, rows]) if fe else None
+    )
+
+    return res, full_enumeration_warn, time.perf_counter() - start
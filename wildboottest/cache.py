@@ -0,0 +1,147 @@
+import os
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Union, Dict
+
+# default upper bound on the total size of a cache directory
+DEFAULT_CACHE_MAX_BYTES = 2**30
+
+class DesignCache:
+    """An on-disk cache of design-level precomputations of the wild cluster bootstrap.
+
+    Entries are stored as .npz files in a local directory, one file per key. Keys are
+    fingerprints of the data (see `fingerprint`). The total size of the directory is bounded
+    by `max_bytes`: once it is exceeded, the least recently used entries are evicted. Entries
+    are written atomically, so that several processes can share one cache directory.
+
+    Arrays of object dtype (e.g. cluster ids that are strings) cannot be stored without
+    pickling, and are never cached.
+
+    Example:
+
+        >>> from wildboottest.cache import DesignCache
+        >>> from wildboottest.wildboottest import WildboottestCL
+
+        >>> cache = DesignCache("~/.cache/wildboottest", max_bytes = 2**28)
+        >>> boot = WildboottestCL(X = X, Y = Y, cluster = cluster, R = R, B = 9999, cache = cache)
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        """Initializes the cache
+
+        Args:
+            path (Union[str, os.PathLike]): The cache directory. Created if it does not exist.
+            max_bytes (int, optional): Upper bound (in bytes) on the total size of all entries. Defaults to 1 GiB.
+        """
+
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok = True)
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.npz")
+
+    def load(self, key: str) -> Union[Dict[str, np.ndarray], None]:
+        """Load the arrays stored under a key, and mark the entry as recently used.
+
+        Args:
+            key (str): The key of the entry
+
+        Returns:
+            Union[Dict[str, np.ndarray], None]: The arrays of the entry, or None if there is no (readable) entry
+        """
+
+        file = self._file(key)
+        try:
+            with np.load(file, allow_pickle = False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            os.utime(file)
+        except (OSError, ValueError):
+            # a missing or corrupt entry (e.g. evicted by another process) is a miss
+            return None
+
+        return arrays
+
+    def save(self, key: str, arrays: Dict[str, np.ndarray]) -> bool:
+        """Store arrays under a key, and evict the least recently used entries beyond `max_bytes`.
+
+        Args:
+            key (str): The key of the entry
+            arrays (Dict[str, np.ndarray]): The arrays to store, by name
+
+        Returns:
+            bool: Whether the arrays were stored, i.e. none of them is of object dtype
+        """
+
+        if any(np.asarray(x).dtype == object for x in arrays.values()):
+            return False
+
+        # write to a temporary file first, so that readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir = self.path, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self._file(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        self._evict()
+
+        return True
+
+    def _evict(self):
+
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        # least recently used first
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+
+        for name in os.listdir(self.path):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.path, name))
+
+def fingerprint(*arrays: np.ndarray) -> str:
+    """Compute a hash of the shapes, dtypes and contents of arrays, for use as a cache key.
+
+    Arrays of object dtype (e.g. strings) are hashed element-wise via `pd.util.hash_array`.
+
+    Args:
+        *arrays (np.ndarray): The arrays to hash
+
+    Returns:
+        str: A hexadecimal digest
+    """
+
+    h = hashlib.blake2b(digest_size = 20)
+    for x in arrays:
+        x = np.asarray(x)
+        h.update(f"{x.shape}{x.dtype.str}".encode())
+        if x.dtype == object:
+            x = pd.util.hash_array(np.ravel(x))
+        h.update(np.ascontiguousarray(x).data)
+
+    return h.hexdigest()
@@ -0,0 +1,67 @@
+import numpy as np
+from numba import njit, prange
+from typing import Union
+
+def _compute_denom(Cg, H, v, ssc):
+
+    G, B = v.shape
+    denom = np.zeros(B)
+
+    for b in prange(B):
+        Zg = np.zeros(G)
+        for ixg in range(G):
+            vH = 0.0
+            for ixh in range(G):
+                vH += v[ixh,b] * H[ixg,ixh]
+            Zg[ixg] = Cg[ixg] * v[ixg,b] - vH
+
+        denom[b] = ssc * np.sum(np.power(Zg,2))
+
+    return denom
+
+# kernels are compiled once per process (and cached on disk across processes),
+# with separate serial and parallel builds
+compute_denom_serial = njit(cache = True)(_compute_denom)
+compute_denom_parallel = njit(parallel = True, cache = True)(_compute_denom)
+
+def compute_denom(Cg: np.ndarray, H: np.ndarray, v: np.ndarray, ssc: float, parallel: bool = True) -> np.ndarray:
+    """Compute the bootstrap denominator `ssc * sum((Cg[:,None] * v - H @ v)**2, axis = 0)`
+    by looping over bootstrap iterations and clusters.
+
+    Args:
+        Cg (np.ndarray): A vector of length G
+        H (np.ndarray): A G x G matrix
+        v (np.ndarray): A G x B matrix of bootstrap weights
+        ssc (float): The small sample correction
+        parallel (bool, optional): Whether to use the parallel build of the kernel. Defaults to True.
+
+    Returns:
+        np.ndarray: The bootstrap denominators, a vector of length B
+    """
+
+    if parallel:
+        return compute_denom_parallel(Cg, H, v, ssc)
+    else:
+        return compute_denom_serial(Cg, H, v, ssc)
+
+def warmup(parallel: Union[bool, None] = None) -> None:
+    """Compile the numba kernels for the float64 blocks of weights passed by `WildboottestCL.get_denom`.
+
+    Calling this once at startup moves the numba compilation cost out of the first
+    bootstrap call. Compiled kernels are cached on disk, so subsequent processes
+    load them instead of recompiling.
+
+    Args:
+        parallel (Union[bool, None], optional): If True (False), only compile the parallel
+            (serial) builds. If None (default), compile both.
+    """
+
+    builds = [True, False] if parallel is None else [parallel]
+
+    Cg = np.zeros(2)
+    H = np.zeros((2, 2))
+
+    for build in builds:
+        # weights are stored compactly (e.g. rademacher weights as int8 signs),
+        # but every block is expanded to float64 before it reaches the kernels
+        compute_denom(Cg, H, np.ones((2, 2)), 1.0, parallel = build)
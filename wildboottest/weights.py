@@ -1,31 +1,108 @@
-from typing import Callable, Union, Tuple
+from functools import lru_cache
+from typing import Callable, Union, Tuple, Iterator
 import numpy as np
-from itertools import product
+
+# number of bootstrap iterations (columns) drawn from one child seed sequence
+# by `weight_blocks`
+WEIGHTS_CHUNK_SIZE = 1024
+
+# largest number of bootstrap clusters for which the full enumeration of
+# rademacher weights is kept in memory by `rademacher_table` (G x 2^G bytes)
+ENUMERATION_TABLE_MAX_G = 20
 
 class WildDrawFunctionException(Exception):
     pass
 
-def rademacher(n: int, rng: np.random.Generator) -> np.ndarray:
-    return rng.choice([-1,1],size=n, replace=True)
+# lookup tables of the discrete weight distributions
+_MAMMEN_VALUES = np.array([-1, 1]) * (np.sqrt(5) + np.array([-1, 1])) / 2 #TODO: #10 Should this divide the whole expression by 2 or just the second part
+_MAMMEN_P = (np.sqrt(5) + np.array([1, -1])) / (2 * np.sqrt(5))
+_MAMMEN_THRESHOLD = np.cumsum(_MAMMEN_P)[0] / np.sum(_MAMMEN_P)
+_WEBB_VALUES = np.concatenate([-np.sqrt(np.array([3,2,1]) / 2), np.sqrt(np.array([1,2,3]) / 2)])
+
+# all samplers draw the same random stream as the corresponding `rng.choice` /
+# `rng.normal` calls, and optionally write into a preallocated array `out` of
+# length n (of any numeric dtype, e.g. float32)
 
-def mammen(n: int, rng: np.random.Generator) -> np.ndarray:
-    return rng.choice(
-        a= np.array([-1, 1]) * (np.sqrt(5) + np.array([-1, 1])) / 2, #TODO: #10 Should this divide the whole expression by 2 or just the second part
-        size=n,
-        replace=True,
-        p = (np.sqrt(5) + np.array([1, -1])) / (2 * np.sqrt(5))
-    )
+def rademacher(n: int, rng: np.random.Generator, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    # same random stream as rng.choice([-1,1]), but stored as int8 signs
+    if out is None:
+        out = np.empty(n, dtype=np.int8)
+    np.multiply(rng.integers(0, 2, size=n), 2, out=out, casting="unsafe")
+    out -= 1
+    return out
+
+def mammen(n: int, rng: np.random.Generator, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    # a uniform draw above the threshold P(v = v_0) selects the second value
+    if out is None:
+        out = np.empty(n)
+    np.take(_MAMMEN_VALUES.astype(out.dtype), rng.random(size=n) >= _MAMMEN_THRESHOLD, out=out)
+    return out
     
-def norm(n:int, rng: np.random.Generator):
-    return rng.normal(size=n)
-
-def webb(n: int, rng: np.random.Generator):
-    return rng.choice(
-        a = np.concatenate([-np.sqrt(np.array([3,2,1]) / 2), np.sqrt(np.array([1,2,3]) / 2)]),
-        replace=True,
-        size=n
-    )
+def norm(n:int, rng: np.random.Generator, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    if out is None:
+        out = np.empty(n)
+    out[...] = rng.standard_normal(size=n)
+    return out
+
+def webb(n: int, rng: np.random.Generator, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    # uniform integers index into the six point lookup table
+    if out is None:
+        out = np.empty(n)
+    np.take(_WEBB_VALUES.astype(out.dtype), rng.integers(0, 6, size=n), out=out)
+    return out
     
+def enumerate_rademacher(N_G_bootcluster: int, start: int = 0, stop: Union[int, None] = None) -> np.ndarray:
+    """Generate columns start, ..., stop - 1 of the full enumeration of rademacher weights
+    from the bit patterns of the column indices, with bit `N_G_bootcluster - 1 - g` of
+    index `b` giving the sign of cluster `g` in column `b`.
+
+    The columns are ordered as `itertools.product([-1,1], repeat=N_G_bootcluster)`.
+
+    Args:
+        N_G_bootcluster (int): the number of bootstrap clusters
+        start (int, optional): the first column. Defaults to 0.
+        stop (Union[int, None], optional): one past the last column. Defaults to None, i.e. 2**N_G_bootcluster.
+
+    Returns:
+        np.ndarray: an int8 matrix of dimension N_G_bootcluster x (stop - start)
+    """
+
+    if stop is None:
+        stop = 2**N_G_bootcluster
+
+    shifts = np.arange(N_G_bootcluster - 1, -1, -1, dtype=np.int64)
+    bits = (np.arange(start, stop, dtype=np.int64)[None, :] >> shifts[:, None]) & 1
+    v = bits.astype(np.int8)
+    v *= 2
+    v -= 1
+    return v
+
+@lru_cache(maxsize=4)
+def rademacher_table(N_G_bootcluster: int) -> np.ndarray:
+    """The full enumeration of rademacher weights, as generated by `enumerate_rademacher`,
+    computed once per number of bootstrap clusters and cached.
+
+    Columns `b` and `2**N_G_bootcluster - 1 - b` have complementary bit patterns, i.e.
+    opposite signs, so only the first half of the table is enumerated and the second
+    half is its negated mirror image.
+
+    Args:
+        N_G_bootcluster (int): the number of bootstrap clusters, at most `ENUMERATION_TABLE_MAX_G`
+
+    Returns:
+        np.ndarray: a read-only int8 matrix of dimension N_G_bootcluster x 2**N_G_bootcluster
+    """
+
+    if N_G_bootcluster > ENUMERATION_TABLE_MAX_G:
+        raise ValueError(f"The enumeration table is only kept for up to {ENUMERATION_TABLE_MAX_G} clusters, but got {N_G_bootcluster}.")
+
+    half = 2**N_G_bootcluster // 2
+    v = np.empty((N_G_bootcluster, 2**N_G_bootcluster), dtype=np.int8)
+    v[:, :half] = enumerate_rademacher(N_G_bootcluster, 0, half)
+    np.negative(v[:, half - 1::-1], out=v[:, half:])
+    v.flags.writeable = False
+    return v
+
 wild_draw_fun_dict = {
     'rademacher' : rademacher,
     'mammen' : mammen,
@@ -33,23 +110,9 @@ wild_draw_fun_dict = {
     'webb' : webb
 }
 
-  
-def draw_weights(t : Union[str, Callable], full_enumeration: bool, 
-                 N_G_bootcluster: int, boot_iter: int,
-                 rng: np.random.Generator) -> Tuple[np.ndarray, int]:
-    """draw bootstrap weights
-    Args:
-        t (str|callable): the type of the weights distribution. Either 'rademacher', 'mammen', 'norm' or 'webb'
-        If `t` is a callable, must be a function of one variable, `n`, and return a vector of size `n`
-        full_enumeration (bool): should deterministic full enumeration be employed
-        N_G_bootcluster (int): the number of bootstrap clusters
-        boot_iter (int): the number of bootstrap iterations
-    Returns:
-        Tuple[np.ndarray, int]: a matrix of dimension N_G_bootcluster x (boot_iter + 1) and the number of iterations
-    """    
-    
+def _get_wild_draw_fun(t):
+
     #TODO: we can use the `case` feature in python, but that's only available in 3.10+ will do a 3.7 version for now
-    # Will take out this and make separate functions for readability
     
     if isinstance(t, str):
         wild_draw_fun = wild_draw_fun_dict.get(t)
@@ -61,23 +124,146 @@ def draw_weights(t : Union[str, Callable], full_enumeration: bool,
         raise WildDrawFunctionException("`t` must be specified")
     else:
         raise ValueError(f"t can be string or callable, but got {type(t)}")
+
+    return wild_draw_fun
+
+def fill_weights(t: Union[str, Callable], out: np.ndarray, rng: np.random.Generator,
+                 block_size: int = 2**14) -> np.ndarray:
+    """fill a caller-provided array with bootstrap weights, in place
+    Args:
+        t (str|callable): the type of the weights distribution. Either 'rademacher', 'mammen', 'norm' or 'webb'
+        If `t` is a callable, must be a function of one variable, `n`, and return a vector of size `n`
+        out (np.ndarray): a C-contiguous array of any shape and numeric dtype (e.g. float32 or float64),
+        filled in row-major order
+        rng (np.random.Generator): the random number generator
+        block_size (int): the number of weights drawn at a time, which bounds temporary memory
+    Returns:
+        np.ndarray: `out`, filled with weights. For the same `rng` state, the weights are identical
+        to those of `draw_weights`
+    """
+
+    wild_draw_fun = _get_wild_draw_fun(t)
+    if not out.flags.c_contiguous:
+        raise ValueError("out must be a C-contiguous array.")
+
+    flat = out.reshape(-1)
+    builtin = wild_draw_fun in wild_draw_fun_dict.values()
+
+    for start in range(0, flat.shape[0], block_size):
+        stop = min(start + block_size, flat.shape[0])
+        if builtin:
+            wild_draw_fun(n=stop - start, rng=rng, out=flat[start:stop])
+        else:
+            flat[start:stop] = wild_draw_fun(n=stop - start, rng=rng)
+
+    return out
+
+def draw_weights(t : Union[str, Callable], full_enumeration: bool, 
+                 N_G_bootcluster: int, boot_iter: int,
+                 rng: np.random.Generator, dtype: Union[np.dtype, None] = None) -> Tuple[np.ndarray, int]:
+    """draw bootstrap weights
+    Args:
+        t (str|callable): the type of the weights distribution. Either 'rademacher', 'mammen', 'norm' or 'webb'
+        If `t` is a callable, must be a function of one variable, `n`, and return a vector of size `n`
+        full_enumeration (bool): should deterministic full enumeration be employed
+        N_G_bootcluster (int): the number of bootstrap clusters
+        boot_iter (int): the number of bootstrap iterations
+        dtype (np.dtype|None): if not None, random weights are written into a preallocated
+        array of this dtype, e.g. np.float32. Defaults to None, the dtype of the sampler
+    Returns:
+        Tuple[np.ndarray, int]: a matrix of dimension N_G_bootcluster x (boot_iter + 1) and the number of iterations.
+        Rademacher weights, including full enumeration, are returned as int8 signs. For full
+        enumeration with up to `ENUMERATION_TABLE_MAX_G` clusters, the matrix is the read-only `rademacher_table`
+    """    
+    
+    wild_draw_fun = _get_wild_draw_fun(t)
     # do full enumeration for rademacher weights if bootstrap iterations
     # B exceed number of possible permutations else random sampling
 
     # full_enumeration only for rademacher weights (set earlier)
     if full_enumeration: 
-        t = 0 # what is this needed for? 
         # with N_G_bootcluster draws, get all combinations of [-1,1] WITH 
-        # replacement, in matrix form
-        v0 = np.transpose(np.array(list(product([-1,1], repeat=N_G_bootcluster))))
+        # replacement, in matrix form. columns are generated in blocks from
+        # the bit patterns of their index, as int8 signs. for few clusters,
+        # the (read-only) table is shared by all calls
+        boot_iter = 2**N_G_bootcluster
+        if N_G_bootcluster <= ENUMERATION_TABLE_MAX_G:
+            v0 = rademacher_table(N_G_bootcluster)
+        else:
+            v0 = np.empty((N_G_bootcluster, boot_iter), dtype=np.int8)
+            block_size = max(1, 2**20 // max(N_G_bootcluster, 1))
+            for start in range(0, boot_iter, block_size):
+                stop = min(start + block_size, boot_iter)
+                v0[:, start:stop] = enumerate_rademacher(N_G_bootcluster, start, stop)
     else:
         # else: just draw with replacement - by chance, some permutations
         # might occur more than once
-        v0 = wild_draw_fun(n = N_G_bootcluster * boot_iter, rng=rng)
-        v0 = v0.reshape(N_G_bootcluster, boot_iter) # weights matrix
+        if dtype is None and wild_draw_fun is rademacher:
+            dtype = np.int8
+        elif dtype is None and wild_draw_fun in wild_draw_fun_dict.values():
+            dtype = np.float64
+
+        if dtype is None:
+            v0 = wild_draw_fun(n = N_G_bootcluster * boot_iter, rng=rng)
+            v0 = v0.reshape(N_G_bootcluster, boot_iter) # weights matrix
+        else:
+            # draw in cache-sized blocks into a preallocated weights matrix
+            v0 = fill_weights(wild_draw_fun, np.empty((N_G_bootcluster, boot_iter), dtype=dtype), rng=rng)
     
     # update boot_iter (B) - only relevant in enumeration case
     boot_iter = v0.shape[1] 
     #v = np.insert(v0, 0, 1,axis = 1)
 
-    return v0, boot_iter
\ No newline at end of file
+    return v0, boot_iter
+
+def weight_blocks(t : Union[str, Callable], full_enumeration: bool,
+                  N_G_bootcluster: int, boot_iter: int, block_size: int,
+                  seed_seq: np.random.SeedSequence,
+                  dtype: Union[np.dtype, None] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """lazily generate bootstrap weights in blocks of columns
+    Args:
+        t (str|callable): the type of the weights distribution. Either 'rademacher', 'mammen', 'norm' or 'webb'
+        If `t` is a callable, must be a function of one variable, `n`, and return a vector of size `n`
+        full_enumeration (bool): should deterministic full enumeration be employed
+        N_G_bootcluster (int): the number of bootstrap clusters
+        boot_iter (int): the number of bootstrap iterations. For full enumeration, 2**N_G_bootcluster
+        block_size (int): the number of columns per block
+        seed_seq (np.random.SeedSequence): the root seed sequence. Columns
+        `i * WEIGHTS_CHUNK_SIZE, ..., (i + 1) * WEIGHTS_CHUNK_SIZE - 1` are drawn from its i-th
+        child, `seed_seq.spawn(i + 1)[i]`, so that the weights are bit-identical for any
+        block size, and chunks can be drawn independently (e.g. by different workers)
+        dtype (np.dtype|None): the dtype of the weights, see `draw_weights`
+    Returns:
+        Iterator[Tuple[int, np.ndarray]]: the index of the first column and the
+        N_G_bootcluster x block_size matrix of weights of each block
+    """
+
+    wild_draw_fun = _get_wild_draw_fun(t)
+
+    def draw_chunk(i):
+        # the i-th child of seed_seq, without spawning all previous children
+        child = np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key + (i,), pool_size=seed_seq.pool_size)
+        n_cols = min(WEIGHTS_CHUNK_SIZE, boot_iter - i * WEIGHTS_CHUNK_SIZE)
+        return draw_weights(wild_draw_fun, False, N_G_bootcluster, n_cols, np.random.default_rng(child), dtype=dtype)[0]
+
+    cached = (None, None)
+
+    for start in range(0, boot_iter, block_size):
+        stop = min(start + block_size, boot_iter)
+
+        if full_enumeration:
+            if N_G_bootcluster <= ENUMERATION_TABLE_MAX_G:
+                yield start, rademacher_table(N_G_bootcluster)[:, start:stop]
+            else:
+                yield start, enumerate_rademacher(N_G_bootcluster, start, stop)
+            continue
+
+        parts = []
+        for i in range(start // WEIGHTS_CHUNK_SIZE, (stop - 1) // WEIGHTS_CHUNK_SIZE + 1):
+            # blocks are visited in order, so each chunk is drawn once
+            if cached[0] != i:
+                cached = (i, draw_chunk(i))
+            offset = i * WEIGHTS_CHUNK_SIZE
+            parts.append(cached[1][:, max(start, offset) - offset:min(stop, offset + WEIGHTS_CHUNK_SIZE) - offset])
+
+        yield start, parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
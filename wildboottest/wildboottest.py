@@ -1,10 +1,37 @@
 from __future__ import annotations # add so that we can use type annotations as strings to get rid of circular imports
+import os
+import time
+import inspect
+import logging
+import functools
+import itertools
+import tracemalloc
 import numpy as np
 import pandas as pd
-from numba import jit, njit, prange
-from wildboottest.weights import draw_weights
+from wildboottest.weights import draw_weights, weight_blocks, wild_draw_fun_dict
+from wildboottest.kernels import compute_denom
+from wildboottest.cache import DesignCache, fingerprint
 import warnings
-from typing import Union, Tuple, Callable
+from statistics import NormalDist
+from typing import Union, Tuple, Callable, Iterable
+
+# default upper bound (in bytes) on the memory held by one block of bootstrap draws
+DEFAULT_MAX_MEMORY = 2**30
+_HC_ARRAYS_PER_BLOCK = 4
+_CL_ARRAYS_PER_BLOCK = 3
+
+# relative lower bound on the squared pivots of Cholesky factors, below which
+# matrices are inverted via the pseudo-inverse instead
+_SPD_RCOND = 1e-12
+
+# per-cluster cross-products: clusters of up to this many rows are batched,
+# and each batch gathers at most this many bytes of rows
+_BATCH_MAX_ROWS = 2**8
+_BATCH_MAX_BYTES = 2**26
+
+# stage profiles (see the `profile` argument of the bootstrap classes) are
+# logged at the DEBUG level
+logger = logging.getLogger(__name__)
 
 class WildDrawFunctionException(Exception):
     pass
@@ -21,6 +48,71 @@ class TestHCImposeNullException(Exception):
 class TestHCWeightsException(Exception):
   pass
 
+def _init_profile(boot, profile):
+
+    boot._profile = profile
+    boot._profile_depth = 0
+    boot.profile_records = []
+
+def _profiled(method):
+
+    # record a stage of the bootstrap if profiling is enabled: its wall time,
+    # the bytes it allocated (net and at its peak, via tracemalloc) and the
+    # shapes of the array attributes it set. stages called within another
+    # stage, e.g. get_vcov() within get_pvalue_online(), are part of it
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+
+        if method.__name__ == "__init__":
+            profile = signature.bind(self, *args, **kwargs).arguments.get("profile", False)
+            _init_profile(self, profile)
+
+        if not self._profile or self._profile_depth > 0:
+            return method(self, *args, **kwargs)
+
+        arrays = {name: id(value) for name, value in vars(self).items() if isinstance(value, np.ndarray)}
+        # tracing may have been started by the caller, whose peak is then reset
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+
+        self._profile_depth += 1
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            self._profile_depth -= 1
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+
+        record = {
+            "stage": method.__name__,
+            "time": seconds,
+            "allocated_bytes": current_bytes - start_bytes,
+            "peak_bytes": peak_bytes - start_bytes if not tracing or hasattr(tracemalloc, "reset_peak") else None,
+            "shapes": {name: value.shape for name, value in vars(self).items() if isinstance(value, np.ndarray) and arrays.get(name) != id(value)},
+        }
+        self.profile_records.append(record)
+        logger.debug("%s.%s: %.6fs, %d bytes allocated, %s bytes at peak", type(self).__name__, record["stage"],
+                     record["time"], record["allocated_bytes"], record["peak_bytes"])
+        if callable(self._profile):
+            self._profile(record)
+
+        return result
+
+    return wrapper
+
+def _profile_frame(records):
+
+    return pd.DataFrame(records, columns = ["stage", "time", "allocated_bytes", "peak_bytes", "shapes"])
+
 class WildboottestHC:
 
     """Create an object of WildboottestHC and get p-value by successively applying
@@ -48,23 +140,31 @@ class WildboottestHC:
       >>> wb.get_tboot(weights_type = "rademacher")
       >>> wb.get_tstat()
       >>> wb.get_pvalue()
+      >>> wb.get_confint()
     """
 
+    @_profiled
     def __init__(self, X : Union[np.ndarray, pd.DataFrame, pd.Series],
           Y: Union[np.ndarray, pd.DataFrame, pd.Series],
           R : Union[np.ndarray, pd.DataFrame],
           r: Union[np.ndarray, float],
           B: int,
-          seed:  Union[int, None] = None) -> None:
+          seed:  Union[int, None] = None,
+          profile: Union[bool, Callable[[dict], None]] = False) -> None:
 
         """Initializes the Heteroskedastic Wild Bootstrap Class
 
         Args:
           X (Union[np.ndarray, pd.DataFrame, pd.Series]): Exogeneous variable array or dataframe
           Y (Union[np.ndarray, pd.DataFrame, pd.Series]): Endogenous variable array or dataframe
-          R (Union[np.ndarray, pd.DataFrame]): Constraint matrix for running bootstrap
+          R (Union[np.ndarray, pd.DataFrame]): Constraint vector of length k for running bootstrap. A q x k matrix tests
+            each of its q rows as a separate hypothesis, sharing all design-level precomputations and bootstrap weights.
+            t-statistics and p-values are then returned as arrays with one entry per row.
           B (int): bootstrap iterations
           seed (Union[int, None], optional): Random seed for random weight types. Defaults to None.
+          profile (Union[bool, Callable[[dict], None]], optional): If True, record the wall time, the allocated bytes and
+            the shapes of the arrays set by the constructor and each `get_*` method, see `get_profile()`. A callable
+            additionally receives each record as it is made. Defaults to False.
 
         Raises:
           TypeError: Raise if input arrays are lists
@@ -93,12 +193,16 @@ class WildboottestHC:
         self.N = X.shape[0]
         self.k = X.shape[1]
         self.B = B
-        self.R = R
+        self.R, self._R = _restriction_matrix(R)
         self.r = r
+        self._r = np.broadcast_to(np.asarray(r, dtype = float), (self._R.shape[0],))
+        # the number of hypotheses to test
+        self.q = self._R.shape[0]
 
-        if self.X.shape[1] != self.R.shape[0]:
+        if self.X.shape[1] != self._R.shape[1]:
           raise TestMatrixNonConformabilityException("The number of rows in the test matrix R, does not ")
 
+    @_profiled
     def get_adjustments(self, bootstrap_type):
 
         '''
@@ -112,6 +216,7 @@ class WildboottestHC:
         self.tXXinv = np.linalg.inv(np.transpose(self.X) @ self.X)
         self.resid_multiplier_boot, self.small_sample_correction = _adjust_scores(self.X, self.tXXinv, bootstrap_type[0])
 
+    @_profiled
     def get_uhat(self, impose_null : bool):
 
         '''
@@ -128,14 +233,68 @@ class WildboottestHC:
 
         if impose_null:
           self.impose_null = True
-          self.beta_r = self.beta_hat - self.tXXinv @ self.R * ( 1 / (np.transpose(self.R) @ self.tXXinv @ self.R)) * (np.transpose(self.R) @ self.beta_hat - self.r)#self.uhat_r = self.Y - self.beta_r
-          self.uhat_r = self.Y - self.X @ self.beta_r
-          self.uhat2 = self.uhat_r * self.resid_multiplier_boot
+          # restricted estimates, one row per hypothesis
+          RtXXinv = self._R @ self.tXXinv
+          A = 1 / np.sum(RtXXinv * self._R, axis = 1)
+          self._beta_r = self.beta_hat[None, :] - RtXXinv * (A * (self._R @ self.beta_hat - self._r))[:, None]
+          self._uhat_r = self.Y[None, :] - self._beta_r @ np.transpose(self.X)
+          self._uhat2 = self._uhat_r * self.resid_multiplier_boot
+          self.beta_r = self._unstack(self._beta_r)
+          self.uhat_r = self._unstack(self._uhat_r)
         else:
           self.impose_null = False
-          self.uhat2 = self.uhat * self.resid_multiplier_boot
+          self._uhat2 = np.broadcast_to(self.uhat * self.resid_multiplier_boot, (self.q, self.N))
+
+        self.uhat2 = self._unstack(self._uhat2)
+
+    def get_profile(self) -> pd.DataFrame:
+        """Get the stage profile recorded with `profile` enabled.
+
+        Each call of the constructor or of a `get_*` method is one stage, in the order of the calls. Stages called
+        within another one (e.g. `get_tstat()` within `get_pvalue_online()`) are part of it. Records are also logged
+        at the DEBUG level by the logger "wildboottest.wildboottest".
 
-    def get_tboot(self, weights_type: Union[str, Callable]):
+        Returns:
+            pd.DataFrame: One row per stage, with its name, wall time (in seconds), the bytes allocated and still
+              held after it ('allocated_bytes') and at its peak ('peak_bytes', None if tracemalloc was already
+              tracing before the stage and cannot reset its peak), and the shapes of the array attributes it set
+        """
+
+        return _profile_frame(self.profile_records)
+
+    def _unstack(self, x):
+
+        # results are stacked along a leading axis of length q, one per row of R.
+        # for a single hypothesis (R a vector), drop that axis
+        if self.R.ndim == 1:
+          return x[0]
+        return x
+
+    @_profiled
+    def get_tboot(self, weights_type: Union[str, Callable], max_memory: int = DEFAULT_MAX_MEMORY):
+        """Compute the bootstrap t-statistics.
+
+        Bootstrap draws are processed in blocks: for each block, an N x b weights
+        matrix is drawn and the bootstrap coefficients, residuals and HC variances
+        are computed via matrix products for all b draws at once. For a fixed seed,
+        the draws (and hence the t-statistics) are identical to drawing one weights
+        vector per bootstrap iteration.
+
+        Args:
+          weights_type (Union[str, Callable]): The distribution of the weights. Either 'rademacher' or 'norm'.
+          max_memory (int, optional): Upper bound (in bytes) on the memory used by the N x b
+            arrays of a single block. Determines the block size b. Defaults to 1 GiB.
+
+        Raises:
+          TestHCWeightsException: If non-supported weight types are selected
+        """
+
+        self._t_boot = np.zeros((self.q, self.B))
+        for start, t_boot in self._tboot_blocks(weights_type, max_memory):
+            self._t_boot[:, start:start + t_boot.shape[1]] = t_boot
+        self.t_boot = self._unstack(self._t_boot)
+
+    def _tboot_blocks(self, weights_type, max_memory, block_size = None):
 
         if weights_type not in ['rademacher', 'norm']:
             raise TestHCWeightsException("For the heteroskedastic bootstrap, only weight tyes 'rademacher' and 'normal' are supported, but you provided '" + weights_type + "' .")
@@ -144,74 +303,178 @@ class WildboottestHC:
         self.tXXinvX = self.tXXinv @ np.transpose(self.X)
 
         if self.impose_null == True:
-          beta = self.beta_r.reshape((self.k, 1))
+          beta = self._beta_r
         else:
-          beta = self.beta_hat.reshape((self.k, 1))
-
-        yhat = (self.X @ beta).flatten()
-
-        R = self.R.reshape((self.k, 1)).astype("float")
-        self.RXXinvX_2 = np.power(np.transpose(R) @ self.tXXinv @ np.transpose(self.X), 2)
-        #RXXinv_2 = np.power(np.transpose(R) @ self.tXXinv, 2)
-
-        #@jit
-        def _run_hc_bootstrap(B, weights_type, N, X, yhat, uhat2, tXXinv, RXXinvX_2, Rt, small_sample_correction, rng):
+          beta = np.broadcast_to(self.beta_hat, (self.q, self.k))
 
-            t_boot = np.zeros(B)
-            tXXinvX = tXXinv @ np.transpose(X)
+        yhat = beta @ np.transpose(self.X) # q x N
 
-            for b in range(B):
-            # create weights vector. mammen weights not supported via numba
-                v, _ = draw_weights(
-                          t = weights_type,
-                          full_enumeration = False,
-                          N_G_bootcluster = N,
-                          boot_iter = 1,
-                          rng=rng
-                        )
+        self.RXXinvX_2 = np.power(self._R @ self.tXXinvX, 2)
 
-                v = v.flatten()
+        self.block_size = _hc_block_size(N = self.N, B = self.B, max_memory = max_memory)
+        if block_size is not None:
+            self.block_size = min(self.block_size, block_size)
+        # keep the state of the random number generator, so that the same
+        # weights can be drawn again in get_confint()
+        self._rng_state = self.rng.bit_generator.state
 
-                uhat_boot = uhat2 * v
-                yhat_boot = yhat + uhat_boot
-                beta_boot = tXXinvX  @ yhat_boot
-                resid_boot = yhat_boot - X @ beta_boot
-                cov_v = small_sample_correction * RXXinvX_2 @ np.power(resid_boot, 2)
-                t_boot[b] = (Rt @ beta_boot / np.sqrt(cov_v))[0]
-
-            return t_boot
-
-        self.t_boot = _run_hc_bootstrap(
+        return _hc_tboot_blocks(
             B = self.B,
+            block_size = self.block_size,
             weights_type = self.weights_type,
-            N = self.N,
             X = self.X,
             yhat = yhat,
-            uhat2 = self.uhat2,
-            tXXinv = self.tXXinv,
+            uhat2 = self._uhat2,
+            tXXinvX = self.tXXinvX,
             RXXinvX_2 = self.RXXinvX_2,
-            Rt = np.transpose(R),
+            R = self._R,
+            r = self._r,
             small_sample_correction=self.small_sample_correction,
             rng = self.rng
           )
 
+    @_profiled
     def get_tstat(self):
 
         cov = self.small_sample_correction * self.RXXinvX_2 @ np.power(self.uhat, 2)
-        self.t_stat = (np.transpose(self.R) @ self.beta_hat - self.r) / np.sqrt(cov)
+        self._t_stat = (self._R @ self.beta_hat - self._r) / np.sqrt(cov)
+        self.t_stat = self._unstack(self._t_stat)
 
+    @_profiled
     def get_pvalue(self, pval_type = "two-tailed"):
 
-        if pval_type == "two-tailed":
-            self.pvalue = np.mean(np.abs(self.t_stat) < abs(self.t_boot))
-        elif pval_type == "equal-tailed":
-            pl = np.mean(self.t_stat < self.t_boot)
-            ph = np.mean(self.t_stat > self.t_boot)
-            self.pvalue = 2 * min(pl, ph)
-        elif pval_type == ">":
-            self.pvalue = np.mean(self.t_stat < self.t_boot)
-        else:
-            self.pvalue = np.mean(self.t_stat > self.t_boot)
+        self.pvalue = self._unstack(_get_pvalue(self._t_stat, self._t_boot, pval_type))
+
+    @_profiled
+    def get_pvalue_online(self, weights_type: Union[str, Callable], pval_type: str = "two-tailed",
+                          max_memory: int = DEFAULT_MAX_MEMORY, sample_size: int = 0):
+        """Compute the t-statistic and the bootstrap p-value without storing all bootstrap t-statistics.
+
+        Replaces `get_tboot()`, `get_tstat()` and `get_pvalue()`. Blocks of bootstrap t-statistics
+        are compared with the t-statistic as they are produced, and only the counts for all p-value
+        types are kept (in `pvalue_counts`), so that memory does not grow with B. For a fixed seed,
+        p-values are identical to those of `get_pvalue()`.
+
+        Args:
+          weights_type (Union[str, Callable]): The distribution of the weights. Either 'rademacher' or 'norm'.
+          pval_type (str, optional): Type of p-value. One of "two-tailed", "equal-tailed", ">" and "<". Defaults to "two-tailed".
+          max_memory (int, optional): Upper bound (in bytes) on the memory used by the N x b
+            arrays of a single block. Defaults to 1 GiB.
+          sample_size (int, optional): The number of bootstrap t-statistics to keep for diagnostics in
+            `t_boot_sample`. As bootstrap draws are iid, the first `sample_size` draws are kept. Defaults to 0.
+        """
+
+        blocks = self._tboot_blocks(weights_type, max_memory)
+        self.get_tstat()
+
+        self.pvalue_counts, self._t_boot_sample = _accumulate_pvalue_counts(self._t_stat, blocks, sample_size)
+        self.t_boot_sample = self._unstack(self._t_boot_sample)
+        self.pvalue = self._unstack(self.pvalue_counts.pvalue(pval_type))
+
+    @_profiled
+    def get_pvalue_sequential(self, weights_type: Union[str, Callable], levels: Union[float, Tuple[float, ...]] = (0.01, 0.05),
+                              pval_type: str = "two-tailed", error: float = 0.001, block_size: int = 100,
+                              max_memory: int = DEFAULT_MAX_MEMORY) -> int:
+        """Compute the t-statistic and the bootstrap p-value, stopping early once the test decisions are settled.
+
+        Replaces `get_tboot()`, `get_tstat()` and `get_pvalue()`. Bootstrap draws are made in blocks of
+        `block_size`, and p-value counts are accumulated online as in `get_pvalue_online()`. After each block,
+        the bootstrap stops if, for all hypotheses and all `levels`, the p-value estimated from the n draws so far
+        is significantly different from the level, i.e. if `|p - level| > z * sqrt(level * (1 - level) / n)` with `z`
+        the `1 - error / (2 * n_checks)` standard normal quantile, for the at most `n_checks = ceil(B / block_size)`
+        checks. Otherwise, it continues up to B draws. By this Bonferroni correction over all checks, for each
+        hypothesis and level, the probability that the bootstrap stops early with its p-value on the other side
+        of the level than the p-value of infinitely many draws is at most `error` (up to the normal approximation
+        of the p-value counts).
+
+        Args:
+          weights_type (Union[str, Callable]): The distribution of the weights. Either 'rademacher' or 'norm'.
+          levels (Union[float, Tuple[float, ...]], optional): The significance level(s) of the test decisions. Defaults to (0.01, 0.05).
+          pval_type (str, optional): Type of p-value. One of "two-tailed", "equal-tailed", ">" and "<". Defaults to "two-tailed".
+          error (float, optional): The probability, over all stopping checks, that the bootstrap stops on the wrong side of a level. Defaults to 0.001.
+          block_size (int, optional): The number of draws between two stopping checks. Defaults to 100.
+          max_memory (int, optional): Upper bound (in bytes) on the memory used by the N x b
+            arrays of a single block. Defaults to 1 GiB.
+
+        Returns:
+          int: The number of bootstrap draws used, also stored in `B_used`
+        """
+
+        blocks = self._tboot_blocks(weights_type, max_memory, block_size = block_size)
+        self.get_tstat()
+
+        n_checks = -(-self.B // self.block_size)
+        self.pvalue_counts = _accumulate_pvalue_sequential(self._t_stat, blocks, pval_type, levels, error, n_checks)
+        self.B_used = self.pvalue_counts.n
+        self.pvalue = self._unstack(self.pvalue_counts.pvalue(pval_type))
+
+        return self.B_used
+
+    @_profiled
+    def get_confint(self, alpha: float = 0.05, pval_type: str = "two-tailed",
+                    max_memory: int = DEFAULT_MAX_MEMORY, tol: float = 1e-6,
+                    maxiter: int = 100) -> np.ndarray:
+        """Compute bootstrap confidence intervals by test inversion.
+
+        The confidence interval collects all null values r for which the bootstrap test does
+        not reject at level alpha. Its bounds are found by bisection on the bootstrap p-value
+        as a function of r. The restricted residuals are affine in r, so the bootstrap numerators
+        are affine and the bootstrap denominators quadratic in r. Their coefficients are computed
+        in one pass over the same weights as in `get_tboot()`, after which each candidate r
+        costs O(B). Requires `get_tboot()` and `get_tstat()` to have been run.
+
+        Args:
+          alpha (float, optional): The significance level. Defaults to 0.05.
+          pval_type (str, optional): Either "two-tailed" or "equal-tailed". Defaults to "two-tailed".
+          max_memory (int, optional): Upper bound (in bytes) on the memory used by the N x b
+            arrays of a single block. Defaults to 1 GiB.
+          tol (float, optional): Tolerance of the bisection, relative to the standard error. Defaults to 1e-6.
+          maxiter (int, optional): Maximum number of bracketing and bisection steps. Defaults to 100.
+
+        Returns:
+          np.ndarray: The lower and upper bound of the confidence interval (q x 2 for q hypotheses)
+        """
+
+        if pval_type not in ["two-tailed", "equal-tailed"]:
+          raise ValueError(f"pval_type must be either 'two-tailed' or 'equal-tailed', but got '{pval_type}'.")
+
+        # restricted estimates are beta_r(r) = beta_r(0) + r * dbeta_r
+        RtXXinv = self._R @ self.tXXinv
+        A = 1 / np.sum(RtXXinv * self._R, axis = 1)
+        beta_r_0 = self.beta_hat[None, :] - RtXXinv * (A * (self._R @ self.beta_hat))[:, None]
+        dbeta_r = RtXXinv * A[:, None]
+        uhat2_0 = (self.Y[None, :] - beta_r_0 @ np.transpose(self.X)) * self.resid_multiplier_boot
+        uhat2_1 = - (dbeta_r @ np.transpose(self.X)) * self.resid_multiplier_boot
+
+        rng = np.random.Generator(type(self.rng.bit_generator)())
+        rng.bit_generator.state = self._rng_state
+
+        numer, denom = _run_hc_confint_coefs(
+            B = self.B,
+            block_size = _hc_block_size(N = self.N, B = self.B, max_memory = max_memory // 2),
+            weights_type = self.weights_type,
+            X = self.X,
+            uhat2 = [uhat2_0, uhat2_1],
+            tXXinvX = self.tXXinvX,
+            RXXinvX_2 = self.RXXinvX_2,
+            R = self._R,
+            small_sample_correction = self.small_sample_correction,
+            rng = rng
+          )
+
+        estimate = self._R @ self.beta_hat
+        se = np.sqrt(self.small_sample_correction * self.RXXinvX_2 @ np.power(self.uhat, 2))
+
+        def pvalue_fun(r):
+          t_stat = (estimate - r) / se
+          r = r[:, None]
+          t_boot = (numer[0] + r * numer[1]) / np.sqrt(denom[0] + 2 * r * denom[1] + r**2 * denom[2])
+          return _get_pvalue(t_stat, t_boot, pval_type)
+
+        self._confint = _confint_by_inversion(pvalue_fun, estimate, se, alpha, tol, maxiter)
+        self.confint = self._unstack(self._confint)
+
+        return self.confint
 
 
 def _adjust_scores(X, tXXinv, variant):
@@ -224,8 +487,8 @@ def _adjust_scores(X, tXXinv, variant):
       resid_multiplier = np.ones(N)
       small_sample_correction = (N-1) / (N-k)
     else:
-      hatmat = X @ tXXinv @ np.transpose(X)
-      diag_hatmat = np.diag(hatmat)
+      # diagonal of the hat matrix, without forming the N x N matrix
+      diag_hatmat = np.sum((X @ tXXinv) * X, axis = 1)
       small_sample_correction = 1
       if variant == "2":
         # HC2
@@ -236,6 +499,446 @@ def _adjust_scores(X, tXXinv, variant):
 
     return resid_multiplier, small_sample_correction
 
+def _restriction_matrix(R):
+
+    # R is either a k-vector (a single hypothesis) or a q x k matrix, with
+    # each row a separate hypothesis. Returns R and its q x k version
+    if isinstance(R, (pd.DataFrame, pd.Series)):
+        R = R.values
+    R = np.asarray(R)
+
+    return R, np.atleast_2d(R).astype(float)
+
+def _leave_one_out_inverses(tXX, tXgXg_list, X_list = None):
+
+    # inverses of X'X - X_g'X_g for all clusters g, G x k x k. clusters with
+    # fewer rows than columns are downdated from (X'X)^{-1} via
+    # Sherman-Morrison-Woodbury (if their rows X_g are available), batched
+    # over clusters of equal size. all others are inverted via one batched
+    # Cholesky factorization. if any matrix is (numerically) singular, e.g.
+    # if X contains cluster fixed effects, fall back to pseudo-inverses
+    G, k = tXgXg_list.shape[:2]
+    inv = np.empty((G, k, k))
+    downdate = np.zeros(G, dtype = bool)
+
+    if X_list is not None:
+        N_g = np.array([X_g.shape[0] for X_g in X_list])
+        tXXinv = _spd_inverse(tXX[None, :, :]) if np.any(N_g < k) else None
+        if tXXinv is not None:
+            for n in np.unique(N_g[N_g < k]):
+                ix = np.flatnonzero(N_g == n)
+                X_g = np.stack([X_list[g] for g in ix]) # c x n x k
+                U = X_g @ tXXinv[0]
+                S_inv = _spd_inverse(np.eye(n)[None, :, :] - U @ np.transpose(X_g, (0, 2, 1)))
+                if S_inv is not None:
+                    inv[ix] = tXXinv + np.transpose(U, (0, 2, 1)) @ S_inv @ U
+                    downdate[ix] = True
+
+    if not np.all(downdate):
+        A = tXX[None, :, :] - tXgXg_list[~downdate]
+        A_inv = _spd_inverse(A)
+        inv[~downdate] = np.linalg.pinv(A) if A_inv is None else A_inv
+
+    return inv
+
+def _spd_inverse(A):
+
+    # inverses of a stack of symmetric positive definite matrices via their
+    # Cholesky factors L, as inv(L)' inv(L). None if any of them is singular
+    # or too ill-conditioned (relative to the pseudo-inverse)
+    try:
+        L = np.linalg.cholesky(A)
+    except np.linalg.LinAlgError:
+        return None
+
+    pivots = np.diagonal(L, axis1 = 1, axis2 = 2)**2
+    if np.any(np.min(pivots, axis = 1) <= _SPD_RCOND * np.max(pivots, axis = 1)):
+        return None
+
+    L_inv = np.linalg.solve(L, np.broadcast_to(np.eye(A.shape[1]), A.shape))
+    return np.transpose(L_inv, (0, 2, 1)) @ L_inv
+
+def _get_pvalue(t_stat, t_boot, pval_type):
+
+    # t_stat has one entry per hypothesis, t_boot one row per hypothesis
+    counts = _PvalueCounts(t_stat)
+    counts.update(t_boot)
+
+    return counts.pvalue(pval_type)
+
+def _accumulate_pvalue_counts(t_stat, blocks, sample_size):
+
+    # consume blocks of bootstrap t-statistics, keeping running counts and the
+    # first sample_size draws (a simple random sample, as the draws are iid)
+    counts = _PvalueCounts(t_stat)
+    samples = []
+
+    for start, t_boot in blocks:
+        counts.update(t_boot)
+        if start < sample_size:
+            samples.append((start, t_boot[:, :sample_size - start]))
+
+    # blocks need not arrive in order, e.g. the mirrored draws of a full enumeration
+    samples.sort(key = lambda sample: sample[0])
+    t_boot_sample = np.concatenate([np.zeros((len(t_stat), 0))] + [sample for _, sample in samples], axis = 1)
+
+    return counts, t_boot_sample
+
+def _accumulate_pvalue_sequential(t_stat, blocks, pval_type, levels, error, n_checks):
+
+    # consume blocks of bootstrap t-statistics until the p-values of all
+    # hypotheses are significantly above or below all levels. each of the at
+    # most n_checks checks is run at level error / n_checks (Bonferroni), so
+    # that the probability of any wrong early stop is at most error
+    counts = _PvalueCounts(t_stat)
+    levels = np.atleast_1d(np.asarray(levels, dtype = float))[None, :]
+    z = NormalDist().inv_cdf(1 - error / (2 * n_checks))
+
+    # variance of the p-value counts at the levels, times the number of draws.
+    # the equal-tailed p-value is twice a share at half the level
+    if pval_type == "equal-tailed":
+        variance = 4 * levels / 2 * (1 - levels / 2)
+    else:
+        variance = levels * (1 - levels)
+
+    for start, t_boot in blocks:
+        counts.update(t_boot)
+        pvalue = counts.pvalue(pval_type)[:, None]
+        if levels.size > 0 and np.all(np.abs(pvalue - levels) > z * np.sqrt(variance / counts.n_valid[:, None])):
+            break
+
+    return counts
+
+class _PvalueCounts:
+
+    # running counts of bootstrap t-statistics exceeding the t-statistic, for
+    # all p-value types at once. t_stat has one entry per hypothesis, blocks of
+    # t_boot one row per hypothesis; memory does not depend on B. NaN
+    # t-statistics (e.g. negative multiway variances) are counted in n_nan,
+    # and p-values are shares of the remaining n - n_nan draws
+    def __init__(self, t_stat):
+        self.t_stat = t_stat[:, None]
+        self.n = 0
+        self.n_nan = np.zeros(len(t_stat), dtype = np.int64)
+        self.n_abs_greater = np.zeros(len(t_stat), dtype = np.int64)
+        self.n_greater = np.zeros(len(t_stat), dtype = np.int64)
+        self.n_less = np.zeros(len(t_stat), dtype = np.int64)
+
+    def update(self, t_boot):
+        self.n += t_boot.shape[1]
+        self.n_nan += np.sum(np.isnan(t_boot), axis = 1)
+        self.n_abs_greater += np.sum(np.abs(self.t_stat) < np.abs(t_boot), axis = 1)
+        self.n_greater += np.sum(self.t_stat < t_boot, axis = 1)
+        self.n_less += np.sum(self.t_stat > t_boot, axis = 1)
+
+    @property
+    def n_valid(self):
+        return self.n - self.n_nan
+
+    def pvalue(self, pval_type):
+        if pval_type == "two-tailed":
+            return self.n_abs_greater / self.n_valid
+        elif pval_type == "equal-tailed":
+            return 2 * np.minimum(self.n_greater, self.n_less) / self.n_valid
+        elif pval_type == ">":
+            return self.n_greater / self.n_valid
+        else:
+            return self.n_less / self.n_valid
+
+def _confint_by_inversion(pvalue_fun, estimate, se, alpha, tol, maxiter):
+
+    # for each hypothesis, find the null values r at which the bootstrap
+    # p-value crosses alpha, below and above the point estimate. pvalue_fun
+    # maps a vector of null values (one per hypothesis) to p-values
+    confint = np.zeros((len(estimate), 2))
+
+    for j, sign in enumerate([-1, 1]):
+
+        # bracket the bound: inner is not rejected, outer is rejected
+        inner = estimate.copy()
+        step = se.copy()
+        for _ in range(maxiter):
+            outer = estimate + sign * step
+            rejected = pvalue_fun(outer) <= alpha
+            if np.all(rejected):
+                break
+            step = np.where(rejected, step, 2 * step)
+
+        unbounded = ~rejected
+        if np.any(unbounded):
+            warnings.warn("Could not bracket the confidence interval bound, setting it to infinity.")
+            outer = np.where(unbounded, inner, outer)
+
+        # bisect between inner and outer
+        for _ in range(maxiter):
+            if np.all(np.abs(outer - inner) <= tol * se):
+                break
+            mid = (inner + outer) / 2
+            accepted = pvalue_fun(mid) > alpha
+            inner = np.where(accepted, mid, inner)
+            outer = np.where(accepted, outer, mid)
+
+        confint[:, j] = np.where(unbounded, sign * np.inf, (inner + outer) / 2)
+
+    return confint
+
+def _hc_block_size(N, B, max_memory):
+
+    # weights, bootstrap outcome, bootstrap residuals and their squares are
+    # held as N x b arrays of 8 byte elements
+    block_size = int(max_memory // (_HC_ARRAYS_PER_BLOCK * 8 * N))
+
+    return max(1, min(B, block_size))
+
+def _hc_weight_blocks(weights_type, N, B, block_size, rng):
+
+    # yields blocks of N x b weights matrices. weights are drawn in the same
+    # order as one N-vector per bootstrap iteration would, so that results
+    # do not depend on the block size
+    wild_draw_fun = wild_draw_fun_dict[weights_type]
+
+    for start in range(0, B, block_size):
+        b = min(block_size, B - start)
+        yield start, wild_draw_fun(n = N * b, rng = rng).reshape((b, N)).T
+
+def _hc_tboot_blocks(B, block_size, weights_type, X, yhat, uhat2, tXXinvX, RXXinvX_2, R, r, small_sample_correction, rng):
+
+    # yhat, uhat2 and RXXinvX_2 hold one row per hypothesis, all
+    # hypotheses share the same bootstrap weights. yields the q x b
+    # bootstrap t-statistics of each block of draws
+    N = X.shape[0]
+    q = R.shape[0]
+
+    for start, v in _hc_weight_blocks(weights_type, N, B, block_size, rng):
+
+        t_boot = np.zeros((q, v.shape[1]))
+        for iq in range(q):
+            yhat_boot = yhat[iq][:, None] + uhat2[iq][:, None] * v
+            beta_boot = tXXinvX @ yhat_boot
+            resid_boot = yhat_boot - X @ beta_boot
+            cov_v = small_sample_correction * RXXinvX_2[iq] @ np.power(resid_boot, 2)
+            t_boot[iq] = (R[iq] @ beta_boot - r[iq]) / np.sqrt(cov_v)
+
+        yield start, t_boot
+
+def _run_hc_confint_coefs(B, block_size, weights_type, X, uhat2, tXXinvX, RXXinvX_2, R, small_sample_correction, rng):
+
+    # coefficients of the bootstrap numerators (affine in the null value r)
+    # and denominators (quadratic in r). uhat2 is a list of the intercept and
+    # slope in r of the (transformed) restricted residuals, q x N each
+    N = X.shape[0]
+    q = R.shape[0]
+    RtXXinvX = R @ tXXinvX
+
+    numer = np.zeros((2, q, B))
+    denom = np.zeros((3, q, B))
+
+    for start, v in _hc_weight_blocks(weights_type, N, B, block_size, rng):
+
+        b = v.shape[1]
+        for iq in range(q):
+            u_0 = uhat2[0][iq][:, None] * v
+            u_1 = uhat2[1][iq][:, None] * v
+            resid_0 = u_0 - X @ (tXXinvX @ u_0)
+            resid_1 = u_1 - X @ (tXXinvX @ u_1)
+            numer[0, iq, start:start + b] = RtXXinvX[iq] @ u_0
+            numer[1, iq, start:start + b] = RtXXinvX[iq] @ u_1
+            denom[0, iq, start:start + b] = small_sample_correction * RXXinvX_2[iq] @ (resid_0 * resid_0)
+            denom[1, iq, start:start + b] = small_sample_correction * RXXinvX_2[iq] @ (resid_0 * resid_1)
+            denom[2, iq, start:start + b] = small_sample_correction * RXXinvX_2[iq] @ (resid_1 * resid_1)
+
+    return numer, denom
+
+def _absorb_fe(X, Y, fe, bootcluster, tol = 1e-10, maxiter = 10_000):
+
+    # partial the fixed effects out of X and Y by alternating projections:
+    # demean all columns within the levels of each factor in turn, until the
+    # demeaned columns no longer change. exact after one pass for one factor
+    if isinstance(fe, (pd.DataFrame, pd.Series)):
+        fe = fe.values
+    fe = np.asarray(fe)
+    if fe.ndim == 1:
+        fe = fe[:, None]
+    if fe.shape[0] != X.shape[0]:
+        raise ValueError(f"`fe` has {fe.shape[0]} rows, but X has {X.shape[0]}.")
+
+    codes = [pd.factorize(fe[:, j])[0] for j in range(fe.shape[1])]
+    if any(np.any(c < 0) for c in codes):
+        raise ValueError("`fe` contains missing values.")
+    counts = [np.bincount(c) for c in codes]
+
+    XY = np.column_stack([X, Y]).astype(float)
+    scale = np.maximum(np.max(np.abs(XY), axis = 0), 1)
+    for _ in range(maxiter):
+        XY_prev = XY.copy()
+        for c, n in zip(codes, counts):
+            for j in range(XY.shape[1]):
+                XY[:, j] -= (np.bincount(c, weights = XY[:, j], minlength = len(n)) / n)[c]
+        if len(codes) == 1 or np.max(np.abs(XY - XY_prev) / scale) < tol:
+            break
+    else:
+        warnings.warn(f"Demeaning of the fixed effects did not converge in {maxiter} iterations.")
+
+    X_dm, Y_dm = XY[:, :X.shape[1]], XY[:, X.shape[1]:]
+    if Y.ndim == 1:
+        Y_dm = Y_dm[:, 0]
+
+    collinear = np.sum(X_dm**2, axis = 0) <= 1e-12 * np.maximum(np.sum(np.asarray(X, dtype = float)**2, axis = 0), 1e-300)
+    if np.any(collinear):
+        raise ValueError(f"Columns {list(np.flatnonzero(collinear))} of X are collinear with the fixed effects.")
+
+    def nested(c, n, cluster):
+        # each level of the factor lies within a single cluster (of any
+        # dimension, for multiway clustering)
+        cluster = np.asarray(cluster)
+        columns = [cluster] if cluster.ndim == 1 else [cluster[:, d] for d in range(cluster.shape[1])]
+        return any(len(np.unique(np.column_stack([c, pd.factorize(col)[0]]), axis = 0)) == len(n) for col in columns)
+
+    # degrees of freedom absorbed by the fixed effects: one for the constant,
+    # plus the remaining levels of all factors, i.e. the number of dummies
+    # of the equivalent regression, so that the small sample correction of
+    # CRV1 matches the one with fixed-effect dummies
+    k_fe = 1 + sum(len(n) - 1 for n in counts)
+
+    # the bootstrap weights are constant within nested fixed effects, so that
+    # bootstrap samples stay orthogonal to them. otherwise, the bootstrap
+    # residuals are not projected off the fixed effects
+    if not all(nested(c, n, bootcluster) for c, n in zip(codes, counts)):
+        warnings.warn("Some fixed effects are not nested within the bootstrap clusters: the bootstrap is then only an approximation of the bootstrap with fixed-effect dummies.")
+
+    return X_dm, Y_dm, k_fe
+
+def _intersect_clusters(clusters):
+
+    # codes of the intersections of several cluster vectors, as indices into
+    # an array of their dimensions, with the first vector as the leading key.
+    # also returns the sorted unique values of each vector
+    factorized = [pd.factorize(np.ravel(cluster), sort = True) for cluster in clusters]
+    dims = tuple(len(uniques) for _, uniques in factorized)
+    codes = np.ravel_multi_index([codes for codes, _ in factorized], dims)
+
+    return codes, dims, [np.asarray(uniques) for _, uniques in factorized]
+
+def _group_by_cluster(cluster):
+
+    # factorize the cluster vector once and sort the rows by cluster:
+    # rows of cluster clustid[g] are order[bounds[g]:bounds[g+1]]. order is
+    # None if the rows are already sorted by cluster
+    clustid, codes = np.unique(cluster, return_inverse = True)
+    codes = np.ravel(codes)
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength = len(clustid)))])
+
+    if np.all(codes[1:] >= codes[:-1]):
+        order = None
+    else:
+        order = np.argsort(codes, kind = "stable")
+
+    return clustid, order, bounds
+
+def _cluster_cross_products(X, Y, order, bounds, with_tXgXg = True):
+
+    # per-cluster X_g'X_g, X_g'Y_g and Y_g'Y_g for the grouping of
+    # _group_by_cluster(). small clusters are bucketed by their size, rounded
+    # up to a power of two, and the rows of a batch of clusters are gathered
+    # into a zero-padded c x n x k array for one batched matrix product. only
+    # clusters of more than _BATCH_MAX_ROWS rows, where a single product is
+    # cheap relative to the padded copy, are multiplied one at a time
+    N_g = np.diff(bounds)
+    G, k = len(N_g), X.shape[1]
+    Y_2d = Y.reshape(len(Y), -1)
+    m = Y_2d.shape[1]
+
+    tXgXg = np.zeros((G, k, k)) if with_tXgXg else None
+    tXgyg = np.zeros((G, k, m))
+    tygyg = np.zeros((G, m))
+
+    size = 2 ** np.ceil(np.log2(N_g)).astype(np.int64)
+    for g in np.flatnonzero(size > _BATCH_MAX_ROWS):
+        rows = slice(bounds[g], bounds[g + 1]) if order is None else order[bounds[g]:bounds[g + 1]]
+        X_g, Y_g = X[rows], Y_2d[rows]
+        if with_tXgXg:
+            tXgXg[g] = np.transpose(X_g) @ X_g
+        tXgyg[g] = np.transpose(X_g) @ Y_g
+        tygyg[g] = np.sum(Y_g * Y_g, axis = 0)
+
+    for n in np.unique(size[size <= _BATCH_MAX_ROWS]):
+        clusters = np.flatnonzero(size == n)
+        batch_size = max(1, _BATCH_MAX_BYTES // (8 * n * (k + m)))
+        offset = np.arange(n)[None, :]
+        for start in range(0, len(clusters), batch_size):
+            g = clusters[start:start + batch_size]
+            # padded rows repeat the last row of their cluster and are zeroed
+            valid = (offset < N_g[g][:, None])[:, :, None]
+            rows = bounds[g][:, None] + np.minimum(offset, N_g[g][:, None] - 1)
+            if order is not None:
+                rows = order[rows]
+            X_g, Y_g = X[rows] * valid, Y_2d[rows] * valid
+            tX_g = np.transpose(X_g, (0, 2, 1))
+            if with_tXgXg:
+                tXgXg[g] = tX_g @ X_g
+            tXgyg[g] = tX_g @ Y_g
+            tygyg[g] = np.sum(Y_g * Y_g, axis = 1)
+
+    if Y.ndim == 1:
+        tXgyg, tygyg = tXgyg[:, :, 0], tygyg[:, 0]
+
+    return tXgXg, tXgyg, tygyg
+
+def _accumulate_cluster_stats(chunks):
+
+    # accumulate per-cluster row counts and cross-products X_g'X_g, X_g'y_g
+    # and y_g'y_g over chunks of rows. clusters are indexed in order of first
+    # appearance while streaming, and sorted by cluster id at the end
+    index = {}
+    k = None
+    G = 0
+    N_g = np.zeros(0, dtype = np.int64)
+    tXgXg = tXgyg = tygyg = None
+
+    for X, Y, cluster in chunks:
+
+        X, Y, cluster = [i.values if isinstance(i, (pd.DataFrame, pd.Series)) else np.asarray(i) for i in [X, Y, cluster]]
+        Y = np.ravel(Y)
+        if X.ndim == 1:
+            X = X[:, None]
+
+        if k is None:
+            k = X.shape[1]
+            tXgXg, tXgyg, tygyg = np.zeros((0, k, k)), np.zeros((0, k)), np.zeros(0)
+
+        clustid, order, bounds = _group_by_cluster(np.ravel(cluster))
+        if order is not None:
+            X, Y = X[order], Y[order]
+
+        ix = np.array([index.setdefault(g, len(index)) for g in clustid.tolist()], dtype = np.int64)
+
+        if len(index) > G:
+            # grow geometrically, so that copying is amortized over chunks
+            capacity = max(len(index), 2 * len(N_g))
+            if capacity > len(N_g):
+                N_g = np.concatenate([N_g, np.zeros(capacity - len(N_g), dtype = np.int64)])
+                tXgXg = np.concatenate([tXgXg, np.zeros((capacity - len(tXgXg), k, k))])
+                tXgyg = np.concatenate([tXgyg, np.zeros((capacity - len(tXgyg), k))])
+                tygyg = np.concatenate([tygyg, np.zeros(capacity - len(tygyg))])
+            G = len(index)
+
+        for ixg, g in enumerate(ix):
+            X_g = X[bounds[ixg]:bounds[ixg + 1]]
+            Y_g = Y[bounds[ixg]:bounds[ixg + 1]]
+            N_g[g] += X_g.shape[0]
+            tXgXg[g] += np.transpose(X_g) @ X_g
+            tXgyg[g] += np.transpose(X_g) @ Y_g
+            tygyg[g] += Y_g @ Y_g
+
+    if k is None:
+        raise ValueError("chunks must contain at least one chunk of data.")
+
+    keys = list(index)
+    sort = sorted(range(G), key = lambda ixg: keys[ixg])
+    bootclustid = np.array([keys[ixg] for ixg in sort])
+
+    return bootclustid, N_g[sort], tXgXg[sort], tXgyg[sort], tygyg[sort]
+
 class WildboottestCL:
   """Create an object of WildboottestCL and get p-value by successively applying
   methods in the following way:
@@ -266,8 +969,10 @@ class WildboottestCL:
       >>> wb.get_vcov()
       >>> wb.get_tstat()
       >>> wb.get_pvalue()
+      >>> wb.get_confint()
   """
 
+  @_profiled
   def __init__(self, X : Union[np.ndarray, pd.DataFrame, pd.Series],
                Y: Union[np.ndarray, pd.DataFrame, pd.Series],
                cluster : Union[np.ndarray, pd.DataFrame, pd.Series],
@@ -275,20 +980,60 @@ class WildboottestCL:
                B: int,
                bootcluster: Union[np.ndarray, pd.DataFrame, pd.Series, None] = None,
                seed:  Union[int, None] = None,
-               parallel: bool = True) -> None:
+               parallel: bool = True,
+               r: Union[np.ndarray, float] = 0,
+               joint: bool = False,
+               low_memory: bool = False,
+               cache: Union[str, os.PathLike, DesignCache, None] = None,
+               fe: Union[np.ndarray, pd.DataFrame, pd.Series, None] = None,
+               profile: Union[bool, Callable[[dict], None]] = False) -> None:
     """Initializes the Wild Cluster Bootstrap Class
 
     Args:
         X (Union[np.ndarray, pd.DataFrame, pd.Series]): Exogeneous variable array or dataframe
-        Y (Union[np.ndarray, pd.DataFrame, pd.Series]): Endogenous variable array or dataframe
-        cluster (Union[np.ndarray, pd.DataFrame, pd.Series]): Cluster array or dataframe
-        R (Union[np.ndarray, pd.DataFrame]): Constraint matrix for running bootstrap
+        Y (Union[np.ndarray, pd.DataFrame, pd.Series]): Endogenous variable array or dataframe. An N x m matrix
+            tests each of its m columns as a separate outcome, sharing all design-level precomputations and
+            bootstrap weights. Results are then stacked along a leading axis of length m.
+        cluster (Union[np.ndarray, pd.DataFrame, pd.Series]): Cluster array or dataframe. An N x D matrix (or dataframe)
+            requests multiway clustering by its D columns (Cameron, Gelbach & Miller, 2011), for the bootstrap type "11".
+            Per-cluster cross-products are then computed once at the level of the intersection of all clusters, and
+            aggregated to each clustering dimension (and their intersections) by segment sums. `clustid` and `G` are then
+            lists with one entry per dimension. Negative eigenvalues of the multiway vcov are set to zero, and bootstrap
+            draws with a negative variance get a NaN t-statistic and are left out of the p-value, with a warning.
+        R (Union[np.ndarray, pd.DataFrame]): Constraint vector of length k for running bootstrap. A q x k matrix tests
+            each of its q rows as a separate hypothesis, sharing all design-level precomputations and bootstrap weights.
+            Bootstrap t-statistics are then returned as a q x B array.
         B (int): bootstrap iterations
-        bootcluster (Union[np.ndarray, pd.DataFrame, pd.Series, None], optional): Sub-cluster array. Defaults to None.
+        bootcluster (Union[np.ndarray, pd.DataFrame, pd.Series, None], optional): Sub-cluster array. If it partitions the rows
+            differently from `cluster`, bootstrap weights are drawn for its clusters, while variances are clustered by `cluster`
+            (the subcluster bootstrap of MacKinnon & Webb (2018)), for the bootstrap type "11". Defaults to None, i.e. `cluster`, or the clustering
+            dimension with the most clusters for multiway clustering.
         seed (Union[int, None], optional): Random seed for random weight types. Defaults to None.
         parallel (bool, optional): Whether to run the bootstrap in parallel. Defaults to True.
+        r (Union[np.ndarray, float], optional): The null value(s) of R @ beta, one per row of R. Defaults to 0.
+        joint (bool, optional): If True, test all q rows of R jointly, H0: R @ beta = r, via a bootstrap
+            Wald statistic instead of q separate t-tests. Defaults to False.
+        low_memory (bool, optional): If True, only keep the per-cluster k x k and k x 1 cross-products,
+            and drop all references to the individual rows (`X`, `Y`, `X_list`, `Y_list` and the cluster
+            arrays) once they are computed. All bootstrap types are computed from the cross-products. Defaults to False.
+        cache (Union[str, os.PathLike, DesignCache, None], optional): A `wildboottest.cache.DesignCache`, or the path of
+            its directory. If provided, the cluster grouping, the per-cluster X_g'X_g, the inverse of X'X and the
+            leave-one-cluster-out inverses of the "3x" bootstrap types and of CRV3 are loaded from the cache if they were
+            computed for the same X and bootcluster before, and stored in it otherwise. Defaults to None (no caching).
+        fe (Union[np.ndarray, pd.DataFrame, pd.Series, None], optional): One (N) or more (N x F) fixed-effect factors,
+            which are partialled out of X and Y by alternating demeaning before bootstrapping, instead of adding
+            their dummies to X. X must then not contain a constant. The small sample correction of CRV1 counts the
+            degrees of freedom of all fixed-effect dummies. Results equal those with fixed-effect dummies if all
+            factors are nested within the bootstrap clusters. Otherwise, a
+            warning is raised: neither the bootstrap residuals nor the leave-one-cluster-out estimates of CRV3 and of
+            the "3x" types are then projected off the fixed effects, and are approximations. Defaults to None.
+        profile (Union[bool, Callable[[dict], None]], optional): If True, record the wall time, the allocated bytes and
+            the shapes of the arrays set by the constructor and each `get_*` method, see `get_profile()`. A callable
+            additionally receives each record as it is made. Defaults to False.
     Raises:
         TypeError: Raise if input arrays are lists
+        ValueError: Raise if `joint` is True for more than one outcome, with multiway clustering or with a
+            `bootcluster`, or if a column of X is collinear with `fe`
         TestMatrixNonConformabilityException: Raise if constraint matrix shape does not conform to X
     """
 
@@ -298,7 +1043,8 @@ class WildboottestCL:
 
     self.parallel = parallel
 
-    if bootcluster is None:
+    bootcluster_is_cluster = bootcluster is None
+    if bootcluster_is_cluster:
       bootcluster = cluster
 
     for i in [X, Y, cluster, bootcluster]:
@@ -315,72 +1061,326 @@ class WildboottestCL:
     else:
       self.Y = Y
 
-    if isinstance(cluster, pd.DataFrame):
-      self.clustid = cluster.unique()
-      self.cluster = cluster.values
-    if isinstance(bootcluster, pd.DataFrame):
-      self.bootclustid = bootcluster.unique()
-      self.bootcluster = bootcluster.values
+    if isinstance(cluster, (pd.DataFrame, pd.Series)):
+      cluster = cluster.values
+    if isinstance(bootcluster, (pd.DataFrame, pd.Series)):
+      bootcluster = bootcluster.values
+
+    # an N x D matrix of cluster variables requests multiway clustering, a
+    # bootcluster other than the cluster the subcluster bootstrap. both keep
+    # the cross-products of the intersection ("fine") clusters of the
+    # bootcluster and all clusters, and aggregate them to each level
+    cluster = np.asarray(cluster)
+    self.multiway = cluster.ndim == 2 and cluster.shape[1] > 1
+    if not self.multiway and not bootcluster_is_cluster:
+      # a bootcluster that partitions the rows as the cluster does is the
+      # ordinary wild cluster bootstrap, whatever its labels
+      codes, _, uniques = _intersect_clusters([bootcluster, cluster])
+      if len(np.unique(codes)) == len(uniques[0]) == len(uniques[1]):
+        bootcluster, bootcluster_is_cluster = cluster, True
+    self.subcluster = not self.multiway and not bootcluster_is_cluster
+    self._fine_clusters = self.multiway or self.subcluster
+    if self._fine_clusters and joint:
+      raise ValueError("Joint hypotheses are not supported for multiway clustering or the subcluster bootstrap.")
+    self.cluster = cluster if self.multiway else np.ravel(cluster)
+    if self.multiway and bootcluster_is_cluster:
+      # by default, bootstrap by the clustering dimension with the most clusters
+      n_clusters = [len(pd.unique(self.cluster[:, d])) for d in range(self.cluster.shape[1])]
+      bootcluster = self.cluster[:, np.argmax(n_clusters)]
+    self.bootcluster = np.ravel(bootcluster)
+
+    # the bootstrap runs on the design with the fixed effects partialled out
+    self.k_fe = 0
+    if fe is not None:
+      self.X, self.Y, self.k_fe = _absorb_fe(self.X, self.Y, fe, self.bootcluster)
+
+    self.k = self.X.shape[1]
+    self._init_params(R = R, B = B, seed = seed, r = r, joint = joint, m = 1 if self.Y.ndim == 1 else self.Y.shape[1])
+
+    if self.X.shape[1] != self._R.shape[1]:
+      raise TestMatrixNonConformabilityException("The number of rows in the test matrix R, does not ")
+
+    # with fine clusters, rows are grouped by the intersection of the
+    # bootcluster and all clustering dimensions, with the bootcluster as
+    # the leading key
+    if self._fine_clusters:
+      clusters = [self.cluster[:, d] for d in range(self.cluster.shape[1])] if self.multiway else [self.cluster]
+      group, group_dims, group_uniques = _intersect_clusters([self.bootcluster] + clusters)
+    else:
+      group = self.bootcluster
+
+    # design-level objects only depend on X and the bootcluster
+    if cache is not None and not isinstance(cache, DesignCache):
+      cache = DesignCache(cache)
+    self.cache = cache
+    design = None
+    if self.cache is not None:
+      self._cache_key = fingerprint(self.X, group)
+      design = self.cache.load(self._cache_key)
+
+    # sort the rows by (boot)cluster once; all per-cluster objects are
+    # then computed from contiguous slices (views) of the sorted data
+    if design is None:
+      bootclustid, order, bounds = _group_by_cluster(group)
+    else:
+      bootclustid, bounds = design["bootclustid"], design["bounds"]
+      order = design.get("order")
+
+    if low_memory or self._fine_clusters:
+      # no row lists are kept (with fine clusters, they would hold the
+      # intersection clusters, not the bootclusters): the cross-products
+      # gather the rows of each batch of clusters instead of a sorted copy
+      X_list, Y_list = None, None
+      tXgXg_list, tXgyg_list, tygyg_list = _cluster_cross_products(self.X, self.Y, order, bounds, with_tXgXg = design is None)
     else:
-      self.clustid = np.unique(cluster)
-      self.bootclustid = np.unique(bootcluster)
-      self.bootcluster = bootcluster
+      X_sorted, Y_sorted = (self.X, self.Y) if order is None else (self.X[order], self.Y[order])
+      X_list = [X_sorted[bounds[ix]:bounds[ix + 1]] for ix in range(len(bootclustid))]
+      Y_list = [Y_sorted[bounds[ix]:bounds[ix + 1]] for ix in range(len(bootclustid))]
+      tXgXg_list, tXgyg_list, tygyg_list = _cluster_cross_products(X_sorted, Y_sorted, None, bounds, with_tXgXg = design is None)
+
+    if design is None:
+      tXXinv = np.linalg.inv(np.sum(tXgXg_list, axis = 0))
+    else:
+      tXgXg_list, tXXinv = design["tXgXg_list"], design["tXXinv"]
+
+    if self.cache is not None and design is None:
+      design = {"bootclustid": bootclustid, "bounds": bounds, "tXgXg_list": tXgXg_list, "tXXinv": tXXinv}
+      if order is not None:
+        design["order"] = order
+      self.cache.save(self._cache_key, design)
+
+    N_g = np.diff(bounds)
+    if self._fine_clusters:
+      bootclustid, N_g, tXgXg_list, tXgyg_list, tygyg_list = self._init_multiway(
+        bootclustid, group_dims, group_uniques[0], N_g, tXgXg_list, tXgyg_list, tygyg_list
+      )
+
+    self._init_cross_products(bootclustid, N_g, tXgXg_list, tXgyg_list, tygyg_list, tXXinv)
+
+    if self.multiway:
+      self.clustid = group_uniques[1:]
+      self.G = [len(clustid) for clustid in self.clustid]
+    elif self.subcluster:
+      self.clustid = group_uniques[1]
+      self.G = len(self.clustid)
+    else:
+      self.clustid = self.bootclustid
+      self.G = len(self.clustid)
+
+    self.low_memory = low_memory
+    if low_memory:
+      self.X, self.Y, self.cluster, self.bootcluster = None, None, None, None
+      self.X_list, self.Y_list = None, None
+    else:
+      self.X_list, self.Y_list = X_list, Y_list
+
+    self.peak_nbytes = 0
+    self._track_memory()
+
+  @classmethod
+  def from_chunks(cls, chunks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                  R : Union[np.ndarray, pd.DataFrame],
+                  B: int,
+                  seed:  Union[int, None] = None,
+                  parallel: bool = True,
+                  r: Union[np.ndarray, float] = 0,
+                  joint: bool = False,
+                  profile: Union[bool, Callable[[dict], None]] = False) -> 'WildboottestCL':
+    """Initializes the Wild Cluster Bootstrap Class from an iterable of (X, Y, cluster) chunks,
+    e.g. batches read from parquet or csv files.
+
+    The wild cluster bootstrap only depends on the data through per-cluster cross-products.
+    These are accumulated chunk by chunk, so that peak memory is of order G x k x k (plus
+    one chunk) instead of N x k. Rows of one cluster may be spread across several chunks.
+    As no individual rows are stored, `X`, `Y`, `X_list` and `Y_list` are None, as with `low_memory = True`.
+
+    Args:
+        chunks (Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]]): Tuples of exogeneous variables (n x k),
+            endogenous variable (n) and cluster (n) arrays or pandas objects
+        R (Union[np.ndarray, pd.DataFrame]): Constraint vector of length k or q x k matrix, see `__init__`
+        B (int): bootstrap iterations
+        seed (Union[int, None], optional): Random seed for random weight types. Defaults to None.
+        parallel (bool, optional): Whether to run the bootstrap in parallel. Defaults to True.
+        r (Union[np.ndarray, float], optional): The null value(s) of R @ beta, one per row of R. Defaults to 0.
+        joint (bool, optional): If True, test all q rows of R jointly. Defaults to False.
+        profile (Union[bool, Callable[[dict], None]], optional): Whether to record the `get_*` methods, see `__init__`. Defaults to False.
+
+    Raises:
+        ValueError: Raise if `chunks` is empty
+        TestMatrixNonConformabilityException: Raise if constraint matrix shape does not conform to X
+
+    Returns:
+        WildboottestCL: An object of WildboottestCL, ready for `get_scores`
+    """
+
+    self = cls.__new__(cls)
+    _init_profile(self, profile)
+    self.parallel = parallel
+    self.X, self.Y, self.cluster, self.bootcluster = None, None, None, None
+    self.X_list, self.Y_list = None, None
+
+    bootclustid, N_g, tXgXg_list, tXgyg_list, tygyg_list = _accumulate_cluster_stats(chunks)
+
+    self.k = tXgXg_list.shape[1]
+    self._init_params(R = R, B = B, seed = seed, r = r, joint = joint)
+
+    if self.k != self._R.shape[1]:
+      raise TestMatrixNonConformabilityException("The number of rows in the test matrix R, does not ")
+
+    self._init_cross_products(bootclustid, N_g, tXgXg_list, tXgyg_list, tygyg_list)
+    self.cache = None
+    self.k_fe = 0
+    self.multiway, self.subcluster, self._fine_clusters = False, False, False
+    self.clustid = self.bootclustid
+    self.G = len(self.clustid)
+
+    self.low_memory = True
+    self.peak_nbytes = 0
+    self._track_memory()
+
+    return self
+
+  def _init_params(self, R, B, seed, r, joint, m = 1):
 
     if seed is None:
       seed = np.random.randint(low = 1, high =  (2**32 - 1), size = 1, dtype=np.int64)
 
     self.rng = np.random.default_rng(seed = seed)
 
+    self.B = B
+    self.R, self._R = _restriction_matrix(R)
+    self.r = r
+    self._r = np.broadcast_to(np.asarray(r, dtype = float), (self._R.shape[0],))
+    # the number of hypotheses to test, or of restrictions tested jointly
+    self.q = self._R.shape[0]
+    self.joint = joint
+
+    if joint and m > 1:
+      raise ValueError("Joint hypotheses are only supported for a single outcome.")
+
+    # all tests, one per outcome and hypothesis, are stacked along one axis,
+    # outcome by outcome. _outcome holds the outcome of each test
+    self.m = m
+    self._n_tests = m * self.q
+    self._outcome = np.repeat(np.arange(m), self.q)
+    self._R = np.tile(self._R, (m, 1))
+    self._r = np.tile(self._r, m)
+
+  def _init_cross_products(self, bootclustid, N_g, tXgXg_list, tXgyg_list, tygyg_list, tXXinv = None):
+
+    # everything downstream of the constructor only depends on the data
+    # through these per-(boot)cluster cross-products
+    self.bootclustid = bootclustid
+    self.N_g = N_g
+    self.N = int(np.sum(N_g))
+    self.tXgXg_list = tXgXg_list # G x k x k
+    self.tXgyg_list = tXgyg_list # G x k (G x k x m for m outcomes)
+    self.tygyg_list = tygyg_list # G (G x m)
+    self.tXX = np.sum(self.tXgXg_list, axis = 0)
+    self.tXy = np.sum(self.tXgyg_list, axis = 0)
+    # m x G x k and m x k, with a leading axis for the outcomes
+    self._tXgyg = tXgyg_list[None, :, :] if tXgyg_list.ndim == 2 else np.transpose(tXgyg_list, (2, 0, 1))
+    self._tXy = np.sum(self._tXgyg, axis = 1)
     self.N_G_bootcluster = len(self.bootclustid)
-    self.G  = len(self.clustid)
 
-    self.N = X.shape[0]
-    self.k = X.shape[1]
-    self.B = B
-    self.R = R
-    self.r = 0
+    self.tXXinv = np.linalg.inv(self.tXX) if tXXinv is None else tXXinv
+    self._RtXXinv = self._R @ self.tXXinv
+    self.RtXXinv = self._unstack(self._RtXXinv)
+
+  def _init_multiway(self, fine_id, fine_dims, bootclustid, N_f, tXfXf, tXfyf, tyfyf):
+
+    # keep the cross-products of the intersection ("fine") clusters, and
+    # aggregate them to the bootclusters. fine clusters are sorted by their
+    # bootcluster, so that all aggregations to it are contiguous
+    fine_codes = np.unravel_index(fine_id, fine_dims)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(fine_codes[0])) + 1])
+    self._boot_of_fine = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(fine_id))))
+    self._tXfXf = tXfXf # F x k x k
+    self._tXfyf = tXfyf[None, :, :] if tXfyf.ndim == 2 else np.transpose(tXfyf, (2, 0, 1)) # m x F x k
+
+    # one term per non-empty set of clustering dimensions, clustered by their
+    # intersection, with alternating signs. each holds the order of the fine
+    # clusters sorted by the clusters of the term, and the start of each cluster
+    self._multiway_terms = []
+    D = len(fine_dims) - 1
+    for n_dims in range(1, D + 1):
+      for dims in itertools.combinations(range(1, D + 1), n_dims):
+        codes = np.ravel_multi_index([fine_codes[d] for d in dims], [fine_dims[d] for d in dims])
+        order = np.argsort(codes, kind = "stable")
+        term_starts = np.concatenate([[0], np.flatnonzero(np.diff(codes[order])) + 1])
+        self._multiway_terms.append(((-1)**(n_dims + 1), order, term_starts))
+
+    return (
+      bootclustid[fine_codes[0][starts]],
+      np.add.reduceat(N_f, starts),
+      np.add.reduceat(tXfXf, starts, axis = 0),
+      np.add.reduceat(tXfyf, starts, axis = 0),
+      np.add.reduceat(tyfyf, starts, axis = 0)
+    )
 
-    if self.X.shape[1] != self.R.shape[0]:
-      raise TestMatrixNonConformabilityException("The number of rows in the test matrix R, does not ")
+  def get_memory_usage(self) -> dict:
+    """Get the memory held by the array attributes of the object.
+
+    Memory shared between several attributes (e.g. views) is only counted once, for the
+    first attribute that references it.
+
+    Returns:
+        dict: The number of bytes held per attribute, for all attributes that hold arrays
+    """
 
-    X_list = []
-    y_list = []
-    tXgXg_list = []
-    tXgyg_list = []
-    tXX = np.zeros((self.k, self.k))
-    tXy = np.zeros(self.k)
-
-    #all_cluster = np.unique(bootcluster)
-
-    for g in self.bootclustid:
-
-      # split X and Y by (boot)cluster
-      X_g = self.X[np.where(self.bootcluster == g)]
-      Y_g = self.Y[np.where(self.bootcluster == g)]
-      tXgXg = np.transpose(X_g) @ X_g
-      tXgyg = np.transpose(X_g) @ Y_g
-      X_list.append(X_g)
-      y_list.append(Y_g)
-      tXgXg_list.append(tXgXg)
-      tXgyg_list.append(tXgyg)
-      tXX += tXgXg
-      tXy += tXgyg
-
-    self.X_list = X_list
-    self.Y_list = y_list
-    self.tXgXg_list = tXgXg_list
-    self.tXgyg_list = tXgyg_list
-    self.tXX = tXX
-    self.tXy = tXy
-
-    self.tXXinv = np.linalg.inv(tXX)
-    self.RtXXinv = np.matmul(R, self.tXXinv)
-
-  def get_weights(self, weights_type: Union[str, Callable]) -> Tuple[np.ndarray, int, bool]:
+    usage = {}
+    seen = set()
+    for name, value in vars(self).items():
+      arrays = value if isinstance(value, list) else [value]
+      nbytes = 0
+      for x in arrays:
+        if not isinstance(x, np.ndarray):
+          continue
+        # count the memory owned by the underlying buffer, e.g. all of the
+        # sorted data for the slices in X_list, or the un-broadcast scores
+        while isinstance(x.base, np.ndarray):
+          x = x.base
+        if id(x) not in seen:
+          seen.add(id(x))
+          nbytes += x.nbytes
+      if nbytes > 0:
+        usage[name] = nbytes
+
+    return usage
+
+  def get_profile(self) -> pd.DataFrame:
+    """Get the stage profile recorded with `profile` enabled.
+
+    Each call of the constructor or of a `get_*` method is one stage, in the order of the calls. Stages called
+    within another one (e.g. `get_tstat()` within `get_pvalue_online()`) are part of it. Records are also logged
+    at the DEBUG level by the logger "wildboottest.wildboottest".
+
+    Returns:
+        pd.DataFrame: One row per stage, with its name, wall time (in seconds), the bytes allocated and still
+          held after it ('allocated_bytes') and at its peak ('peak_bytes', None if tracemalloc was already
+          tracing before the stage and cannot reset its peak), and the shapes of the array attributes it set
+    """
+
+    return _profile_frame(self.profile_records)
+
+  def _track_memory(self, transient: int = 0):
+
+    # peak_nbytes: the maximum number of bytes held by the object after any
+    # method call, plus temporary working memory within that call
+    self.peak_nbytes = max(self.peak_nbytes, sum(self.get_memory_usage().values()) + transient)
+
+  @_profiled
+  def get_weights(self, weights_type: Union[str, Callable], lazy: bool = False) -> Tuple[np.ndarray, int, bool]:
     """Function for getting weights for bootstrapping.
 
     Args:
         weights_type (Tuple[str, Callable]): The distribution to be used. Accepts Either 'rademacher', 'mammen', 'norm' or 'webb'. Optionally accepts a callable of one argument, `n`, the number of bootstraps iterations.
+        lazy (bool, optional): If True, the G x B matrix of weights is never materialized. Instead, all methods
+            generate the blocks of columns they consume on the fly, via `wildboottest.weights.weight_blocks`, from
+            per-chunk child seed sequences, so that results do not depend on block sizes. `v` is then None. This only
+            bounds the memory of the weights: `get_numer()` and `get_denom()` each regenerate the whole weight stream
+            and still store their B draws. `get_pvalue_online()` and `get_pvalue_sequential()` are the streaming entry
+            points, which consume each block of weights once and keep no B-length arrays. Defaults to False.
 
     Returns:
         Tuple[np.ndarray, int]: Returns the arrays of weights and the number of bootstrap iterations
@@ -394,16 +1394,26 @@ class WildboottestCL:
       self.full_enumeration = False
       full_enumeration_warn=False
 
-    self.v, self.B = draw_weights(
-      t = self.weights_type,
-      full_enumeration = self.full_enumeration,
-      N_G_bootcluster = self.N_G_bootcluster,
-      boot_iter = self.B,
-      rng=self.rng
-    )
+    if lazy:
+      # root seed sequence of all weight blocks, derived from the random state
+      self._weights_seed_seq = np.random.SeedSequence(self.rng.integers(2**63, size = 4))
+      self.v = None
+      if self.full_enumeration:
+        self.B = 2**self.N_G_bootcluster
+    else:
+      self.v, self.B = draw_weights(
+        t = self.weights_type,
+        full_enumeration = self.full_enumeration,
+        N_G_bootcluster = self.N_G_bootcluster,
+        boot_iter = self.B,
+        rng=self.rng
+      )
+
+    self._track_memory()
 
     return self.v, self.B, full_enumeration_warn
 
+  @_profiled
   def get_scores(self, bootstrap_type : str,
                  impose_null : bool, adj: bool = True,
                  cluster_adj: bool = True) -> np.ndarray:
@@ -416,14 +1426,23 @@ class WildboottestCL:
         cluster_adj (bool, optional): Whether to do a cluster-robust small sample correction. Defaults to True.
 
     Returns:
-        np.ndarray: The output array of scores of shape kxG
+        np.ndarray: The output array of scores of shape kxG (qxkxG for q hypotheses)
     """
 
-    if bootstrap_type[1:2] == '1':
+    if self._fine_clusters:
+      if bootstrap_type[0:2] != '11':
+        raise ValueError(f"Multiway clustering and the subcluster bootstrap are only supported for bootstrap_type '11', but got '{bootstrap_type}'.")
+      self.crv_type = "crv1"
+      # each term of the multiway variance has its own small sample
+      # correction, applied in get_denom() and get_vcov()
+      ssc = (self.N - 1) / (self.N - self.k - self.k_fe) if adj else 1
+      self._multiway_ssc = [ssc * (len(starts) / (len(starts) - 1) if cluster_adj else 1) for _, _, starts in self._multiway_terms]
+      self.ssc = 1
+    elif bootstrap_type[1:2] == '1':
       self.crv_type = "crv1"
       self.ssc = 1
       if adj:
-        self.ssc = self.ssc * (self.N - 1) / (self.N - self.k)
+        self.ssc = self.ssc * (self.N - 1) / (self.N - self.k - self.k_fe)
       if cluster_adj:
         self.ssc = self.ssc * self.G / (self.G - 1)
     elif bootstrap_type[1:2] == '3':
@@ -438,206 +1457,653 @@ class WildboottestCL:
       self.bootstrap_type = "WCU" + bootstrap_type_x
 
     # not needed for all types, but compute anyways
+    self._beta_hat = self._tXy @ self.tXXinv # m x k
     self.beta_hat = self.tXXinv @ self.tXy
 
-    # precompute required objects for computing scores & vcov's
-    if self.bootstrap_type in ["WCR3x"]:
+    # q x k x G
+    self._scores = self._compute_scores(self._r)
+    self.scores_mat = self._unstack(self._scores) # k x G for a single hypothesis
 
-      X = self.X
-      X1 = X[:,self.R == 0]
-      X1_list = []
-      tX1gX1g_list = []
-      tX1gyg_list = []
-      tXgX1g_list = []
-      tX1X1 = np.zeros((self.k-1, self.k-1))
-      tX1y = np.zeros(self.k-1)
+    if self._fine_clusters:
+      self._multiway_forms = self._multiway_quadratic_forms()
+    self._track_memory()
 
-      for ix, g in enumerate(self.bootclustid):
-        #ix = g = 1
-        X1_list.append(X1[np.where(self.bootcluster == g)])
-        tX1gX1g_list.append(np.transpose(X1_list[ix]) @ X1_list[ix])
-        tX1gyg_list.append(np.transpose(X1_list[ix]) @ self.Y_list[ix])
-        tXgX1g_list.append(np.transpose(self.X_list[ix]) @  X1_list[ix])
-        tX1X1 = tX1X1 + tX1gX1g_list[ix]
-        tX1y = tX1y + tX1gyg_list[ix]
+    return self.scores_mat
+
+  def _compute_scores(self, r):
 
-      beta_1g_tilde = []
+    # scores are computed for each test (outcome and row of R) with null
+    # values r: only under WCR, where the null is imposed on the bootstrap
+    # dgp, do they differ across hypotheses. Under WCR, they are affine in r.
+    # all objects that do not depend on the outcomes are computed only once
+    if self.joint and self.bootstrap_type in ["WCR1x", "WCR3x"]:
 
-      for ix, g in enumerate(self.bootclustid):
-        beta_1g_tilde.append(np.linalg.pinv(tX1X1 - tX1gX1g_list[ix]) @ (tX1y - tX1gyg_list[ix]))
+      # impose all q restrictions at once, on the full sample (WCR1x) or on
+      # each leave-one-cluster-out sample (WCR3x). single outcome only
+      if self.bootstrap_type == "WCR1x":
+        tXXinv = self.tXXinv[None, :, :]
+        tXy = self._tXy
+      else:
+        tXXinv = self._inv_tXX_tXgXg()
+        tXy = self._tXy - self._tXgyg[0]
 
-      beta = beta_1g_tilde
-      M = tXgX1g_list
+      beta = (tXXinv @ tXy[:, :, None])[:, :, 0]
+      tXXinvR = tXXinv @ np.transpose(self._R)
+      discrepancy = beta @ np.transpose(self._R) - r
+      beta_tilde = beta - (tXXinvR @ np.linalg.solve(self._R @ tXXinvR, discrepancy[:, :, None]))[:, :, 0]
+      scores = np.transpose(self._tXgyg[0] - (self.tXgXg_list @ beta_tilde[:, :, None])[:, :, 0])[None, :, :]
 
-    elif self.bootstrap_type in ["WCU3x"]:
+    elif self.bootstrap_type in ["WCR3x"]:
 
-      beta_g_hat = []
-      for ix, g in enumerate(self.bootclustid):
-        beta_g_hat.append(np.linalg.pinv(self.tXX - self.tXgXg_list[ix]) @ (self.tXy - self.tXgyg_list[ix]))
+      scores = np.zeros((self.m, self.q, self.k, self.N_G_bootcluster))
+      r = np.reshape(r, (self.m, self.q))
 
-      beta = beta_g_hat
-      M = self.tXgXg_list
+      for iq in range(self.q):
+
+        # impose the null by regressing y - r * X R' on X1 = X[:, R == 0].
+        # cross-products involving X1 are sub-blocks of the per-cluster
+        # cross-products of X, no need to split X1 by cluster
+        ix1 = self._R[iq] == 0
+        tXgyg = self._tXgyg - r[:, iq, None, None] * (self.tXgXg_list @ self._R[iq])[None, :, :] # m x G x k
+        tX1gX1g_list = self.tXgXg_list[:, ix1][:, :, ix1]
+        tX1gyg = tXgyg[:, :, ix1]
+        tXgX1g_list = self.tXgXg_list[:, :, ix1]
+        tX1X1 = np.sum(tX1gX1g_list, axis = 0)
+        tX1y = np.sum(tX1gyg, axis = 1)
+
+        # the leave-one-out inverses are shared by all outcomes
+        X1_list = None if self.X_list is None else [X_g[:, ix1] for X_g in self.X_list]
+        inv_tX1X1_tX1gX1g = self._cached(f"wcr3-{fingerprint(ix1)}", lambda: _leave_one_out_inverses(tX1X1, tX1gX1g_list, X1_list))
+        beta_1g_tilde = np.einsum("gkl,mgl->mgk", inv_tX1X1_tX1gX1g, tX1y[:, None, :] - tX1gyg)
+        scores[:, iq] = np.transpose(tXgyg - np.einsum("gkl,mgl->mgk", tXgX1g_list, beta_1g_tilde), (0, 2, 1))
+
+      scores = np.reshape(scores, (self._n_tests, self.k, self.N_G_bootcluster))
+
+    elif self.bootstrap_type in ["WCU3x"]:
+
+      beta_g_hat = np.einsum("gkl,mgl->mgk", self._inv_tXX_tXgXg(), self._tXy[:, None, :] - self._tXgyg)
+      scores = np.transpose(self._tXgyg - np.einsum("gkl,mgl->mgk", self.tXgXg_list, beta_g_hat), (0, 2, 1))[self._outcome]
 
     elif self.bootstrap_type in ["WCR1x"]:
 
-      A = 1 / (np.transpose(self.R) @ self.tXXinv @ self.R)
-      beta_tilde = self.beta_hat - self.tXXinv @ self.R * A * (self.R @ self.beta_hat - 0)
-      beta = beta_tilde
-      M = self.tXgXg_list
+      beta_tilde = self._beta_1x(r)
+      scores = np.transpose(self._tXgyg, (0, 2, 1))[self._outcome] - np.einsum("gkl,ql->qkg", self.tXgXg_list, beta_tilde)
 
     elif self.bootstrap_type in ["WCU1x"]:
 
-      beta = self.beta_hat
-      M = self.tXgXg_list
+      scores = np.transpose(self._tXgyg - np.einsum("gkl,ml->mgk", self.tXgXg_list, self._beta_hat), (0, 2, 1))[self._outcome]
 
-    # compute scores based on tXgyg, M, beta
-    scores_list = []
+    return np.broadcast_to(scores, (self._n_tests, self.k, self.N_G_bootcluster))
 
-    if(self.bootstrap_type in ["WCR1x", "WCU1x"]):
+  def _beta_1x(self, r):
 
-      for ix, g in enumerate(self.bootclustid):
+    # the estimates of the bootstrap dgp of the "1x" types, one row per test:
+    # restricted to R beta = r (WCR) or not (WCU)
+    beta_hat = self._beta_hat[self._outcome]
+    if self.bootstrap_type == "WCU1x":
+      return beta_hat
 
-        scores_list.append(self.tXgyg_list[ix] - M[ix] @ beta)
+    A = 1 / np.sum(self._RtXXinv * self._R, axis = 1)
+    return beta_hat - self._RtXXinv * (A * (np.sum(self._R * beta_hat, axis = 1) - r))[:, None]
 
-    elif(self.bootstrap_type in ["WCR3x", "WCU3x"]):
+  def _inv_tXX_tXgXg(self):
 
-      for ix, g in enumerate(self.bootclustid):
+    # leave-one-cluster-out inverses, stacked as a G x k x k tensor. computed
+    # once and shared by the scores (3x types), get_denom and get_vcov (CRV3),
+    # for all outcomes and hypotheses
+    if not hasattr(self, "inv_tXX_tXgXg"):
+      self.inv_tXX_tXgXg = self._cached("loo", lambda: _leave_one_out_inverses(self.tXX, self.tXgXg_list, self.X_list))
+    return self.inv_tXX_tXgXg
 
-        scores_list.append(self.tXgyg_list[ix] - M[ix] @ beta[ix])
+  def _cached(self, tag, compute):
 
-    self.scores_mat = np.transpose(np.array(scores_list)) # k x G
+    # load a design-level array from the cache, or compute and store it.
+    # tags distinguish the arrays stored for the same X and bootcluster
+    if self.cache is None:
+      return compute()
 
-    return self.scores_mat
+    key = f"{self._cache_key}-{tag}"
+    arrays = self.cache.load(key)
+    if arrays is not None:
+      return arrays["x"]
 
+    x = compute()
+    self.cache.save(key, {"x": x})
+    return x
 
-  def get_numer(self):
+  def _unstack(self, x):
+
+    # results are stacked along a leading axis of length m x q, one per
+    # outcome and row of R. for a single outcome (Y a vector) and a single
+    # hypothesis (R a vector), drop the respective axis
+    x = np.reshape(x, (self.m, self.q) + np.shape(x)[1:])
+    if self.R.ndim == 1:
+      x = x[:, 0]
+    if self.tXgyg_list.ndim == 2:
+      x = x[0]
+    return x
+
+  @_profiled
+  def get_numer(self, max_memory: int = DEFAULT_MAX_MEMORY):
       # Calculate the bootstrap numerator
-      self.Cg = self.R @ self.tXXinv @ self.scores_mat
-      self.numer = self.Cg @ self.v
+      self._Cg = np.einsum("qk,qkg->qg", self._RtXXinv, self._scores)
+      self._numer = np.zeros((self._n_tests, self.B))
+      for start, v in self._weight_blocks(self._block_size(max_memory), symmetric = True):
+        self._numer[:, start:start + v.shape[1]] = self._Cg @ v
+      self._mirror(self._numer, sign = -1)
+      self.Cg = self._unstack(self._Cg)
+      self.numer = self._unstack(self._numer)
+      self._track_memory()
 
-  def get_denom(self):
+  @_profiled
+  def get_denom(self, backend: str = "blas", max_memory: int = DEFAULT_MAX_MEMORY):
+      """Compute the bootstrap denominators.
 
-      if self.crv_type == "crv1":
+      For both CRV1 and CRV3, the bootstrap variance of each draw is a quadratic form in the
+      bootstrap weights, `ssc * sum((C[:,None] * v - H @ v)**2, axis = 0)`, with a G-vector C
+      and a G x G matrix H that do not depend on the weights.
 
-        H = np.zeros((self.G, self.G))
+      Args:
+          backend (str, optional): How to evaluate the quadratic form. For "blas" (default),
+            it is computed via matrix products over blocks of bootstrap draws. For "numba",
+            a numba kernel loops over all bootstrap iterations and clusters in parallel. The kernel
+            is compiled once per process, see `wildboottest.kernels.warmup()`.
+          max_memory (int, optional): Upper bound (in bytes) on the memory used by the G x b
+            arrays of a single block of draws for the "blas" backend. Defaults to 1 GiB.
+      """
 
-        # numba optimization possible?
-        for ixg, g in enumerate(self.bootclustid):
-          for ixh, h in enumerate(self.bootclustid):
-            # can be improved by replacing list calls with matrices;
-            H[ixg,ixh] = self.R @ self.tXXinv @ self.tXgXg_list[ixg] @ self.tXXinv @ self.scores_mat[:,ixh]
+      if self._fine_clusters:
 
-        # now compute denominator
-        # numba / cython / c++ optimization possible? Porting this part from
-        # R to c++ gives good speed improvements
-        @njit(parallel = self.parallel)
-        def compute_denom(Cg, H, bootclustid, B, G, v, ssc):
+        if backend != "blas":
+          raise ValueError("For multiway clustering and the subcluster bootstrap, only the 'blas' backend is supported.")
 
-          denom = np.zeros(B)
+        self._denom = np.zeros((self._n_tests, self.B))
+        block_size = self._block_size(max_memory)
+        for start, v in self._weight_blocks(block_size, symmetric = True):
+          self._denom[:, start:start + v.shape[1]] = self._multiway_denom(v)
+        self._mirror(self._denom)
 
-          for b in prange(B):
-            Zg = np.zeros(G)
-            for ixg, g in enumerate(bootclustid):
-              vH = 0
-              for ixh, h in enumerate(bootclustid):
-                vH += v[ixh,b] * H[ixg,ixh]
-              Zg[ixg] = Cg[ixg] * v[ixg,b] - vH
+        self.denom = self._unstack(self._denom)
+        self._track_memory(transient = _CL_ARRAYS_PER_BLOCK * 8 * self._n_tests * len(self._boot_of_fine) * block_size)
+        return
 
-            # todo: ssc
-            denom[b] = ssc * np.sum(np.power(Zg,2))
+      C, H = self._quadratic_form(self._scores, self._Cg)
+      self._H = H
 
-          return denom
+      if self.joint:
 
-        self.denom = compute_denom(self.Cg, H, self.bootclustid, self.B, self.G, self.v, self.ssc)
+        if backend != "blas":
+          raise ValueError("For joint hypotheses, only the 'blas' backend is supported.")
 
-      elif self.crv_type == "crv3":
+        # bootstrap covariance matrices of R @ beta, B x q x q
+        self._denom = np.zeros((self.B, self.q, self.q))
+        block_size = self._block_size(max_memory)
+
+        for start, v in self._weight_blocks(block_size, symmetric = True):
+          Z = C[:, :, None] * v[None, :, :] - H @ v
+          self._denom[start:start + v.shape[1]] = self.ssc * np.einsum("igb,jgb->bij", Z, Z)
+        self._mirror(np.moveaxis(self._denom, 0, -1))
+
+        self.H = self._H
+        self.denom = self._denom
+        self._track_memory(transient = _CL_ARRAYS_PER_BLOCK * 8 * self._n_tests * self.N_G_bootcluster * block_size)
+        return
+
+      transient = 0
+
+      if backend == "blas":
+
+        self._denom = np.zeros((self._n_tests, self.B))
+        block_size = self._block_size(max_memory)
+        transient = _CL_ARRAYS_PER_BLOCK * 8 * self._n_tests * self.N_G_bootcluster * block_size
+
+        for start, v in self._weight_blocks(block_size, symmetric = True):
+          self._denom[:, start:start + v.shape[1]] = self.ssc * np.sum(np.power(C[:, :, None] * v[None, :, :] - H @ v, 2), axis = 1)
+
+      elif backend == "numba":
+
+        self._denom = np.zeros((self._n_tests, self.B))
+        for start, v in self._weight_blocks(self._block_size(max_memory), symmetric = True):
+          self._denom[:, start:start + v.shape[1]] = [compute_denom(C[iq], H[iq], v, self.ssc, parallel = self.parallel) for iq in range(self._n_tests)]
+
+      else:
+        raise ValueError(f"backend must be either 'blas' or 'numba', but got '{backend}'.")
+
+      self._mirror(self._denom)
 
-        self.inv_tXX_tXgXg = []
-        for ix, g in enumerate(self.bootclustid):
-          self.inv_tXX_tXgXg.append(np.linalg.pinv(self.tXX - self.tXgXg_list[ix]))
+      self.H = self._unstack(self._H)
+      self.denom = self._unstack(self._denom)
+      self._track_memory(transient = transient)
 
-        self.denom = np.zeros(self.B)
+  def _quadratic_form(self, scores, Cg):
 
-        for b in prange(self.B):
+      # C and H of the quadratic form of the bootstrap denominator. Both are
+      # linear in the scores
+      if self.crv_type == "crv1":
+
+        # H[g,h] = R (X'X)^{-1} X_g'X_g (X'X)^{-1} scores_h, formed in one contraction
+        RtXXinv_tXgXg = np.einsum("qj,gjl->qgl", self._RtXXinv, self.tXgXg_list)
+        H = RtXXinv_tXgXg @ self.tXXinv @ scores
+        C = Cg
+
+      elif self.crv_type == "crv3":
 
-          scores_g_boot = np.zeros((self.G, self.k))
-          v_ = self.v[:,b]
+        # the leave-one-cluster-out delta for cluster g and draw b is
+        # R (X'X - X_g'X_g)^{-1} (S v_b - s_g v_gb) - R (X'X)^{-1} S v_b,
+        # i.e. (M v_b)_g - M_gg v_gb - Cg' v_b with M = R (X'X - X_g'X_g)^{-1} S
+        M = np.einsum("qj,gjl->qgl", self._R, self._inv_tXX_tXgXg()) @ scores
+        H = M - Cg[:, None, :]
+        C = np.ascontiguousarray(np.diagonal(M, axis1 = 1, axis2 = 2))
+
+      return C, H
+
+  def _multiway_quadratic_forms(self):
+
+      # the bootstrap scores of cluster c of a term, times R (X'X)^{-1}, are
+      # Z_c = sum_{f in c} a_f v_h(f) - P_c S v, with a_f = R (X'X)^{-1} s_f
+      # for the scores s_f of the fine clusters f, h(f) their bootcluster,
+      # P_c = R (X'X)^{-1} X_c'X_c (X'X)^{-1} and S the scores of the
+      # bootclusters. for each term, choose the cheapest way to evaluate
+      # sum_c Z_c^2 for a block of draws:
+      # - "nested": each cluster lies within one bootcluster. expanding the
+      #   square, only G-vectors and k x k matrices per bootcluster remain
+      # - "dense": Z = A v - P S v with a dense G_c x G matrix A, if it is
+      #   not much larger than the number of fine clusters F
+      # - "fine": segment sums of a_f v_h(f) over the fine clusters, e.g.
+      #   for the subcluster bootstrap, where A is a sparse map from the
+      #   bootclusters to the clusters
+      fine_scores = np.transpose(self._tXfyf, (0, 2, 1))[self._outcome] - np.einsum("fkl,ql->qkf", self._tXfXf, self._beta_1x(self._r))
+      a = np.einsum("qk,qkf->qf", self._RtXXinv, fine_scores)
+      F, G = len(self._boot_of_fine), self.N_G_bootcluster
+
+      forms = []
+      for (sign, order, starts), ssc in zip(self._multiway_terms, self._multiway_ssc):
+
+        P = np.einsum("qk,ckl->qcl", self._RtXXinv, np.add.reduceat(self._tXfXf[order], starts, axis = 0)) @ self.tXXinv
+        boot = self._boot_of_fine[order]
+        cluster = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, F)))
+
+        if np.all(boot[starts] == boot[np.append(starts[1:], F) - 1]):
+          a_c = np.add.reduceat(a[:, order], starts, axis = 1)
+          d = np.zeros((self._n_tests, G))
+          e = np.zeros((self._n_tests, G, self.k))
+          np.add.at(d, (slice(None), boot[starts]), a_c**2)
+          np.add.at(e, (slice(None), boot[starts]), a_c[:, :, None] * P)
+          M = np.einsum("qck,qcl->qkl", P, P)
+          forms.append(("nested", sign * ssc, (d, np.transpose(e, (0, 2, 1)), M)))
+        elif len(starts) * G <= 4 * F:
+          A = np.zeros((self._n_tests, len(starts), G))
+          np.add.at(A, (slice(None), cluster, boot), a[:, order])
+          forms.append(("dense", sign * ssc, (A, P)))
+        else:
+          forms.append(("fine", sign * ssc, (a[:, order], boot, starts, P)))
 
-          for ixg, g in enumerate(self.bootclustid):
+      return forms
 
-            scores_g_boot[ixg,:] = self.scores_mat[:,ixg] * v_[ixg]
+  def _multiway_denom(self, v):
 
-          scores_boot = np.sum(scores_g_boot, axis = 0)
-          delta_b_star = self.tXXinv @ scores_boot
+      # bootstrap variances as the signed sum over all terms of the sums of
+      # squared bootstrap scores of their clusters
+      Sv = self._scores @ v
+      denom = np.zeros((self._n_tests, v.shape[1]))
 
-          delta_diff = np.zeros((self.G, self.k))
+      for kind, weight, form in self._multiway_forms:
+        if kind == "nested":
+          d, eT, M = form
+          denom += weight * (d @ v**2 - 2 * np.sum((eT @ v) * Sv, axis = 1) + np.sum(Sv * (M @ Sv), axis = 1))
+          continue
+        if kind == "dense":
+          A, P = form
+          Z = A @ v - P @ Sv
+        else:
+          a, boot, starts, P = form
+          Z = np.add.reduceat(a[:, :, None] * v[boot][None, :, :], starts, axis = 1) - P @ Sv
+        denom += weight * np.sum(Z * Z, axis = 1)
+
+      # the signed sum is not positive for every draw (Cameron, Gelbach &
+      # Miller, 2011). such draws get a NaN variance, and thus a NaN
+      # t-statistic, and are counted apart in the p-values
+      negative = denom < 0
+      if np.any(negative):
+        warnings.warn("Some bootstrap variances of the multiway clustered variance are negative: their t-statistics are set to NaN and left out of the p-values, see `pvalue_counts.n_nan`.")
+        denom[negative] = np.nan
+
+      return denom
+
+  def _weight_blocks(self, block_size, symmetric = False):
+
+      # iterate over blocks of bootstrap weights as float64 arrays. weights may
+      # be stored compactly (e.g. int8 rademacher signs) or not at all (lazy
+      # weights); only one G x b block is ever expanded to float64.
+      # with symmetric = True, only the first half of a full enumeration is
+      # visited, see _mirror()
+      B = self.B // 2 if symmetric and self.full_enumeration else self.B
+      if self.v is None:
+        blocks = weight_blocks(
+          t = self.weights_type,
+          full_enumeration = self.full_enumeration,
+          N_G_bootcluster = self.N_G_bootcluster,
+          boot_iter = B,
+          block_size = block_size,
+          seed_seq = self._weights_seed_seq
+        )
+      else:
+        blocks = ((start, self.v[:, start:min(start + block_size, B)]) for start in range(0, B, block_size))
 
-          for ixg, g in enumerate(self.bootclustid):
+      for start, v in blocks:
+        yield start, np.asarray(v, dtype = np.float64)
 
-            score_diff = scores_boot - scores_g_boot[ixg,:]
-            delta_diff[ixg,:] = (
+  def _mirror(self, x, sign = 1):
 
-              (self.inv_tXX_tXgXg[ixg] @ score_diff - delta_b_star)**2
+      # in a full enumeration of rademacher weights, draw B - 1 - b is -v_b.
+      # numerators are odd and denominators even in v, so their values for the
+      # second half of the draws, along the last axis, follow from the first
+      if self.full_enumeration:
+        half = self.B // 2
+        x[..., half:] = sign * x[..., half - 1::-1]
 
-              )
-          # se's
-          self.denom[b] = self.ssc * np.sum(delta_diff, axis = 0)[np.where(self.R == 1)]
+  def _block_size(self, max_memory):
 
+      # number of bootstrap draws per block so that the q x G x b arrays
+      # of a block (q x F x b for F fine clusters) stay below max_memory bytes
+      G = len(self._boot_of_fine) if self._fine_clusters else self.N_G_bootcluster
+      return max(1, int(max_memory // (_CL_ARRAYS_PER_BLOCK * 8 * self._n_tests * G)))
 
+  @_profiled
   def get_tboot(self):
 
-      self.t_boot = self.numer / np.sqrt(self.denom)
+      if self.joint:
+        # bootstrap Wald statistics, via batched q x q solves over all draws
+        numer = np.transpose(self._numer)
+        self.t_boot = np.sum(numer * np.linalg.solve(self._denom, numer[:, :, None])[:, :, 0], axis = 1)
+        self._t_boot = self.t_boot[None, :]
+        self._track_memory()
+        return
 
+      self._t_boot = self._numer / np.sqrt(self._denom)
+      self.t_boot = self._unstack(self._t_boot)
+      self._track_memory()
+
+  @_profiled
   def get_vcov(self):
 
-    if self.crv_type == "crv1":
+    # the cluster-robust vcov is computed from the per-cluster cross-products
+    # only, so that it is also available if no individual rows are stored.
+    # m x k x k, one per outcome
+    if self._fine_clusters:
 
-      meat = np.zeros((self.k,self.k))
-      for ixg, g in enumerate(self.bootclustid):
-        score = np.transpose(self.X_list[ixg]) @ (self.Y_list[ixg] - self.X_list[ixg] @ self.beta_hat)
-        meat += np.outer(score, score)
+      # signed sum of the meats of all terms, including their small sample
+      # corrections, from the scores of the fine clusters
+      scores = self._tXfyf - np.einsum("fkl,ml->mfk", self._tXfXf, self._beta_hat) # m x F x k
+      meat = 0
+      for (sign, order, starts), ssc in zip(self._multiway_terms, self._multiway_ssc):
+        scores_c = np.add.reduceat(scores[:, order], starts, axis = 1)
+        meat = meat + sign * ssc * np.einsum("mck,mcl->mkl", scores_c, scores_c)
 
-      self.vcov = self.tXXinv @ meat @ self.tXXinv
+      self._vcov = self.tXXinv @ meat @ self.tXXinv
 
-    elif self.crv_type == "crv3":
+      # the signed sum need not be positive semi-definite. as in Cameron,
+      # Gelbach & Miller (2011), set its negative eigenvalues to zero
+      eigval, eigvec = np.linalg.eigh(self._vcov)
+      if np.any(eigval < -_SPD_RCOND * np.max(np.abs(eigval), axis = 1, keepdims = True)):
+        warnings.warn("The multiway clustered variance is not positive semi-definite: its negative eigenvalues are set to zero.")
+        self._vcov = (eigvec * np.maximum(eigval, 0)[:, None, :]) @ np.transpose(eigvec, (0, 2, 1))
 
-      # calculate leave-one out beta hat
-      beta_jack = np.zeros((self.G, self.k))
-      for ixg, g in enumerate(self.bootclustid):
-        beta_jack[ixg,:] = (
-          np.linalg.pinv(self.tXX - self.tXgXg_list[ixg]) @ (self.tXy - np.transpose(self.X_list[ixg]) @ self.Y_list[ixg])
-        )
+    elif self.crv_type == "crv1":
 
-      if not hasattr(self, "beta_hat"):
-        beta_hat = self.tXXinv @ self.tXy
+      scores = self._tXgyg - np.einsum("gkl,ml->mgk", self.tXgXg_list, self._beta_hat) # m x G x k
+      meat = np.einsum("mgk,mgl->mkl", scores, scores)
 
-      beta_center = self.beta_hat
+      self._vcov = self.tXXinv @ meat @ self.tXXinv
 
-      vcov3 = np.zeros((self.k, self.k))
-      for ixg, g in enumerate(self.bootclustid):
-        beta_centered = beta_jack[ixg,:] - beta_center
-        vcov3 += np.outer(beta_centered, beta_centered)
+    elif self.crv_type == "crv3":
+
+      # calculate leave-one out beta hat
+      beta_jack = np.einsum("gkl,mgl->mgk", self._inv_tXX_tXgXg(), self._tXy[:, None, :] - self._tXgyg)
 
-      self.vcov =  vcov3
+      beta_centered = beta_jack - self._beta_hat[:, None, :]
 
+      self._vcov = np.einsum("mgk,mgl->mkl", beta_centered, beta_centered)
 
+    self.vcov = self._vcov[0] if self.tXgyg_list.ndim == 2 else self._vcov
+    self._track_memory()
+
+  @_profiled
   def get_tstat(self):
 
-    se = np.sqrt(self.ssc * self.R @ self.vcov @ np.transpose(self.R))
-    self.t_stat = (np.transpose(self.R) @ self.beta_hat - self.r )/ se
+    if self.joint:
+      # Wald statistic
+      discrepancy = self._R @ self._beta_hat[0] - self._r
+      vcov = self.ssc * self._R @ self._vcov[0] @ np.transpose(self._R)
+      self.t_stat = discrepancy @ np.linalg.solve(vcov, discrepancy)
+      self._t_stat = np.array([self.t_stat])
+      return
+
+    se = np.sqrt(self.ssc * np.einsum("qk,qkl,ql->q", self._R, self._vcov[self._outcome], self._R))
+    self._t_stat = (np.sum(self._R * self._beta_hat[self._outcome], axis = 1) - self._r) / se
+    self.t_stat = self._unstack(self._t_stat)
 
+  @_profiled
   def get_pvalue(self, pval_type = "two-tailed"):
 
-    if pval_type == "two-tailed":
-      self.pvalue = np.mean(np.abs(self.t_stat) < abs(self.t_boot))
-    elif pval_type == "equal-tailed":
-      pl = np.mean(self.t_stat < self.t_boot)
-      ph = np.mean(self.t_stat > self.t_boot)
-      self.pvalue = 2 * min(pl, ph)
-    elif pval_type == ">":
+    if self.joint:
+      # Wald tests reject for large values only
       self.pvalue = np.mean(self.t_stat < self.t_boot)
+      return
+
+    self.pvalue_counts = _PvalueCounts(self._t_stat)
+    self.pvalue_counts.update(self._t_boot)
+    self.pvalue = self._unstack(self.pvalue_counts.pvalue(pval_type))
+
+  @_profiled
+  def get_pvalue_online(self, pval_type: str = "two-tailed", backend: str = "blas",
+                        max_memory: int = DEFAULT_MAX_MEMORY, sample_size: int = 0):
+    """Compute the t-statistic and the bootstrap p-value without storing all bootstrap t-statistics.
+
+    Replaces `get_numer()`, `get_denom()`, `get_tboot()`, `get_vcov()`, `get_tstat()` and `get_pvalue()`.
+    For each block of bootstrap weights, numerators, denominators and t-statistics are computed and compared
+    with the t-statistic right away. Only the counts for all p-value types are kept (in `pvalue_counts`). With
+    lazy weights (`get_weights(lazy = True)`), memory then does not grow with B. P-values are identical to
+    those of `get_pvalue()`.
+
+    Args:
+        pval_type (str, optional): Type of p-value. One of "two-tailed", "equal-tailed", ">" and "<".
+          Ignored for joint hypotheses, for which the Wald test rejects for large values only. Defaults to "two-tailed".
+        backend (str, optional): How to evaluate the bootstrap denominators, see `get_denom()`. Defaults to "blas".
+        max_memory (int, optional): Upper bound (in bytes) on the memory used by the arrays of a single block
+          of draws. Defaults to 1 GiB.
+        sample_size (int, optional): The number of bootstrap t-statistics to keep for diagnostics in
+          `t_boot_sample`. As bootstrap draws are iid, the first `sample_size` draws are kept. Defaults to 0.
+    """
+
+    if backend not in ["blas", "numba"] or (self.joint and backend != "blas"):
+      raise ValueError(f"backend must be either 'blas' or 'numba' ('blas' for joint hypotheses), but got '{backend}'.")
+
+    self.get_vcov()
+    self.get_tstat()
+
+    blocks = self._tboot_blocks(backend, max_memory)
+    self.pvalue_counts, self._t_boot_sample = _accumulate_pvalue_counts(self._t_stat, blocks, sample_size)
+
+    if self.joint:
+      self.t_boot_sample = self._t_boot_sample[0]
+      self.pvalue = self.pvalue_counts.pvalue(">")[0]
+    else:
+      self.t_boot_sample = self._unstack(self._t_boot_sample)
+      self.pvalue = self._unstack(self.pvalue_counts.pvalue(pval_type))
+
+    self._track_memory(transient = _CL_ARRAYS_PER_BLOCK * 8 * self._n_tests * self.N_G_bootcluster * self._block_size(max_memory))
+
+  @_profiled
+  def get_pvalue_sequential(self, levels: Union[float, Tuple[float, ...]] = (0.01, 0.05), pval_type: str = "two-tailed",
+                            error: float = 0.001, block_size: int = 100, backend: str = "blas",
+                            max_memory: int = DEFAULT_MAX_MEMORY) -> int:
+    """Compute the t-statistic and the bootstrap p-value, stopping early once the test decisions are settled.
+
+    Replaces `get_numer()`, `get_denom()`, `get_tboot()`, `get_vcov()`, `get_tstat()` and `get_pvalue()`.
+    Bootstrap draws are made in blocks of `block_size`, and p-value counts are accumulated online as in
+    `get_pvalue_online()`. After each block, the bootstrap stops if, for all hypotheses and all `levels`, the
+    p-value estimated from the n draws so far is significantly different from the level, i.e. if
+    `|p - level| > z * sqrt(level * (1 - level) / n)` with `z` the `1 - error / (2 * n_checks)` standard normal
+    quantile, for the at most `n_checks = ceil(B / block_size)` checks. Otherwise, it continues up to B draws.
+    By this Bonferroni correction over all checks, for each hypothesis and level, the probability that the
+    bootstrap stops early with its p-value on the other side of the level than the p-value of infinitely many
+    draws is at most `error` (up to the normal approximation of the p-value counts). Use lazy weights (`get_weights(lazy = True)`) so that no weights are
+    drawn beyond the draws used. For full enumeration, all draws are used, as they are not in random order.
+
+    Args:
+        levels (Union[float, Tuple[float, ...]], optional): The significance level(s) of the test decisions. Defaults to (0.01, 0.05).
+        pval_type (str, optional): Type of p-value. One of "two-tailed", "equal-tailed", ">" and "<".
+          Ignored for joint hypotheses. Defaults to "two-tailed".
+        error (float, optional): The probability, over all stopping checks, that the bootstrap stops on the wrong side of a level. Defaults to 0.001.
+        block_size (int, optional): The number of draws between two stopping checks. Defaults to 100.
+        backend (str, optional): How to evaluate the bootstrap denominators, see `get_denom()`. Defaults to "blas".
+        max_memory (int, optional): Upper bound (in bytes) on the memory used by the arrays of a single block
+          of draws. Defaults to 1 GiB.
+
+    Returns:
+        int: The number of bootstrap draws used, also stored in `B_used`
+    """
+
+    if backend not in ["blas", "numba"] or (self.joint and backend != "blas"):
+      raise ValueError(f"backend must be either 'blas' or 'numba' ('blas' for joint hypotheses), but got '{backend}'.")
+
+    self.get_vcov()
+    self.get_tstat()
+
+    if self.joint:
+      pval_type = ">"
+    # no early stopping for full enumeration
+    levels = [] if self.full_enumeration else levels
+
+    block_size = min(block_size, self._block_size(max_memory))
+    blocks = self._tboot_blocks(backend, max_memory, block_size = block_size)
+    n_checks = -(-self.B // block_size)
+    self.pvalue_counts = _accumulate_pvalue_sequential(self._t_stat, blocks, pval_type, levels, error, n_checks)
+    self.B_used = self.pvalue_counts.n
+
+    if self.joint:
+      self.pvalue = self.pvalue_counts.pvalue(">")[0]
     else:
-      self.pvalue = np.mean(self.t_stat > self.t_boot)
+      self.pvalue = self._unstack(self.pvalue_counts.pvalue(pval_type))
+
+    return self.B_used
+
+  def _tboot_blocks(self, backend, max_memory, block_size = None):
+
+    # bootstrap t-statistics (Wald statistics for joint hypotheses), q x b,
+    # block by block, from the same quadratic form as in get_denom()
+    Cg = np.einsum("qk,qkg->qg", self._RtXXinv, self._scores)
+    if not self._fine_clusters:
+      C, H = self._quadratic_form(self._scores, Cg)
+
+    if block_size is None:
+      block_size = self._block_size(max_memory)
+    else:
+      block_size = min(block_size, self._block_size(max_memory))
+
+    def t_boot(v):
+
+      numer = Cg @ v
+
+      if self._fine_clusters:
+        return numer / np.sqrt(self._multiway_denom(v))
+
+      if backend == "numba":
+        denom = np.array([compute_denom(C[iq], H[iq], v, self.ssc, parallel = self.parallel) for iq in range(self._n_tests)])
+        return numer / np.sqrt(denom)
+
+      Z = C[:, :, None] * v[None, :, :] - H @ v
+
+      if self.joint:
+        denom = self.ssc * np.einsum("igb,jgb->bij", Z, Z)
+        numer = np.transpose(numer)
+        return np.sum(numer * np.linalg.solve(denom, numer[:, :, None])[:, :, 0], axis = 1)[None, :]
+
+      return numer / np.sqrt(self.ssc * np.sum(Z * Z, axis = 1))
+
+    for start, v in self._weight_blocks(block_size, symmetric = True):
+
+      t = t_boot(v)
+      yield start, t
+
+      # the mirrored draws -v of a full enumeration: t-statistics change
+      # sign, Wald statistics do not
+      if self.full_enumeration:
+        yield self.B - start - v.shape[1], (1 if self.joint else -1) * t[:, ::-1]
+
+  @_profiled
+  def get_confint(self, alpha: float = 0.05, pval_type: str = "two-tailed",
+                  max_memory: int = DEFAULT_MAX_MEMORY, tol: float = 1e-6,
+                  maxiter: int = 100) -> np.ndarray:
+    """Compute bootstrap confidence intervals by test inversion.
+
+    The confidence interval collects all null values r for which the bootstrap test does
+    not reject at level alpha. Its bounds are found by bisection on the bootstrap p-value
+    as a function of r. Scores are affine in r, hence so are Cg and H: the bootstrap
+    numerators are affine and the bootstrap denominators quadratic in r. Their coefficients
+    are computed once from the weights matrix, after which each candidate r costs O(B).
+    Requires `get_scores()`, `get_weights()` and `get_vcov()` to have been run.
+
+    Args:
+        alpha (float, optional): The significance level. Defaults to 0.05.
+        pval_type (str, optional): Either "two-tailed" or "equal-tailed". Defaults to "two-tailed".
+        max_memory (int, optional): Upper bound (in bytes) on the memory used by the G x b
+          arrays of a single block of draws. Defaults to 1 GiB.
+        tol (float, optional): Tolerance of the bisection, relative to the standard error. Defaults to 1e-6.
+        maxiter (int, optional): Maximum number of bracketing and bisection steps. Defaults to 100.
+
+    Returns:
+        np.ndarray: The lower and upper bound of the confidence interval (q x 2 for q hypotheses)
+    """
+
+    if pval_type not in ["two-tailed", "equal-tailed"]:
+      raise ValueError(f"pval_type must be either 'two-tailed' or 'equal-tailed', but got '{pval_type}'.")
+    if self.joint:
+      raise ValueError("Confidence intervals are not supported for joint hypotheses.")
+    if self._fine_clusters:
+      raise ValueError("Confidence intervals are not supported for multiway clustering or the subcluster bootstrap.")
+
+    # scores, and all objects linear in them, at r = 0 and their slope in r
+    scores_0 = self._compute_scores(np.zeros(self._n_tests))
+    scores_1 = self._compute_scores(np.ones(self._n_tests)) - scores_0
+    Cg_0 = np.einsum("qk,qkg->qg", self._RtXXinv, scores_0)
+    Cg_1 = np.einsum("qk,qkg->qg", self._RtXXinv, scores_1)
+    C_0, H_0 = self._quadratic_form(scores_0, Cg_0)
+    C_1, H_1 = self._quadratic_form(scores_1, Cg_1)
+
+    numer_0 = np.zeros((self._n_tests, self.B))
+    numer_1 = np.zeros((self._n_tests, self.B))
+    denom_0 = np.zeros((self._n_tests, self.B))
+    denom_1 = np.zeros((self._n_tests, self.B))
+    denom_2 = np.zeros((self._n_tests, self.B))
+    block_size = self._block_size(max_memory // 2)
+
+    for start, v in self._weight_blocks(block_size, symmetric = True):
+      numer_0[:, start:start + v.shape[1]] = Cg_0 @ v
+      numer_1[:, start:start + v.shape[1]] = Cg_1 @ v
+      Z_0 = C_0[:, :, None] * v[None, :, :] - H_0 @ v
+      Z_1 = C_1[:, :, None] * v[None, :, :] - H_1 @ v
+      denom_0[:, start:start + v.shape[1]] = self.ssc * np.sum(Z_0 * Z_0, axis = 1)
+      denom_1[:, start:start + v.shape[1]] = self.ssc * np.sum(Z_0 * Z_1, axis = 1)
+      denom_2[:, start:start + v.shape[1]] = self.ssc * np.sum(Z_1 * Z_1, axis = 1)
+
+    for x, sign in [(numer_0, -1), (numer_1, -1), (denom_0, 1), (denom_1, 1), (denom_2, 1)]:
+      self._mirror(x, sign = sign)
+
+    estimate = np.sum(self._R * self._beta_hat[self._outcome], axis = 1)
+    se = np.sqrt(self.ssc * np.einsum("qk,qkl,ql->q", self._R, self._vcov[self._outcome], self._R))
+
+    def pvalue_fun(r):
+      t_stat = (estimate - r) / se
+      r = r[:, None]
+      t_boot = (numer_0 + r * numer_1) / np.sqrt(denom_0 + 2 * r * denom_1 + r**2 * denom_2)
+      return _get_pvalue(t_stat, t_boot, pval_type)
+
+    self._confint = _confint_by_inversion(pvalue_fun, estimate, se, alpha, tol, maxiter)
+    self.confint = self._unstack(self._confint)
+
+    return self.confint
 
 
 def wildboottest(model : 'OLS',
@@ -651,6 +2117,9 @@ def wildboottest(model : 'OLS',
                  adj: bool = True,
                  cluster_adj: bool = True,
                  parallel: bool = True,
+                 cache: Union[str, os.PathLike, DesignCache, None] = None,
+                 fe: Union[np.ndarray, pd.Series, pd.DataFrame, None] = None,
+                 profile: Union[bool, Callable[[dict], None]] = False,
                  show=True) -> pd.DataFrame:
   """Run a wild cluster bootstrap based on an object of class 'statsmodels.regression.linear_model.OLS'
 
@@ -670,10 +2139,19 @@ def wildboottest(model : 'OLS',
       adj (bool, optional): Whether to adjust for small sample. Defaults to True.
       cluster_adj (bool, optional): Whether to do a cluster-robust small sample correction. Defaults to True.
       parallel (bool, optional): Whether to run the bootstrap in parallel. Defaults to True.
+      cache (Union[str, os.PathLike, DesignCache, None], optional): A `wildboottest.cache.DesignCache`, or the path of its
+           directory, for design-level precomputations of the wild cluster bootstrap. Defaults to None (no caching).
+      fe (Union[np.ndarray, pd.Series, pd.DataFrame, None], optional): One or more fixed-effect factors to partial out of
+           the model before bootstrapping, see `WildboottestCL`. Constant columns of the model (e.g. the intercept) are
+           absorbed by the fixed effects, and dropped. Requires `cluster`. Defaults to None.
+      profile (Union[bool, Callable[[dict], None]], optional): Whether to profile the stages of the bootstrap, see
+           `WildboottestCL.get_profile()`. If True, stage records are logged at the DEBUG level by the logger
+           "wildboottest.wildboottest"; a callable also receives each record. Defaults to False.
       show (bool, optional): Whether to print the results. Defaults to True.
 
   Raises:
       Exception: Raises if `param` is not a string
+      ValueError: Raises if `fe` is provided without `cluster`, or if `param` is absorbed by `fe`
 
   Returns:
       pd.DataFrame: A wild cluster bootstrapped p-value(s).
@@ -713,13 +2191,46 @@ def wildboottest(model : 'OLS',
   xnames = model.data.xnames
   ynames = model.data.ynames
 
-  pvalues = []
-  tstats = []
+  res_df, full_enumeration_warn = _wildboottest(
+    X = X, Y = Y, xnames = xnames, B = B, cluster = cluster, param = param,
+    weights_type = weights_type, impose_null = impose_null, bootstrap_type = bootstrap_type,
+    seed = seed, adj = adj, cluster_adj = cluster_adj, parallel = parallel, cache = cache, fe = fe,
+    profile = profile
+  )
+
+  if full_enumeration_warn:
+    warnings.warn("2^G < the number of boot iterations, setting full_enumeration to True.")
+
+  if show:
+    print(res_df.to_markdown(floatfmt=".3f"))
 
-  def generate_stats(param, cluster):
+  return res_df
 
-      R = np.zeros(len(xnames))
-      R[xnames.index(param)] = 1
+def _wildboottest(X, Y, xnames, B, cluster, param, weights_type, impose_null,
+                  bootstrap_type, seed, adj, cluster_adj, parallel, cache = None, fe = None, profile = False):
+
+  # run the bootstrap on arrays, for the statsmodels interface `wildboottest()`
+  # and the batch interface `wildboottest.batch.wildboottest_batch()`
+  if fe is not None:
+    if cluster is None:
+      raise ValueError("Fixed effects `fe` are only supported for the wild cluster bootstrap, i.e. with `cluster`.")
+    # constant columns, e.g. the intercept, are absorbed by the fixed effects
+    X = np.asarray(X)
+    keep = np.ptp(X, axis = 0) > 0
+    if isinstance(param, str) and not keep[list(xnames).index(param)]:
+      raise ValueError(f"`param` '{param}' is absorbed by the fixed effects `fe`.")
+    X = X[:, keep]
+    xnames = [x for x, k in zip(xnames, keep) if k]
+
+  def generate_stats(params, cluster):
+
+      # one row of R per parameter: all hypotheses share the design-level
+      # precomputations and the bootstrap weights
+      R = np.zeros((len(params), len(xnames)))
+      for i, x in enumerate(params):
+        R[i, xnames.index(x)] = 1
+      if len(params) == 1:
+        R = R[0]
       r = 0
       # Just test for beta=0
 
@@ -729,7 +2240,7 @@ def wildboottest(model : 'OLS',
 
       if cluster is None:
 
-          boot = WildboottestHC(X = X, Y = Y, R = R, r = r, B = B, seed = seed)
+          boot = WildboottestHC(X = X, Y = Y, R = R, r = r, B = B, seed = seed, profile = profile)
           boot.get_adjustments(bootstrap_type = bootstrap_type)
           boot.get_uhat(impose_null = impose_null)
           boot.get_tboot(weights_type = weights_type)
@@ -740,7 +2251,7 @@ def wildboottest(model : 'OLS',
       else:
 
           boot = WildboottestCL(X = X, Y = Y, cluster = cluster,
-                              R = R, B = B, seed = seed, parallel = parallel)
+                              R = R, B = B, seed = seed, parallel = parallel, cache = cache, fe = fe, profile = profile)
           boot.get_scores(bootstrap_type = bootstrap_type, impose_null = impose_null, adj=adj, cluster_adj=cluster_adj)
           _, _, full_enumeration_warn = boot.get_weights(weights_type = weights_type)
           boot.get_numer()
@@ -750,23 +2261,19 @@ def wildboottest(model : 'OLS',
           boot.get_tstat()
           boot.get_pvalue(pval_type = "two-tailed")
 
-      pvalues.append(boot.pvalue)
-      tstats.append(boot.t_stat)
+      pvalues = list(np.atleast_1d(boot.pvalue))
+      tstats = list(np.atleast_1d(boot.t_stat))
 
       return pvalues, tstats, full_enumeration_warn
 
   if param is None:
-    for x in xnames:
-      pvalues, tstats, full_enumeration_warn = generate_stats(x, cluster=cluster)
+    pvalues, tstats, full_enumeration_warn = generate_stats(xnames, cluster=cluster)
     param = xnames
   elif isinstance(param, str):
-    pvalues, tstats, full_enumeration_warn = generate_stats(param, cluster=cluster)
+    pvalues, tstats, full_enumeration_warn = generate_stats([param], cluster=cluster)
   else:
     raise Exception("`param` not correctly specified")
 
-  if full_enumeration_warn:
-    warnings.warn("2^G < the number of boot iterations, setting full_enumeration to True.")
-
   res = {
     'param': param,
     'statistic': tstats,
@@ -775,10 +2282,7 @@ def wildboottest(model : 'OLS',
 
   res_df = pd.DataFrame(res).set_index('param')
 
-  if show:
-    print(res_df.to_markdown(floatfmt=".3f"))
-
-  return res_df
+  return res_df, full_enumeration_warn
 
 if __name__ == '__main__':
     import statsmodels.api as sm